@@ -1,10 +1,9 @@
 # agent.py
 
 import asyncio
-import yaml
 import logging
-from core.loop import AgentLoop
-from core.session import MultiMCP
+from typing import Optional
+from core.service import AgentService
 
 # Set up logging
 logging.basicConfig(
@@ -22,6 +21,26 @@ def log(stage: str, msg: str):
     logger.info(msg_str)
 
 
+# One AgentService per process: profile, MCP servers, tools and models are
+# loaded on the first query and reused by every query after it.
+_service: Optional[AgentService] = None
+
+
+async def get_service() -> AgentService:
+    global _service
+    if _service is None:
+        _service = AgentService()
+    await _service.start()
+    return _service
+
+
+async def shutdown_service():
+    global _service
+    if _service is not None:
+        await _service.shutdown()
+        _service = None
+
+
 async def main(get_user_input=None):
     logger.info("🧠 Cortex-R Agent Ready")
     
@@ -32,46 +51,31 @@ async def main(get_user_input=None):
     else:
         user_input = input("🧑 What do you want to solve today? → ")
 
-    # Load MCP server configs from profiles.yaml
     try:
-        with open("config/profiles.yaml", "r") as f:
-            profile = yaml.safe_load(f)
-            mcp_servers = profile.get("mcp_servers", [])
-            logger.info(f"Loaded {len(mcp_servers)} MCP server configurations")
+        service = await get_service()
     except Exception as e:
-        logger.error(f"Failed to load profiles.yaml: {e}")
+        error_msg = f"Agent failed to start: {e}"
+        log("fatal", error_msg)
+        logger.error(error_msg, exc_info=True)
         return "I'm having trouble accessing my configuration. Please try again later."
 
-    try:
-        multi_mcp = MultiMCP(server_configs=mcp_servers)
-        logger.info("Initializing MultiMCP...")
-        await multi_mcp.initialize()
-        logger.info("MultiMCP initialized successfully")
-
-        agent = AgentLoop(
-            user_input=user_input,
-            dispatcher=multi_mcp
-        )
-
-        logger.info("Running agent loop...")
-        final_response = await agent.run()
-        response_text = final_response.replace("FINAL_ANSWER:", "").strip()
-        
-        if not get_user_input:
-            print("\n💡 Final Answer:\n", response_text)
-        
-        logger.info(f"Agent response: {response_text}")
-        return response_text
+    response_text = await service.run(user_input)
 
-    except Exception as e:
-        error_msg = f"Agent failed: {e}"
-        log("fatal", error_msg)
-        logger.error(error_msg, exc_info=True)
-        return "I encountered an error while processing your request. Please try again later."
+    if not get_user_input:
+        print("\n💡 Final Answer:\n", response_text)
+
+    return response_text
+
+
+async def run_cli():
+    try:
+        await main()
+    finally:
+        await shutdown_service()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(run_cli())
 
 
 # Find the ASCII values of characters in INDIA and then return sum of exponentials of those values.
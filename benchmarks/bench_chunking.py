@@ -0,0 +1,147 @@
+# benchmarks/bench_chunking.py
+# Compares the two chunking modes of the documents server:
+#   llm       → semantic_merge(): one phi4 chat call per 512-word window
+#   embedding → similarity_chunks(): one batched embedding pass + NumPy cosine
+#
+# A test document is stitched together from ~--segment-words spans of the files in
+# documents/, cycling between files so the true topic boundaries are known. For
+# each mode it reports chunking time, boundary precision/recall (a predicted
+# boundary counts if it lands within --tolerance words of a true one), chunk
+# purity, and retrieval hit@k: for sampled sentences, does one of the top-k
+# chunks come mostly from the same span?
+#
+# Needs a running Ollama with nomic-embed-text (and phi4 unless --skip-llm). The
+# embedding cache is bypassed, so timings include every embedding call.
+#
+# Usage: uv run benchmarks/bench_chunking.py [--segments 12] [--queries 40] [--skip-llm]
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(ROOT))
+
+import mcp_server_2 as docs
+from modules.chunking import similarity_chunks, split_sentences
+
+embedder = docs.make_embedder(cache=None)
+
+
+def load_sources(limit_words: int) -> list[list[str]]:
+    sources = []
+    for file in sorted((ROOT / "documents").glob("*.*")):
+        if file.suffix.lower() not in (".md", ".txt", ".pdf", ".docx", ".html", ".htm"):
+            continue
+        try:
+            text = docs.extract_document(str(file))
+        except Exception as e:
+            print(f"skip {file.name}: {e}")
+            continue
+        words = text.split()
+        if len(words) >= limit_words:
+            sources.append(words)
+    return sources
+
+
+def build_document(sources: list[list[str]], segments: int, segment_words: int, rng: random.Random):
+    """Returns (text, word_segment_ids, boundaries as word offsets)."""
+    parts, seg_ids, boundaries = [], [], []
+    for seg in range(segments):
+        words = sources[seg % len(sources)]
+        start = rng.randrange(0, max(1, len(words) - segment_words))
+        span = words[start:start + segment_words]
+        if seg:
+            boundaries.append(len(seg_ids))
+        parts.append(" ".join(span))
+        seg_ids.extend([seg] * len(span))
+    return "\n\n".join(parts), seg_ids, boundaries
+
+
+def chunk_segments(chunks: list[str], seg_ids: list[int]) -> tuple[list[int], list[int]]:
+    """Maps chunks back onto word offsets; returns (majority segment per chunk, predicted boundaries)."""
+    majority, boundaries, pos = [], [], 0
+    for n, chunk in enumerate(chunks):
+        count = len(chunk.split())
+        ids = seg_ids[pos:pos + count] or [seg_ids[-1]]
+        majority.append(max(set(ids), key=ids.count))
+        if n:
+            boundaries.append(pos)
+        pos += count
+    return majority, boundaries
+
+
+def purity(chunks: list[str], seg_ids: list[int]) -> float:
+    pos, pure = 0, 0
+    for chunk in chunks:
+        ids = seg_ids[pos:pos + len(chunk.split())]
+        if ids:
+            pure += max(ids.count(s) for s in set(ids))
+        pos += len(chunk.split())
+    return pure / max(1, pos)
+
+
+def boundary_scores(predicted: list[int], truth: list[int], tolerance: int) -> tuple[float, float]:
+    hit = lambda b, ref: any(abs(b - r) <= tolerance for r in ref)
+    precision = sum(hit(b, truth) for b in predicted) / len(predicted) if predicted else 0.0
+    recall = sum(hit(t, predicted) for t in truth) / len(truth) if truth else 0.0
+    return precision, recall
+
+
+def hit_at_k(chunks, majority, queries, k: int) -> float:
+    vectors = embedder.embed_many(chunks)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    qvecs = embedder.embed_many([q for q, _ in queries])
+    qvecs /= np.linalg.norm(qvecs, axis=1, keepdims=True)
+    top = np.argsort(-(qvecs @ vectors.T), axis=1)[:, :k]
+    return float(np.mean([seg in {majority[i] for i in row} for row, (_, seg) in zip(top, queries)]))
+
+
+def main(segments: int, segment_words: int, queries: int, k: int, tolerance: int, skip_llm: bool, seed: int):
+    rng = random.Random(seed)
+    sources = load_sources(segment_words)
+    if len(sources) < 2:
+        sys.exit("Need at least two documents in documents/ with enough text.")
+
+    text, seg_ids, truth = build_document(sources, segments, segment_words, rng)
+    sentences = [(s, n) for n, part in enumerate(text.split("\n\n")) for s in split_sentences(part) if len(s.split()) >= 6]
+    sample = rng.sample(sentences, min(queries, len(sentences)))
+
+    modes = {"embedding": lambda t: similarity_chunks(
+        t, embedder.embed_many,
+        threshold=docs.CHUNKING_CONFIG.get("similarity_threshold", 0.6),
+        max_words=docs.CHUNKING_CONFIG.get("max_words", 512),
+        min_words=docs.CHUNKING_CONFIG.get("min_words", 20),
+        window=docs.CHUNKING_CONFIG.get("window", 2)
+    )}
+    if not skip_llm:
+        modes["llm"] = docs.semantic_merge
+
+    print(f"\n{segments} spans × {segment_words} words from {len(sources)} documents, {len(sample)} queries")
+    print(f"{'mode':<10} {'time (s)':>9} {'chunks':>7} {'purity':>7} {'bnd P':>6} {'bnd R':>6} {f'hit@{k}':>7}")
+    for name, chunker in modes.items():
+        start = time.perf_counter()
+        chunks = [c for c in chunker(text) if c.strip()]
+        elapsed = time.perf_counter() - start
+        majority, predicted = chunk_segments(chunks, seg_ids)
+        precision, recall = boundary_scores(predicted, truth, tolerance)
+        hits = hit_at_k(chunks, majority, sample, k)
+        print(f"{name:<10} {elapsed:>9.2f} {len(chunks):>7} {purity(chunks, seg_ids):>7.2f} "
+              f"{precision:>6.2f} {recall:>6.2f} {hits:>7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embedding-similarity vs LLM chunking")
+    parser.add_argument("--segments", type=int, default=12)
+    parser.add_argument("--segment-words", type=int, default=180)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--tolerance", type=int, default=25)
+    parser.add_argument("--skip-llm", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.segments, args.segment_words, args.queries, args.k, args.tolerance, args.skip_llm, args.seed)
@@ -0,0 +1,78 @@
+# benchmarks/bench_discovery.py
+# Startup-time benchmark for MultiMCP tool discovery.
+#
+# Compares:
+#   cold     → servers scanned one after another (the old behaviour)
+#   parallel → servers scanned concurrently
+#   cached   → tool_map built from the on-disk manifest, no subprocesses
+#
+# Usage: uv run benchmarks/bench_discovery.py [--runs 3]
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(ROOT))
+
+from core.session import MultiMCP
+
+
+def load_servers() -> list[dict]:
+    profile = yaml.safe_load((ROOT / "config" / "profiles.yaml").read_text())
+    servers = profile.get("mcp_servers", [])
+    # The profile carries machine-specific cwds; point them at this checkout
+    return [{**s, "cwd": str(ROOT)} for s in servers]
+
+
+async def time_discovery(servers: list[dict], parallel: bool, manifest_path: str | None) -> tuple[float, int]:
+    multi = MultiMCP(servers, parallel_discovery=parallel, manifest_path=manifest_path)
+    start = time.perf_counter()
+    await multi.initialize()
+    elapsed = time.perf_counter() - start
+    await multi.shutdown()
+    return elapsed, len(multi.tool_map)
+
+
+async def main(runs: int):
+    os.chdir(ROOT)
+    servers = load_servers()
+    manifest_path = str(Path(tempfile.mkdtemp()) / "tool_manifest.json")
+
+    # Populate the manifest once so the cached runs are warm
+    await time_discovery(servers, parallel=True, manifest_path=manifest_path)
+
+    modes = {
+        "cold": dict(parallel=False, manifest_path=None),
+        "parallel": dict(parallel=True, manifest_path=None),
+        "cached": dict(parallel=True, manifest_path=manifest_path),
+    }
+    results = {}
+    for name, kwargs in modes.items():
+        timings = []
+        for _ in range(runs):
+            elapsed, n_tools = await time_discovery(servers, **kwargs)
+            timings.append(elapsed)
+        results[name] = (timings, n_tools)
+
+    print(f"\n{'mode':<10} {'tools':>6} {'mean (s)':>10} {'min (s)':>10} {'max (s)':>10}")
+    for name, (timings, n_tools) in results.items():
+        print(f"{name:<10} {n_tools:>6} {statistics.mean(timings):>10.3f} {min(timings):>10.3f} {max(timings):>10.3f}")
+
+    cold = statistics.mean(results["cold"][0])
+    for name in ("parallel", "cached"):
+        print(f"{name} speedup over cold: {cold / statistics.mean(results[name][0]):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MultiMCP tool discovery")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
@@ -0,0 +1,96 @@
+# benchmarks/bench_fused_step.py
+# Compares agent steps per second for the two planning modes:
+#   two_call → extract_perception() then generate_plan() (two LLM round trips)
+#   fused    → generate_fused_plan() (one LLM round trip)
+#
+# A stand-in model answers every prompt after a fixed --latency, so the result
+# reflects round trips rather than a live LLM. Prompt characters sent per step
+# are reported as a proxy for token spend.
+#
+# Usage: uv run benchmarks/bench_fused_step.py [--steps 20] [--latency 0.8]
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(ROOT))
+
+from modules.perception import extract_perception
+from modules.decision import generate_plan, generate_fused_plan
+
+QUERY = "Find the ASCII values of characters in INDIA and then return sum of exponentials of those values."
+TOOLS = """- strings_to_chars_to_int: Return the ASCII values of the characters in a word. Usage: strings_to_chars_to_int|input={"string": "INDIA"}
+- int_list_to_exponential_sum: Return sum of exponentials of numbers in a list. Usage: int_list_to_exponential_sum|input={"int_list": [73, 78, 68, 73, 65]}
+- search_documents: Search indexed documents for relevant content. Usage: search_documents|query="india Current GDP\""""
+
+
+class StandInModel:
+    """Answers like the real LLM would, after a fixed latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.prompt_chars = 0
+
+    async def generate_text(self, prompt: str, timeout=None, use_cache: bool = True) -> str:
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        await asyncio.sleep(self.latency)
+        if "INTENT:" in prompt:
+            return (
+                "INTENT: sum of exponentials of ASCII values\n"
+                'ENTITIES: ["INDIA", "ASCII"]\n'
+                "TOOL_HINT: strings_to_chars_to_int\n"
+                "FUNCTION_CALL: strings_to_chars_to_int|input.string=INDIA"
+            )
+        if "extracts structured facts" in prompt:
+            return '{"intent": "sum of exponentials of ASCII values", "entities": ["INDIA", "ASCII"], "tool_hint": "strings_to_chars_to_int"}'
+        return "FUNCTION_CALL: strings_to_chars_to_int|input.string=INDIA"
+
+
+async def two_call_step(model: StandInModel, step: int, steps: int) -> str:
+    perception = await extract_perception(QUERY, model=model)
+    return await generate_plan(perception, [], tool_descriptions=TOOLS, step_num=step, max_steps=steps, model=model)
+
+
+async def fused_step(model: StandInModel, step: int, steps: int) -> str:
+    _, plan = await generate_fused_plan(QUERY, [], tool_descriptions=TOOLS, step_num=step, max_steps=steps, model=model)
+    return plan
+
+
+async def run_mode(step_fn, steps: int, latency: float) -> dict:
+    model = StandInModel(latency)
+    start = time.perf_counter()
+    for step in range(1, steps + 1):
+        plan = await step_fn(model, step, steps)
+        assert plan.startswith("FUNCTION_CALL:"), plan
+    elapsed = time.perf_counter() - start
+    return {
+        "steps_per_sec": steps / elapsed,
+        "llm_calls_per_step": model.calls / steps,
+        "prompt_chars_per_step": model.prompt_chars / steps,
+    }
+
+
+async def main(steps: int, latency: float):
+    results = {
+        "two_call": await run_mode(two_call_step, steps, latency),
+        "fused": await run_mode(fused_step, steps, latency),
+    }
+
+    print(f"\n{steps} steps, stand-in LLM latency {latency:.2f}s")
+    print(f"{'mode':<10} {'steps/s':>10} {'LLM calls/step':>16} {'prompt chars/step':>19}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['steps_per_sec']:>10.2f} {r['llm_calls_per_step']:>16.1f} {r['prompt_chars_per_step']:>19.0f}")
+    print(f"fused speedup: {results['fused']['steps_per_sec'] / results['two_call']['steps_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark fused vs two-call planning")
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.8)
+    args = parser.parse_args()
+    asyncio.run(main(args.steps, args.latency))
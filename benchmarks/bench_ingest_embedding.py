@@ -0,0 +1,88 @@
+# benchmarks/bench_ingest_embedding.py
+# Compares chunks/sec for document-ingestion embedding:
+#   per_chunk → one /api/embeddings request per chunk (the old loop)
+#   batched   → BatchEmbedder.embed_many() over /api/embed
+#
+# A mock Ollama server answers after --latency seconds per request plus
+# --per-item seconds per embedded text, so the result reflects round trips
+# rather than a live model.
+#
+# Usage: uv run benchmarks/bench_ingest_embedding.py [--chunks 500] [--latency 0.02] [--per-item 0.001]
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(ROOT))
+
+from modules.embedding import BatchEmbedder
+
+DIM = 768
+
+
+def start_mock_ollama(latency: float, per_item: float) -> tuple[ThreadingHTTPServer, str]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if self.path == "/api/embed":
+                texts = body["input"]
+                time.sleep(latency + per_item * len(texts))
+                payload = {"embeddings": [[float(len(t))] * DIM for t in texts]}
+            else:
+                time.sleep(latency + per_item)
+                payload = {"embedding": [float(len(body["prompt"]))] * DIM}
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main(chunks: int, latency: float, per_item: float):
+    server, base = start_mock_ollama(latency, per_item)
+    texts = [f"chunk {i} " + "lorem ipsum " * (i % 40) for i in range(chunks)]
+    embedder = BatchEmbedder(batch_url=f"{base}/api/embed", single_url=f"{base}/api/embeddings")
+
+    start = time.perf_counter()
+    per_chunk = np.stack([embedder._post_single(t) for t in texts])
+    per_chunk_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = embedder.embed_many(texts)
+    batched_time = time.perf_counter() - start
+
+    assert np.array_equal(per_chunk, batched), "batched vectors differ from per-chunk vectors"
+
+    print(f"\n{chunks} chunks, mock latency {latency * 1000:.0f}ms/request + {per_item * 1000:.1f}ms/text")
+    print(f"{'mode':<10} {'wall (s)':>10} {'chunks/s':>10}")
+    print(f"{'per_chunk':<10} {per_chunk_time:>10.2f} {chunks / per_chunk_time:>10.0f}")
+    print(f"{'batched':<10} {batched_time:>10.2f} {chunks / batched_time:>10.0f}")
+    print(f"speedup: {per_chunk_time / batched_time:.1f}x (final batch size {embedder.batch_size})")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-chunk vs batched embedding")
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--per-item", type=float, default=0.001)
+    args = parser.parse_args()
+    main(args.chunks, args.latency, args.per_item)
@@ -0,0 +1,108 @@
+# benchmarks/bench_llm_concurrency.py
+# Shows that concurrent ModelManager.generate_text calls overlap instead of
+# blocking the event loop.
+#
+# A mock Ollama /api/generate server answers every request after --delay
+# seconds. N calls are issued sequentially and then with asyncio.gather; with
+# non-blocking clients the concurrent wall time stays close to one delay.
+# A heartbeat task measures the longest event-loop stall during each run.
+# The response cache is bypassed: every call must reach the mock server, and
+# its mock answers must not end up in the real cache.
+#
+# Usage: uv run benchmarks/bench_llm_concurrency.py [--calls 10] [--delay 0.5]
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(ROOT))
+
+from modules.model_manager import ModelManager
+
+
+async def start_mock_ollama(delay: float) -> tuple[asyncio.AbstractServer, str]:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                await reader.readexactly(length)
+                await asyncio.sleep(delay)
+                body = json.dumps({"response": "FINAL_ANSWER: [42]", "done": True}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/api/generate"
+
+
+async def heartbeat(stop: asyncio.Event, gaps: list):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        gaps.append(now - last - 0.01)
+        last = now
+
+
+async def timed(coro_factory) -> tuple[float, float]:
+    stop, gaps = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, gaps))
+    start = time.perf_counter()
+    await coro_factory()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, max(gaps, default=0.0)
+
+
+async def main(calls: int, delay: float):
+    server, url = await start_mock_ollama(delay)
+    model = ModelManager(model_key="phi4")
+    model.model_info = {**model.model_info, "url": {"generate": url}}
+
+    prompts = [f"prompt {i}" for i in range(calls)]
+
+    async def sequential():
+        for p in prompts:
+            await model.generate_text(p, use_cache=False)
+
+    async def concurrent():
+        await asyncio.gather(*(model.generate_text(p, use_cache=False) for p in prompts))
+
+    await model.generate_text("warm-up", use_cache=False)
+    seq_time, seq_stall = await timed(sequential)
+    con_time, con_stall = await timed(concurrent)
+
+    print(f"\n{calls} calls, mock latency {delay:.2f}s")
+    print(f"{'mode':<12} {'wall (s)':>10} {'max loop stall (ms)':>20}")
+    print(f"{'sequential':<12} {seq_time:>10.3f} {seq_stall * 1000:>20.1f}")
+    print(f"{'concurrent':<12} {con_time:>10.3f} {con_stall * 1000:>20.1f}")
+    print(f"overlap factor: {seq_time / con_time:.1f}x (ideal {calls}x)")
+
+    await ModelManager.aclose()
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent LLM calls through ModelManager")
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.delay))
@@ -0,0 +1,118 @@
+# benchmarks/bench_search.py
+# Compares search_documents ranking modes on the current index:
+#   vector → FAISS only
+#   bm25   → FTS5 inverted index only
+#   hybrid → both, fused with weighted reciprocal rank fusion
+#
+# Reports recall@k (a query counts as a hit if any of its relevant items is in
+# the top k) and per-query latency p50/p95, including the query embedding. The
+# embedding cache is bypassed, so later modes don't reuse the first mode's query vectors.
+#
+# Labeled queries come from --queries, a JSONL file with one query per line:
+#   {"query": "How much Anmol singh paid for his DLF apartment?", "relevant": ["dlf.pdf"]}
+# where each relevant item is a document name or a chunk_id. Without --queries,
+# queries are generated from --sample random chunks, each labeled with its own chunk_id:
+#   keyword → the chunk's rarest words (exact-name style lookups)
+#   phrase  → a run of consecutive words from the chunk
+#
+# Needs an ingested faiss_index/ and a running Ollama with nomic-embed-text.
+#
+# Usage: uv run benchmarks/bench_search.py [--queries labeled.jsonl] [--k 5] [--sample 50]
+
+import argparse
+import json
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(ROOT))
+
+import mcp_server_2 as docs
+
+MODES = ["vector", "bm25", "hybrid"]
+
+
+def load_labeled(path: Path) -> list[dict]:
+    queries = []
+    for line in path.read_text().splitlines():
+        if line.strip():
+            item = json.loads(line)
+            queries.append({"query": item["query"], "relevant": set(item["relevant"]), "kind": item.get("kind", "labeled")})
+    return queries
+
+
+def generate_queries(sample: int, rng: random.Random) -> list[dict]:
+    db = sqlite3.connect(f"file:{ROOT / 'faiss_index' / 'documents.sqlite'}?mode=ro", uri=True)
+    chunks = db.execute("SELECT chunk_id, chunk FROM chunks WHERE removed_version IS NULL").fetchall()
+    db.close()
+
+    words = lambda text: re.findall(r"[A-Za-z][A-Za-z0-9-]{3,}", text)
+    df = Counter(w.lower() for _, chunk in chunks for w in set(words(chunk)))
+
+    queries = []
+    for chunk_id, chunk in rng.sample(chunks, min(sample, len(chunks))):
+        tokens = chunk.split()
+        if len(tokens) < 12:
+            continue
+        rare = sorted(set(words(chunk)), key=lambda w: (df[w.lower()], w))[:3]
+        start = rng.randrange(0, len(tokens) - 8)
+        queries.append({"query": " ".join(rare), "relevant": {chunk_id}, "kind": "keyword"})
+        queries.append({"query": " ".join(tokens[start:start + 8]), "relevant": {chunk_id}, "kind": "phrase"})
+    return queries
+
+
+def evaluate(queries: list[dict], mode: str, k: int) -> dict:
+    hits, latencies, by_kind = 0, [], {}
+    for q in queries:
+        start = time.perf_counter()
+        rows = docs.rank_chunks(q["query"], k, mode=mode)
+        latencies.append(time.perf_counter() - start)
+        hit = any(
+            source["doc"] in q["relevant"] or source["chunk_id"] in q["relevant"]
+            for r in rows for source in r["sources"]
+        )
+        hits += hit
+        kind = by_kind.setdefault(q["kind"], [0, 0])
+        kind[0] += hit
+        kind[1] += 1
+    latencies.sort()
+    return {
+        "recall": hits / len(queries),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "by_kind": {kind: h / n for kind, (h, n) in by_kind.items()},
+    }
+
+
+def main(queries_path: str, k: int, sample: int, seed: int):
+    queries = load_labeled(Path(queries_path)) if queries_path else generate_queries(sample, random.Random(seed))
+    if not queries:
+        sys.exit("No queries: ingest documents first or pass --queries.")
+
+    docs._embedder = docs.make_embedder(cache=None)
+    docs.rank_chunks(queries[0]["query"], k)  # warm up the resident index and the store
+    results = {mode: evaluate(queries, mode, k) for mode in MODES}
+    kinds = sorted({q["kind"] for q in queries})
+
+    print(f"\n{len(queries)} queries, k={k}")
+    header = f"{'mode':<8} {f'recall@{k}':>9} " + " ".join(f"{kind:>9}" for kind in kinds)
+    print(header + f" {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for mode, r in results.items():
+        per_kind = " ".join(f"{r['by_kind'].get(kind, 0):>9.2f}" for kind in kinds)
+        print(f"{mode:<8} {r['recall']:>9.2f} {per_kind} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vector vs BM25 vs hybrid document search")
+    parser.add_argument("--queries", help="JSONL file of labeled queries")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--sample", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.queries, args.k, args.sample, args.seed)
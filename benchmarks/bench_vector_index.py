@@ -0,0 +1,122 @@
+# benchmarks/bench_vector_index.py
+# Compares the documents-server index backends (modules/vector_index.py) on
+# synthetic clustered vectors shaped like nomic-embed-text output:
+#   flat, ivf_flat, ivf_pq, hnsw
+#
+# For each corpus size it reports build time (training + adding), recall@k
+# against the exact flat results, single-query latency p50/p95 and the
+# serialized index size. nprobe / ef_search / nlist / pq_m come from
+# config/documents.yaml unless overridden.
+#
+# The 1M-chunk run needs ~3 GB of RAM for the vectors at --dim 768.
+#
+# Usage: uv run benchmarks/bench_vector_index.py [--sizes 10000,100000,1000000] [--dim 768] [--nprobe 16]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+import yaml
+
+ROOT = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(ROOT))
+
+from modules.vector_index import INDEX_TYPES, build_index
+
+
+def make_corpus(n: int, dim: int, rng: np.random.Generator, clusters: int = 256) -> np.ndarray:
+    """Gaussian blobs around random unit centers, like topic clusters of text embeddings."""
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 100_000):
+        count = min(100_000, n - start)
+        labels = rng.integers(0, clusters, count)
+        noise = rng.standard_normal((count, dim)).astype(np.float32) * (1.4 / np.sqrt(dim))
+        vectors[start:start + count] = centers[labels] + noise
+    return vectors
+
+
+def index_bytes(index) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bin")
+        faiss.write_index(index, path)
+        return os.path.getsize(path)
+
+
+def run(kind: str, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, config: dict, rng) -> dict:
+    n, dim = corpus.shape
+    ids = np.arange(n, dtype=np.int64)
+    sample = corpus[rng.choice(n, min(n, config.get("train_sample", 100_000)), replace=False)]
+
+    def batches():
+        for start in range(0, n, 50_000):
+            yield ids[start:start + 50_000], corpus[start:start + 50_000]
+
+    start = time.perf_counter()
+    index = build_index(kind, dim, n, sample, batches, config)
+    build = time.perf_counter() - start
+
+    latencies, found = [], []
+    for q in queries:
+        t = time.perf_counter()
+        _, I = index.search(q.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - t)
+        found.append(I[0])
+    latencies.sort()
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return {
+        "build_s": build,
+        "recall": recall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "mb": index_bytes(index) / 2**20,
+    }
+
+
+def main(sizes: list[int], dim: int, queries: int, k: int, kinds: list[str], overrides: dict, seed: int):
+    config = yaml.safe_load((ROOT / "config" / "documents.yaml").read_text()).get("index", {})
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    rng = np.random.default_rng(seed)
+
+    for n in sizes:
+        corpus = make_corpus(n, dim, rng)
+        qvecs = corpus[rng.choice(n, queries, replace=False)] + 0.05 * rng.standard_normal((queries, dim)).astype(np.float32) / np.sqrt(dim)
+        exact = faiss.IndexFlatL2(dim)
+        exact.add(corpus)
+        _, truth = exact.search(qvecs, k)
+        del exact
+
+        print(f"\n{n:,} chunks × {dim} dims, {queries} queries, recall@{k} vs flat "
+              f"(nprobe={config.get('nprobe', 16)}, ef_search={config.get('ef_search', 64)})")
+        print(f"{'index':<9} {'build (s)':>10} {'recall':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'size (MB)':>10}")
+        for kind in kinds:
+            r = run(kind, corpus, qvecs, truth, k, config, rng)
+            print(f"{kind:<9} {r['build_s']:>10.2f} {r['recall']:>7.3f} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index backends for the documents corpus")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--kinds", default=",".join(INDEX_TYPES))
+    parser.add_argument("--nprobe", type=int)
+    parser.add_argument("--ef-search", type=int)
+    parser.add_argument("--nlist", type=int)
+    parser.add_argument("--pq-m", type=int)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(
+        [int(s) for s in args.sizes.split(",")],
+        args.dim, args.queries, args.k, args.kinds.split(","),
+        {"nprobe": args.nprobe, "ef_search": args.ef_search, "nlist": args.nlist, "pq_m": args.pq_m},
+        args.seed
+    )
@@ -23,11 +23,14 @@
 
 from typing import List, Optional, Dict, Any
 from modules.memory import MemoryManager, MemoryItem
+from modules.embedding_cache import EmbeddingCache
 from pathlib import Path
 import yaml
 import time
 import uuid
 
+ROOT = Path(__file__).parent.parent
+
 class AgentProfile:
     def __init__(self, config_path: str = "config/profiles.yaml"):
         with open(config_path, "r") as f:
@@ -38,11 +41,20 @@ class AgentProfile:
         self.description = config["agent"]["description"]
         self.strategy = config["strategy"]["type"]
         self.max_steps = config["strategy"]["max_steps"]
+        self.planning_mode = config["strategy"].get("planning_mode", "two_call")
+        self.max_parallel_calls = config["strategy"].get("max_parallel_calls", 1)
+        self.tool_timeout = config["strategy"].get("tool_timeout")
+        self.explore_models = config["strategy"].get("explore_models", [])
+        self.explore_pick = config["strategy"].get("explore_pick", "first_valid")
 
         self.memory_config = config["memory"]
         self.llm_config = config["llm"]
         self.persona = config["persona"]
 
+        self.mcp_servers = config.get("mcp_servers", [])
+        self.mcp_config = config.get("mcp", {})
+        self.dispatch_config = config.get("dispatch", {})
+
     def __repr__(self):
         return f"<AgentProfile {self.name} ({self.strategy})>"
 
@@ -53,14 +65,21 @@ class ToolCallTrace:
         self.result = result
 
 class AgentContext:
-    def __init__(self, user_input: str, profile: Optional[AgentProfile] = None):
+    def __init__(self, user_input: str, profile: Optional[AgentProfile] = None, session_key: Optional[str] = None):
         self.user_input = user_input
         self.agent_profile = profile or AgentProfile()
-        self.session_id = f"session-{int(time.time())}-{uuid.uuid4().hex[:6]}"
+        self.session_key = session_key
+        prefix = f"session-{session_key}" if session_key else "session"
+        self.session_id = f"{prefix}-{int(time.time())}-{uuid.uuid4().hex[:6]}"
         self.step = 0
+        cache_config = self.agent_profile.memory_config.get("embedding_cache", {})
         self.memory = MemoryManager(
             embedding_model_url=self.agent_profile.memory_config["embedding_url"],
-            model_name=self.agent_profile.memory_config["embedding_model"]
+            model_name=self.agent_profile.memory_config["embedding_model"],
+            cache=EmbeddingCache.shared(
+                str(ROOT / cache_config.get("path", "cache/embeddings")),
+                max_entries=cache_config.get("max_entries", 500_000)
+            ) if cache_config.get("enabled", False) else None
         )
         self.memory_trace: List[MemoryItem] = []
         self.tool_calls: List[ToolCallTrace] = []
@@ -0,0 +1,105 @@
+# core/dispatch.py
+
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+JobFn = Callable[[], Awaitable[None]]
+
+
+class Job:
+    def __init__(self, run: JobFn, on_cancel: Optional[JobFn] = None):
+        self.run = run
+        self.on_cancel = on_cancel
+
+
+class ChatDispatcher:
+    """
+    Worker-pool dispatch for chat messages.
+
+    - At most max_workers jobs run at once across all chats.
+    - Jobs from the same chat run one at a time, in arrival order.
+    - At most max_pending jobs wait in total; submit() returns False when full.
+    - With cancel_superseded, a new message drops that chat's queued (not yet
+      running) jobs and their on_cancel callbacks are fired.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100, cancel_superseded: bool = True):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.cancel_superseded = cancel_superseded
+        self._slots = asyncio.Semaphore(max_workers)
+        self._queues: Dict[str, Deque[Job]] = {}
+        self._runners: Dict[str, asyncio.Task] = {}
+        self._background: set = set()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def active_chats(self) -> int:
+        return len(self._runners)
+
+    def _spawn(self, coro: Awaitable[None]):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def submit(self, key: str, run: JobFn, on_cancel: Optional[JobFn] = None) -> bool:
+        """Queues a job for a chat. Returns False if the dispatcher is full."""
+        queue = self._queues.setdefault(key, deque())
+
+        if self.cancel_superseded:
+            while queue:
+                dropped = queue.popleft()
+                self._pending -= 1
+                logger.info(f"Dropping superseded job for chat {key}")
+                if dropped.on_cancel:
+                    self._spawn(dropped.on_cancel())
+
+        if self._pending >= self.max_pending:
+            if not queue and key not in self._runners:
+                self._queues.pop(key, None)
+            return False
+
+        queue.append(Job(run, on_cancel))
+        self._pending += 1
+        if key not in self._runners:
+            self._runners[key] = asyncio.create_task(self._drain(key))
+        return True
+
+    async def _drain(self, key: str):
+        queue = self._queues[key]
+        try:
+            while queue:
+                async with self._slots:
+                    # Take the head only once a slot is free, so a job waiting
+                    # for a worker can still be superseded by a newer message
+                    if not queue:
+                        break
+                    job = queue.popleft()
+                    self._pending -= 1
+                    try:
+                        await job.run()
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Job for chat {key} failed: {e}", exc_info=True)
+        finally:
+            self._runners.pop(key, None)
+            if not queue:
+                self._queues.pop(key, None)
+
+    async def close(self):
+        """Cancels running and queued jobs."""
+        runners = list(self._runners.values()) + list(self._background)
+        for task in runners:
+            task.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+        self._queues.clear()
+        self._pending = 0
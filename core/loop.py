@@ -1,20 +1,31 @@
 # core/loop.py
 
 import asyncio
-from core.context import AgentContext
+from typing import Any, List, Optional
+from core.context import AgentContext, AgentProfile
 from core.session import MultiMCP
-from core.strategy import decide_next_action
+from core.strategy import decide_next_action, decide_fused_action
 from modules.perception import extract_perception, PerceptionResult
-from modules.action import ToolCallResult, parse_function_call
+from modules.action import ToolCallResult, parse_function_calls
 from modules.memory import MemoryItem
+from modules.model_manager import ModelManager
 import json
 
 
 class AgentLoop:
-    def __init__(self, user_input: str, dispatcher: MultiMCP):
-        self.context = AgentContext(user_input)
+    def __init__(
+        self,
+        user_input: str,
+        dispatcher: MultiMCP,
+        profile: Optional[AgentProfile] = None,
+        tools: Optional[List[Any]] = None,
+        model: Optional[ModelManager] = None,
+        session_key: Optional[str] = None,
+    ):
+        self.context = AgentContext(user_input, profile=profile, session_key=session_key)
         self.mcp = dispatcher
-        self.tools = dispatcher.get_all_tools()
+        self.tools = tools if tools is not None else dispatcher.get_all_tools()
+        self.model = model
 
     def tool_expects_input(self, tool_name: str) -> bool:
         tool = next((t for t in self.tools if getattr(t, "name", None) == tool_name), None)
@@ -23,7 +34,31 @@ class AgentLoop:
         parameters = getattr(tool, "parameters", {})
         return list(parameters.keys()) == ["input"]
 
-    
+    def prepare_tool_input(self, tool_name: str, arguments: Any) -> Any:
+        if self.tool_expects_input(tool_name):
+            return {'input': arguments} if not (isinstance(arguments, dict) and 'input' in arguments) else arguments
+        return arguments
+
+    @staticmethod
+    def result_text(response: Any) -> str:
+        # ✅ Safe TextContent parsing
+        raw = getattr(response.content, 'text', str(response.content))
+        try:
+            result_obj = json.loads(raw) if raw.strip().startswith("{") else raw
+        except json.JSONDecodeError:
+            result_obj = raw
+
+        return result_obj.get("markdown") if isinstance(result_obj, dict) else str(result_obj)
+
+    def retrieve_memories(self, query: str) -> List[MemoryItem]:
+        retrieved = self.context.memory.retrieve(
+            query=query,
+            top_k=self.context.agent_profile.memory_config["top_k"],
+            type_filter=self.context.agent_profile.memory_config.get("type_filter", None),
+            session_filter=self.context.session_id
+        )
+        print(f"[memory] Retrieved {len(retrieved)} memories")
+        return retrieved
 
     async def run(self) -> str:
         print(f"[agent] Starting session: {self.context.session_id}")
@@ -36,67 +71,78 @@ class AgentLoop:
                 self.context.step = step
                 print(f"[loop] Step {step + 1} of {max_steps}")
 
-                # 🧠 Perception
-                perception_raw = await extract_perception(query)
+                if self.context.agent_profile.planning_mode == "fused":
+                    # 💾 Memory Retrieval (needed up front by the single call)
+                    retrieved = self.retrieve_memories(query)
+
+                    # 🧠📊 Perception + Planning in one LLM call
+                    perception, plan = await decide_fused_action(
+                        context=self.context,
+                        query=query,
+                        memory_items=retrieved,
+                        all_tools=self.tools,
+                        model=self.model
+                    )
+                    print(f"[perception] Intent: {perception.intent}, Hint: {perception.tool_hint}")
+
+                else:
+                    # 🧠 Perception
+                    perception_raw = await extract_perception(query, model=self.model)
 
 
-                # ✅ Exit cleanly on FINAL_ANSWER
-                # ✅ Handle string outputs safely before trying to parse
-                if isinstance(perception_raw, str):
-                    pr_str = perception_raw.strip()
+                    # ✅ Exit cleanly on FINAL_ANSWER
+                    # ✅ Handle string outputs safely before trying to parse
+                    if isinstance(perception_raw, str):
+                        pr_str = perception_raw.strip()
                     
-                    # Clean exit if it's a FINAL_ANSWER
-                    if pr_str.startswith("FINAL_ANSWER:"):
-                        self.context.final_answer = pr_str
-                        break
-
-                    # Detect LLM echoing the prompt
-                    if "Your last tool produced this result" in pr_str or "Original user task:" in pr_str:
-                        print("[perception] ⚠️ LLM likely echoed prompt. No actionable plan.")
-                        self.context.final_answer = "FINAL_ANSWER: [no result]"
-                        break
-
-                    # Try to decode stringified JSON if it looks valid
-                    try:
-                        perception_raw = json.loads(pr_str)
-                    except json.JSONDecodeError:
-                        print("[perception] ⚠️ LLM response was neither valid JSON nor actionable text.")
-                        self.context.final_answer = "FINAL_ANSWER: [no result]"
-                        break
-
-
-                # ✅ Try parsing PerceptionResult
-                if isinstance(perception_raw, PerceptionResult):
-                    perception = perception_raw
-                else:
-                    try:
-                        # Attempt to parse stringified JSON if needed
-                        if isinstance(perception_raw, str):
-                            perception_raw = json.loads(perception_raw)
-                        perception = PerceptionResult(**perception_raw)
-                    except Exception as e:
-                        print(f"[perception] ⚠️ LLM perception failed: {e}")
-                        print(f"[perception] Raw output: {perception_raw}")
-                        break
-
-                print(f"[perception] Intent: {perception.intent}, Hint: {perception.tool_hint}")
-
-                # 💾 Memory Retrieval
-                retrieved = self.context.memory.retrieve(
-                    query=query,
-                    top_k=self.context.agent_profile.memory_config["top_k"],
-                    type_filter=self.context.agent_profile.memory_config.get("type_filter", None),
-                    session_filter=self.context.session_id
-                )
-                print(f"[memory] Retrieved {len(retrieved)} memories")
-
-                # 📊 Planning (via strategy)
-                plan = await decide_next_action(
-                    context=self.context,
-                    perception=perception,
-                    memory_items=retrieved,
-                    all_tools=self.tools
-                )
+                        # Clean exit if it's a FINAL_ANSWER
+                        if pr_str.startswith("FINAL_ANSWER:"):
+                            self.context.final_answer = pr_str
+                            break
+
+                        # Detect LLM echoing the prompt
+                        if "Your last tool produced this result" in pr_str or "Original user task:" in pr_str:
+                            print("[perception] ⚠️ LLM likely echoed prompt. No actionable plan.")
+                            self.context.final_answer = "FINAL_ANSWER: [no result]"
+                            break
+
+                        # Try to decode stringified JSON if it looks valid
+                        try:
+                            perception_raw = json.loads(pr_str)
+                        except json.JSONDecodeError:
+                            print("[perception] ⚠️ LLM response was neither valid JSON nor actionable text.")
+                            self.context.final_answer = "FINAL_ANSWER: [no result]"
+                            break
+
+
+                    # ✅ Try parsing PerceptionResult
+                    if isinstance(perception_raw, PerceptionResult):
+                        perception = perception_raw
+                    else:
+                        try:
+                            # Attempt to parse stringified JSON if needed
+                            if isinstance(perception_raw, str):
+                                perception_raw = json.loads(perception_raw)
+                            perception = PerceptionResult(**perception_raw)
+                        except Exception as e:
+                            print(f"[perception] ⚠️ LLM perception failed: {e}")
+                            print(f"[perception] Raw output: {perception_raw}")
+                            break
+
+                    print(f"[perception] Intent: {perception.intent}, Hint: {perception.tool_hint}")
+
+                    # 💾 Memory Retrieval
+                    retrieved = self.retrieve_memories(query)
+
+                    # 📊 Planning (via strategy)
+                    plan = await decide_next_action(
+                        context=self.context,
+                        perception=perception,
+                        memory_items=retrieved,
+                        all_tools=self.tools,
+                        model=self.model
+                    )
+
                 print(f"[plan] {plan}")
 
                 if "FINAL_ANSWER:" in plan:
@@ -111,42 +157,58 @@ class AgentLoop:
 
                 # ⚙️ Tool Execution
                 try:
-                    tool_name, arguments = parse_function_call(plan)
-
-                    if self.tool_expects_input(tool_name):
-                        tool_input = {'input': arguments} if not (isinstance(arguments, dict) and 'input' in arguments) else arguments
-                    else:
-                        tool_input = arguments
-
-                    response = await self.mcp.call_tool(tool_name, tool_input)
-
-                    # ✅ Safe TextContent parsing
-                    raw = getattr(response.content, 'text', str(response.content))
-                    try:
-                        result_obj = json.loads(raw) if raw.strip().startswith("{") else raw
-                    except json.JSONDecodeError:
-                        result_obj = raw
-
-                    result_str = result_obj.get("markdown") if isinstance(result_obj, dict) else str(result_obj)
-                    print(f"[action] {tool_name} → {result_str}")
-
-                    # 🧠 Add memory
-                    memory_item = MemoryItem(
-                        text=f"{tool_name}({arguments}) → {result_str}",
-                        type="tool_output",
-                        tool_name=tool_name,
-                        user_query=query,
-                        tags=[tool_name],
-                        session_id=self.context.session_id
+                    calls = parse_function_calls(plan)
+                    max_calls = self.context.agent_profile.max_parallel_calls
+                    if len(calls) > max_calls:
+                        print(f"[action] ⚠️ Plan has {len(calls)} calls, running the first {max_calls}")
+                        calls = calls[:max_calls]
+
+                    # Independent calls run concurrently, each with its own timeout
+                    responses = await self.mcp.call_tools(
+                        [(tool_name, self.prepare_tool_input(tool_name, arguments)) for tool_name, arguments in calls],
+                        timeout=self.context.agent_profile.tool_timeout
                     )
-                    self.context.add_memory(memory_item)
+                    if all(isinstance(r, BaseException) for r in responses):
+                        raise responses[0]
+
+                    results = []
+                    for (tool_name, arguments), response in zip(calls, responses):
+                        if isinstance(response, BaseException):
+                            reason = "timed out" if isinstance(response, asyncio.TimeoutError) else str(response)
+                            result_str = f"ERROR: {tool_name} failed: {reason}"
+                        else:
+                            result_str = self.result_text(response)
+                        print(f"[action] {tool_name} → {result_str}")
+                        results.append((tool_name, arguments, result_str))
+
+                        # 🧠 Add memory
+                        memory_item = MemoryItem(
+                            text=f"{tool_name}({arguments}) → {result_str}",
+                            type="tool_output",
+                            tool_name=tool_name,
+                            user_query=query,
+                            tags=[tool_name],
+                            session_id=self.context.session_id
+                        )
+                        self.context.add_memory(memory_item)
 
                     # 🔁 Next query
-                    query = f"""Original user task: {self.context.user_input}
+                    if len(results) == 1:
+                        result_block = f"""Your last tool produced this result:
 
-    Your last tool produced this result:
+    {results[0][2]}"""
+                    else:
+                        listing = "\n\n".join(
+                            f"    {i}. {tool_name}({arguments}) → {result_str}"
+                            for i, (tool_name, arguments, result_str) in enumerate(results, 1)
+                        )
+                        result_block = f"""Your last tools produced these results:
+
+{listing}"""
+
+                    query = f"""Original user task: {self.context.user_input}
 
-    {result_str}
+    {result_block}
 
     If this fully answers the task, return:
     FINAL_ANSWER: your answer
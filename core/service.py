@@ -0,0 +1,95 @@
+# core/service.py
+
+import asyncio
+import logging
+from typing import Any, List, Optional
+from core.context import AgentProfile
+from core.loop import AgentLoop
+from core.session import MultiMCP
+from core.strategy import explore_stats
+from modules.model_manager import ModelManager
+
+logger = logging.getLogger(__name__)
+
+
+class AgentService:
+    """
+    Process-wide agent. Loads the profile, starts the MCP dispatcher, discovers
+    tools and builds the ModelManager once in start(); every run() afterwards
+    only creates a fresh AgentLoop for the query.
+    """
+
+    def __init__(self, config_path: str = "config/profiles.yaml"):
+        self.config_path = config_path
+        self.profile: Optional[AgentProfile] = None
+        self.dispatcher: Optional[MultiMCP] = None
+        self.model: Optional[ModelManager] = None
+        self.tools: List[Any] = []
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self.dispatcher is not None
+
+    async def start(self):
+        async with self._start_lock:
+            if self.started:
+                return
+
+            self.profile = AgentProfile(self.config_path)
+            logger.info(f"Loaded {len(self.profile.mcp_servers)} MCP server configurations")
+
+            mcp_config = self.profile.mcp_config
+            dispatcher = MultiMCP(
+                server_configs=self.profile.mcp_servers,
+                pooled=mcp_config.get("pooled", False),
+                pool_size=mcp_config.get("pool_size", 1),
+                parallel_discovery=mcp_config.get("parallel_discovery", True),
+                manifest_path=mcp_config.get("manifest_cache"),
+                lazy=mcp_config.get("lazy", False),
+                idle_timeout=mcp_config.get("idle_timeout")
+            )
+            logger.info("Initializing MultiMCP...")
+            await dispatcher.initialize()
+            logger.info("MultiMCP initialized successfully")
+
+            self.model = ModelManager()
+            self.tools = dispatcher.get_all_tools()
+            self.dispatcher = dispatcher
+
+    async def run(self, query: str, session_key: Optional[str] = None) -> str:
+        """Runs one query through a fresh AgentLoop and returns the answer text."""
+        if not self.started:
+            await self.start()
+
+        try:
+            agent = AgentLoop(
+                user_input=query,
+                dispatcher=self.dispatcher,
+                profile=self.profile,
+                tools=self.tools,
+                model=self.model,
+                session_key=session_key
+            )
+
+            logger.info("Running agent loop...")
+            final_response = await agent.run()
+            response_text = final_response.replace("FINAL_ANSWER:", "").strip()
+            logger.info(f"Agent response: {response_text}")
+            return response_text
+
+        except Exception as e:
+            logger.error(f"Agent failed: {e}", exc_info=True)
+            return "I encountered an error while processing your request. Please try again later."
+
+    async def shutdown(self):
+        if self.dispatcher:
+            await self.dispatcher.shutdown()
+        self.dispatcher = None
+        stats = ModelManager.cache_stats()
+        if stats:
+            logger.info(f"LLM cache stats: {stats}")
+        explore_report = explore_stats.report()
+        if explore_report:
+            logger.info(f"explore_all candidate stats: {explore_report}")
+        await ModelManager.aclose()
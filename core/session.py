@@ -1,10 +1,27 @@
 # core/session.py
 
 import os
+import ast
 import sys
-from typing import Optional, Any, List, Dict
+import json
+import time
+import asyncio
+import hashlib
+import anyio
+from pathlib import Path
+from typing import Optional, Any, List, Dict, Tuple
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, Tool
+
+
+def server_params(config: dict) -> StdioServerParameters:
+    return StdioServerParameters(
+        command=sys.executable,
+        args=[config["script"]],
+        cwd=config.get("cwd", os.getcwd())
+    )
 
 
 class MCP:
@@ -47,44 +64,383 @@ class MCP:
                 return await session.call_tool(tool_name, arguments=arguments)
 
 
+class PersistentSession:
+    """
+    One long-lived stdio connection to an MCP server.
+    The transport is owned by a dedicated background task so it is entered and
+    exited in the same task (anyio cancel scopes require this), no matter which
+    task ends up calling close().
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.session: Optional[ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self):
+        self._ready.clear()
+        self._stop.clear()
+        self._error = None
+        self._task = asyncio.create_task(self._run(), name=f"mcp:{self.config['script']}")
+        await self._ready.wait()
+        if self._error:
+            raise self._error
+
+    async def _run(self):
+        try:
+            async with stdio_client(server_params(self.config)) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self._error = e
+            print(f"❌ Persistent session for {self.config['script']} ended: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def list_tools(self):
+        return (await self.session.list_tools()).tools
+
+    async def call_tool(self, tool_name: str, arguments: dict) -> Any:
+        return await self.session.call_tool(tool_name, arguments)
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+        except Exception:
+            pass
+        self._task = None
+        self.session = None
+
+
+class ServerPool:
+    """
+    A fixed-size pool of PersistentSessions for one server config.
+    Sessions are started on first use, checked out one call at a time and
+    restarted transparently if the server process dies. A tool call is only
+    resent when it could not be written; once the server may have received
+    it, the error is raised (tools are not assumed to be idempotent).
+    """
+
+    def __init__(self, config: dict, size: int = 1):
+        self.config = config
+        self.size = max(1, size)
+        self._sessions: List[PersistentSession] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._start_lock = asyncio.Lock()
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def started(self) -> bool:
+        return bool(self._sessions)
+
+    def idle_for(self) -> float:
+        """Seconds since the last call finished, or 0 while calls are running."""
+        if self.in_flight:
+            return 0.0
+        return time.monotonic() - self.last_used
+
+    async def _ensure_started(self):
+        if self._sessions:
+            return
+        async with self._start_lock:
+            if self._sessions:
+                return
+            print(f"→ Starting {self.size} persistent session(s) for {self.config['script']}")
+            sessions = [PersistentSession(self.config) for _ in range(self.size)]
+            await asyncio.gather(*(s.start() for s in sessions))
+            self._sessions = sessions
+            for s in sessions:
+                self._idle.put_nowait(s)
+
+    async def _acquire(self) -> PersistentSession:
+        await self._ensure_started()
+        session = await self._idle.get()
+        if not session.alive:
+            print(f"[pool] Reconnecting to {self.config['script']}...")
+            try:
+                await session.close()
+                await session.start()
+            except Exception:
+                self._idle.put_nowait(session)
+                raise
+        return session
+
+    def _release(self, session: PersistentSession):
+        self._idle.put_nowait(session)
+        self.in_flight -= 1
+        self.last_used = time.monotonic()
+
+    async def list_tools(self):
+        self.in_flight += 1
+        try:
+            session = await self._acquire()
+        except Exception:
+            self.in_flight -= 1
+            raise
+        try:
+            return await session.list_tools()
+        finally:
+            self._release(session)
+
+    async def call_tool(self, tool_name: str, arguments: dict) -> Any:
+        self.in_flight += 1
+        try:
+            session = await self._acquire()
+        except Exception:
+            self.in_flight -= 1
+            raise
+        try:
+            try:
+                return await session.call_tool(tool_name, arguments)
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError) as e:
+                # The request was never written, so the server cannot have run it: retry once
+                print(f"[pool] Session closed on {self.config['script']}: {e!r} — reconnecting")
+                await session.close()
+                await session.start()
+                return await session.call_tool(tool_name, arguments)
+            except McpError as e:
+                if e.error.code == CONNECTION_CLOSED:
+                    await session.close()  # restarted by the next _acquire
+                raise  # otherwise the server answered with an error; the connection is fine
+            except Exception as e:
+                # The tool may already have run: drop the session (restarted on next use), don't resend
+                print(f"[pool] Session error on {self.config['script']}: {e} — closing session")
+                await session.close()
+                raise
+        finally:
+            self._release(session)
+
+    async def close(self):
+        sessions, self._sessions = self._sessions, []
+        self._idle = asyncio.Queue()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+
+class ToolManifestCache:
+    """
+    On-disk cache of each server's tool list, keyed by the content hash of the
+    server script and of the local modules it imports (tool schemas live in
+    models.py), so a warm start can build tool_map without launching servers.
+    """
+
+    def __init__(self, path: str = "cache/tool_manifest.json"):
+        self.path = Path(path)
+        try:
+            self.entries: Dict[str, dict] = json.loads(self.path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    @staticmethod
+    def local_imports(script: Path, root: Path) -> List[Path]:
+        """Files under root that script imports, directly or through other local modules."""
+        found, pending = set(), [script.resolve()]
+        root = root.resolve()
+        while pending:
+            path = pending.pop()
+            try:
+                tree = ast.parse(path.read_bytes())
+            except (OSError, SyntaxError, ValueError):
+                continue
+            for node in ast.walk(tree):
+                base = root
+                if isinstance(node, ast.Import):
+                    names = [alias.name for alias in node.names]
+                elif isinstance(node, ast.ImportFrom):
+                    if node.level:  # relative import: from the importing file's package
+                        base = path.parents[node.level - 1]
+                    module = [node.module] if node.module else []
+                    # "from pkg import name" may import the submodule pkg/name.py
+                    names = module + [".".join(module + [alias.name]) for alias in node.names]
+                else:
+                    continue
+                for name in names:
+                    parts = name.replace(".", "/")
+                    for candidate in (base / f"{parts}.py", base / parts / "__init__.py"):
+                        if candidate.is_file() and candidate not in found and candidate != script.resolve():
+                            found.add(candidate)
+                            pending.append(candidate)
+        return sorted(found)
+
+    @classmethod
+    def script_hash(cls, config: dict) -> Optional[str]:
+        root = Path(config.get("cwd", os.getcwd()))
+        script = root / config["script"]
+        try:
+            digest = hashlib.sha256(script.read_bytes())
+            for path in cls.local_imports(script, root):
+                digest.update(b"\0" + path.relative_to(root.resolve()).as_posix().encode() + b"\0")
+                digest.update(path.read_bytes())
+            return digest.hexdigest()
+        except OSError:
+            return None
+
+    def get(self, config: dict) -> Optional[List[Tool]]:
+        entry = self.entries.get(config["script"])
+        if not entry or entry.get("hash") != self.script_hash(config):
+            return None
+        return [Tool.model_validate(t) for t in entry["tools"]]
+
+    def put(self, config: dict, tools: List[Tool]):
+        script_hash = self.script_hash(config)
+        if script_hash is None:
+            return
+        self.entries[config["script"]] = {
+            "hash": script_hash,
+            "tools": [t.model_dump(mode="json") for t in tools]
+        }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2))
+        os.replace(tmp, self.path)
+
+
 class MultiMCP:
     """
-    Stateless version: discovers tools from multiple MCP servers, but reconnects per tool call.
-    Each call_tool() uses a fresh session based on tool-to-server mapping.
+    Discovers tools from multiple MCP servers and routes calls by tool name.
+    By default each call_tool() uses a fresh session based on tool-to-server mapping.
+    With pooled=True, long-lived sessions are kept per server and reused across
+    calls (and across AgentLoop runs) until shutdown().
+    Discovery scans servers concurrently and, given a manifest_path, reuses the
+    cached tool list of any server whose script has not changed.
+    With lazy=True, servers found in the manifest are not launched at startup;
+    each one starts on the first call to one of its tools and is stopped again
+    after idle_timeout seconds without calls. A server config may override
+    idle_timeout (0 → never stopped) and set lazy: false to be started at
+    initialize(), e.g. a server that does background work of its own.
     """
 
-    def __init__(self, server_configs: List[dict]):
+    def __init__(
+        self,
+        server_configs: List[dict],
+        pooled: bool = False,
+        pool_size: int = 1,
+        parallel_discovery: bool = True,
+        manifest_path: Optional[str] = None,
+        lazy: bool = False,
+        idle_timeout: Optional[float] = None,
+    ):
         self.server_configs = server_configs
+        self.lazy = lazy
+        self.pooled = pooled or lazy  # lazy start/stop only makes sense for persistent sessions
+        self.pool_size = pool_size
+        self.parallel_discovery = parallel_discovery
+        if lazy and not manifest_path:
+            manifest_path = "cache/tool_manifest.json"
+        self.manifest = ToolManifestCache(manifest_path) if manifest_path else None
+        self.idle_timeout = idle_timeout
         self.tool_map: Dict[str, Dict[str, Any]] = {}  # tool_name → {config, tool}
+        self.pools: Dict[str, ServerPool] = {}  # script → pool
+        self._reaper: Optional[asyncio.Task] = None
+
+    def _pool_for(self, config: dict) -> ServerPool:
+        key = config["script"]
+        if key not in self.pools:
+            self.pools[key] = ServerPool(config, size=config.get("pool_size", self.pool_size))
+        return self.pools[key]
+
+    def _idle_timeout(self, config: dict) -> Optional[float]:
+        return config.get("idle_timeout", self.idle_timeout)
+
+    async def _discover(self, config: dict) -> Optional[List[Tool]]:
+        try:
+            # In lazy mode a cache miss is scanned with a one-shot session so
+            # nothing stays running until a tool is actually called.
+            if self.pooled and not self.lazy:
+                print(f"→ Scanning tools from: {config['script']} (pooled)")
+                tools = await self._pool_for(config).list_tools()
+                print(f"→ Tools received: {[tool.name for tool in tools]}")
+                return tools
+
+            params = server_params(config)
+            print(f"→ Scanning tools from: {config['script']} in {params.cwd}")
+            async with stdio_client(params) as (read, write):
+                print("Connection established, creating session...")
+                try:
+                    async with ClientSession(read, write) as session:
+                        print("[agent] Session created, initializing...")
+                        await session.initialize()
+                        print("[agent] MCP session initialized")
+                        tools = await session.list_tools()
+                        print(f"→ Tools received: {[tool.name for tool in tools.tools]}")
+                        return tools.tools
+                except Exception as se:
+                    print(f"❌ Session error: {se}")
+        except Exception as e:
+            print(f"❌ Error initializing MCP server {config['script']}: {e}")
+        return None
 
     async def initialize(self):
         print("in MultiMCP initialize")
+        discovered: Dict[str, Optional[List[Tool]]] = {}
+        pending = []
         for config in self.server_configs:
-            try:
-                params = StdioServerParameters(
-                    command=sys.executable,
-                    args=[config["script"]],
-                    cwd=config.get("cwd", os.getcwd())
-                )
-                print(f"→ Scanning tools from: {config['script']} in {params.cwd}")
-                async with stdio_client(params) as (read, write):
-                    print("Connection established, creating session...")
-                    try:
-                        async with ClientSession(read, write) as session:
-                            print("[agent] Session created, initializing...")
-                            await session.initialize()
-                            print("[agent] MCP session initialized")
-                            tools = await session.list_tools()
-                            print(f"→ Tools received: {[tool.name for tool in tools.tools]}")
-                            for tool in tools.tools:
-                                self.tool_map[tool.name] = {
-                                    "config": config,
-                                    "tool": tool
-                                }
-                    except Exception as se:
-                        print(f"❌ Session error: {se}")
-            except Exception as e:
-                print(f"❌ Error initializing MCP server {config['script']}: {e}")
+            cached = self.manifest.get(config) if self.manifest else None
+            if cached is not None:
+                print(f"→ Using cached tool manifest for: {config['script']}")
+                discovered[config["script"]] = cached
+            else:
+                pending.append(config)
+
+        if self.parallel_discovery:
+            results = await asyncio.gather(*(self._discover(c) for c in pending))
+        else:
+            results = [await self._discover(c) for c in pending]
+
+        for config, tools in zip(pending, results):
+            discovered[config["script"]] = tools
+            if tools is not None and self.manifest:
+                self.manifest.put(config, tools)
+        if pending and self.manifest:
+            self.manifest.save()
+
+        # Register in profile order so tool listings stay stable
+        for config in self.server_configs:
+            for tool in discovered.get(config["script"]) or []:
+                self.tool_map[tool.name] = {
+                    "config": config,
+                    "tool": tool
+                }
+
+        if self.pooled:
+            eager = [c for c in self.server_configs if c.get("lazy") is False]
+            results = await asyncio.gather(*(self._pool_for(c)._ensure_started() for c in eager), return_exceptions=True)
+            for config, result in zip(eager, results):
+                if isinstance(result, Exception):
+                    print(f"❌ Error starting MCP server {config['script']}: {result}")
+
+        if self.pooled and self._reaper is None and any(self._idle_timeout(c) for c in self.server_configs):
+            self._reaper = asyncio.create_task(self._reap_idle_servers())
+
+    async def _reap_idle_servers(self):
+        """Stops server pools that have not served a call within their idle_timeout (0 or None → never)."""
+        shortest = min(t for t in map(self._idle_timeout, self.server_configs) if t)
+        interval = max(1.0, min(shortest / 2, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            for script, pool in list(self.pools.items()):
+                timeout = self._idle_timeout(pool.config)
+                if timeout and pool.started and pool.idle_for() >= timeout:
+                    print(f"[pool] Stopping idle server: {script}")
+                    await pool.close()
 
     async def call_tool(self, tool_name: str, arguments: dict) -> Any:
         entry = self.tool_map.get(tool_name)
@@ -92,17 +448,26 @@ class MultiMCP:
             raise ValueError(f"Tool '{tool_name}' not found on any server.")
 
         config = entry["config"]
-        params = StdioServerParameters(
-            command=sys.executable,
-            args=[config["script"]],
-            cwd=config.get("cwd", os.getcwd())
-        )
+        if self.pooled:
+            return await self._pool_for(config).call_tool(tool_name, arguments)
 
-        async with stdio_client(params) as (read, write):
+        async with stdio_client(server_params(config)) as (read, write):
             async with ClientSession(read, write) as session:
                 await session.initialize()
                 return await session.call_tool(tool_name, arguments)
 
+    async def call_tools(self, calls: List[Tuple[str, dict]], timeout: Optional[float] = None) -> List[Any]:
+        """
+        Runs independent tool calls concurrently. Each entry of the result is
+        the tool response, or the exception that call raised (including
+        asyncio.TimeoutError when it exceeds timeout).
+        """
+        async def run(tool_name: str, arguments: dict) -> Any:
+            call = self.call_tool(tool_name, arguments)
+            return await (asyncio.wait_for(call, timeout) if timeout else call)
+
+        return await asyncio.gather(*(run(name, args) for name, args in calls), return_exceptions=True)
+
     async def list_all_tools(self) -> List[str]:
         return list(self.tool_map.keys())
 
@@ -110,4 +475,8 @@ class MultiMCP:
         return [entry["tool"] for entry in self.tool_map.values()]
 
     async def shutdown(self):
-        pass  # no persistent sessions to close
\ No newline at end of file
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        pools, self.pools = list(self.pools.values()), {}
+        await asyncio.gather(*(pool.close() for pool in pools), return_exceptions=True)
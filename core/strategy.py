@@ -26,9 +26,14 @@
 from modules.perception import PerceptionResult
 from modules.memory import MemoryItem
 from modules.tools import summarize_tools, filter_tools_by_hint
-from modules.decision import generate_plan
+from modules.decision import generate_plan, generate_fused_plan
+from modules.action import parse_function_calls
+from modules.model_manager import ModelManager
 from core.context import AgentContext
-from typing import Any
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import time
 
 
 async def decide_next_action(
@@ -37,6 +42,7 @@ async def decide_next_action(
     memory_items: list[MemoryItem],
     all_tools: list[Any],
     last_result: str = "",
+    model: Optional[ModelManager] = None,
 ) -> str:
     """
     Decides what to do next using the planning strategy defined in agent profile.
@@ -48,6 +54,9 @@ async def decide_next_action(
     max_steps = context.agent_profile.max_steps
     tool_hint = perception.tool_hint
 
+    if strategy == "explore_all":
+        return await explore_all(context, perception, memory_items, all_tools, model)
+
     # Step 1: Try hint-based filtered tools first
     filtered_tools = filter_tools_by_hint(all_tools, hint=tool_hint)
     filtered_summary = summarize_tools(filtered_tools)
@@ -58,6 +67,8 @@ async def decide_next_action(
         tool_descriptions=filtered_summary,
         step_num=step,
         max_steps=max_steps,
+        model=model,
+        max_parallel_calls=context.agent_profile.max_parallel_calls,
     )
 
     # Strategy enforcement
@@ -67,13 +78,207 @@ async def decide_next_action(
     if strategy == "retry_once" and "unknown" in plan.lower():
         # Retry with all tools if hint-based filtering failed
         full_summary = summarize_tools(all_tools)
-        return generate_plan(
+        return await generate_plan(
             perception=perception,
             memory_items=memory_items,
             tool_descriptions=full_summary,
             step_num=step,
             max_steps=max_steps,
+            model=model,
+            max_parallel_calls=context.agent_profile.max_parallel_calls,
         )
 
-    # Placeholder for future "explore_all" parallel planner
     return plan
+
+
+# === explore_all: concurrent candidate planner ===
+
+class ExploreStats:
+    """
+    Per candidate source: how often it ran, how each run ended (completed,
+    cancelled after another candidate won, timed out, failed), how often it
+    won, and the latencies of its completed runs.
+    """
+
+    OUTCOMES = ("completed", "cancelled", "timed_out", "failed")
+
+    def __init__(self):
+        self.runs: Counter = Counter()
+        self.outcomes: Dict[str, Counter] = defaultdict(Counter)
+        self.wins: Counter = Counter()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+
+    def record(self, source: str, latency: float, outcome: str = "completed"):
+        self.runs[source] += 1
+        self.outcomes[source][outcome] += 1
+        # Only completed runs have a latency; a cancelled run only says it was slower than the winner
+        if outcome == "completed":
+            self.latencies[source].append(latency)
+
+    def record_win(self, source: str):
+        self.wins[source] += 1
+
+    @staticmethod
+    def _percentile(values: List[float], pct: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        decisions = sum(self.wins.values())
+        report = {}
+        for source in sorted(set(self.runs) | set(self.wins)):
+            lat = self.latencies.get(source) or [0.0]
+            report[source] = {
+                "runs": self.runs[source],
+                **{outcome: self.outcomes[source][outcome] for outcome in self.OUTCOMES},
+                "wins": self.wins[source],
+                "win_rate": self.wins[source] / decisions if decisions else 0.0,
+                "p50_s": self._percentile(lat, 50),
+                "p90_s": self._percentile(lat, 90),
+                "max_s": max(lat),
+            }
+        return report
+
+
+explore_stats = ExploreStats()
+_alt_models: Dict[str, ModelManager] = {}
+
+
+def _alt_model(key: str) -> ModelManager:
+    if key not in _alt_models:
+        _alt_models[key] = ModelManager(model_key=key)
+    return _alt_models[key]
+
+
+def score_plan(plan: str, all_tools: list[Any], perception: PerceptionResult, memory_items: list[MemoryItem]) -> float:
+    """
+    Cheap local plan scorer (no LLM). Positive means usable:
+    a concrete FINAL_ANSWER, or calls to known tools with parseable arguments.
+    Hint matches earn a bonus; repeating a call already in memory is penalised.
+    """
+    plan = plan.strip()
+    if plan.startswith("FINAL_ANSWER:"):
+        return 0.0 if "unknown" in plan.lower() else 2.0
+
+    try:
+        calls = parse_function_calls(plan)
+    except Exception:
+        return -1.0
+
+    known = {getattr(t, "name", None) for t in all_tools}
+    score = 0.0
+    for tool_name, arguments in calls:
+        if tool_name not in known:
+            return -1.0
+        score += 3.0
+        if perception.tool_hint and perception.tool_hint.lower() in tool_name.lower():
+            score += 1.0
+        if any(m.text.startswith(f"{tool_name}({arguments})") for m in memory_items):
+            score -= 2.5
+    return score / len(calls)
+
+
+async def explore_all(
+    context: AgentContext,
+    perception: PerceptionResult,
+    memory_items: list[MemoryItem],
+    all_tools: list[Any],
+    model: Optional[ModelManager] = None,
+) -> str:
+    """
+    Generates candidate plans concurrently and picks one:
+    - "hint":        hint-filtered tool list, default model
+    - "full":        full tool list, default model
+    - "model:<key>": hint-filtered tools, each model in strategy.explore_models
+    With explore_pick: first_valid the first usable plan wins and the rest are
+    cancelled; with explore_pick: score all candidates finish and the best
+    score_plan() wins.
+    """
+    profile = context.agent_profile
+    filtered_tools = filter_tools_by_hint(all_tools, hint=perception.tool_hint)
+    filtered_summary = summarize_tools(filtered_tools)
+
+    sources: Dict[str, Tuple[str, Optional[ModelManager]]] = {}
+    if len(filtered_tools) < len(all_tools):
+        sources["hint"] = (filtered_summary, model)
+    sources["full"] = (summarize_tools(all_tools), model)
+    for key in profile.explore_models:
+        try:
+            sources[f"model:{key}"] = (filtered_summary, _alt_model(key))
+        except Exception as e:
+            print(f"[explore] ⚠️ Skipping model {key}: {e}")
+
+    async def candidate(source: str, tool_summary: str, llm: Optional[ModelManager]) -> Tuple[str, str, float]:
+        start, outcome = time.perf_counter(), "failed"
+        try:
+            plan = await generate_plan(
+                perception=perception,
+                memory_items=memory_items,
+                tool_descriptions=tool_summary,
+                step_num=context.step + 1,
+                max_steps=profile.max_steps,
+                model=llm,
+                max_parallel_calls=profile.max_parallel_calls,
+            )
+            outcome = "completed"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except asyncio.TimeoutError:
+            outcome = "timed_out"
+            raise
+        finally:
+            # Every run is recorded, including losers cancelled under first_valid
+            latency = time.perf_counter() - start
+            explore_stats.record(source, latency, outcome)
+        return source, plan, latency
+
+    tasks = [asyncio.create_task(candidate(src, summary, llm)) for src, (summary, llm) in sources.items()]
+    finished: List[Tuple[str, str, float]] = []
+    winner: Optional[Tuple[str, str, float]] = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except Exception as e:
+                print(f"[explore] ⚠️ Candidate failed: {e}")
+                continue
+            finished.append(result)
+            if profile.explore_pick == "first_valid" and score_plan(result[1], all_tools, perception, memory_items) > 0:
+                winner = result
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if winner is None and finished:
+        winner = max(finished, key=lambda r: score_plan(r[1], all_tools, perception, memory_items))
+    if winner is None:
+        return "FINAL_ANSWER: [unknown]"
+
+    source, plan, latency = winner
+    explore_stats.record_win(source)
+    print(f"[explore] {len(finished)}/{len(tasks)} candidates done, picked '{source}' ({latency:.2f}s)")
+    return plan
+
+
+async def decide_fused_action(
+    context: AgentContext,
+    query: str,
+    memory_items: list[MemoryItem],
+    all_tools: list[Any],
+    model: Optional[ModelManager] = None,
+) -> Tuple[PerceptionResult, str]:
+    """
+    "fused" planning mode: one LLM call returns perception and plan together.
+    No hint is known before the call, so the full tool list is offered.
+    """
+    return await generate_fused_plan(
+        user_input=query,
+        memory_items=memory_items,
+        tool_descriptions=summarize_tools(all_tools),
+        step_num=context.step + 1,
+        max_steps=context.agent_profile.max_steps,
+        model=model,
+        max_parallel_calls=context.agent_profile.max_parallel_calls,
+    )
@@ -20,14 +20,32 @@ from pydantic import BaseModel
 import subprocess
 import sqlite3
 import trafilatura
+import pymupdf
 import pymupdf4llm
 import re
 import base64 # ollama needs base64-encoded-image
+import threading
+import yaml
+import io
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from modules.embedding import BatchEmbedder
+from modules.embedding_cache import EmbeddingCache
+from modules.chunking import similarity_chunks
+from modules.doc_store import DocStore
+from modules.llm_cache import LLMResponseCache
+from modules.vector_index import (
+    build_index, choose_index_type, configure_search, create_index, index_ids, index_type,
+    needs_rebuild, supports_removal
+)
+from modules.pipeline import Stage, run_pipeline
+from modules.snapshots import SnapshotManager
+from modules.doc_watcher import DocumentWatcher
 
 
 mcp = FastMCP("Calculator")
 
 EMBED_URL = "http://localhost:11434/api/embeddings"
+EMBED_BATCH_URL = "http://localhost:11434/api/embed"
 OLLAMA_CHAT_URL = "http://localhost:11434/api/chat"
 OLLAMA_URL = "http://localhost:11434/api/generate"
 EMBED_MODEL = "nomic-embed-text"
@@ -40,10 +58,61 @@ TOP_K = 3  # FAISS top-K matches
 ROOT = Path(__file__).parent.resolve()
 
 
+
+def load_doc_config() -> dict:
+    path = ROOT / "config" / "documents.yaml"
+    try:
+        return yaml.safe_load(path.read_text()) or {}
+    except FileNotFoundError:
+        return {}
+
+DOC_CONFIG = load_doc_config()
+EMBED_CONFIG = DOC_CONFIG.get("embedding", {})
+PIPELINE_CONFIG = DOC_CONFIG.get("pipeline", {})
+CHUNKING_CONFIG = DOC_CONFIG.get("chunking", {})
+INDEX_CONFIG = DOC_CONFIG.get("index", {})
+SEARCH_CONFIG = DOC_CONFIG.get("search", {})
+CAPTION_CONFIG = DOC_CONFIG.get("captions", {})
+DEDUP_CONFIG = DOC_CONFIG.get("dedup", {})
+WATCHER_CONFIG = DOC_CONFIG.get("watcher", {})
+
+def make_embedder(cache: EmbeddingCache = None) -> BatchEmbedder:
+    """Batch embedder configured from documents.yaml."""
+    return BatchEmbedder(
+        model=EMBED_CONFIG.get("model", EMBED_MODEL),
+        batch_url=EMBED_CONFIG.get("url", EMBED_BATCH_URL),
+        single_url=EMBED_CONFIG.get("single_url", EMBED_URL),
+        batch_size=EMBED_CONFIG.get("batch_size", 32),
+        min_batch_size=EMBED_CONFIG.get("min_batch_size", 4),
+        max_batch_size=EMBED_CONFIG.get("max_batch_size", 256),
+        max_in_flight=EMBED_CONFIG.get("max_in_flight", 2),
+        target_batch_latency=EMBED_CONFIG.get("target_batch_latency", 2.0),
+        cache=cache,
+    )
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder() -> BatchEmbedder:
+    """Shared embedder, built on first use (its cache opens SQLite and memory maps, which
+    extraction workers importing this module never need)."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            cache = None
+            if EMBED_CONFIG.get("cache", True):
+                cache = EmbeddingCache.shared(
+                    str(ROOT / EMBED_CONFIG.get("cache_path", "cache/embeddings")),
+                    max_entries=EMBED_CONFIG.get("cache_max_entries", 500_000)
+                )
+            _embedder = make_embedder(cache)
+        return _embedder
+
+
 def get_embedding(text: str) -> np.ndarray:
-    response = requests.post(EMBED_URL, json={"model": EMBED_MODEL, "prompt": text})
-    response.raise_for_status()
-    return np.array(response.json()["embedding"], dtype=np.float32)
+    return get_embedder().embed(text)
 
 def chunk_text(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
     words = text.split()
@@ -95,101 +164,344 @@ Just respond in one word (Yes or No), and do not provide any further explanation
 
 
 
+# === INDEX SNAPSHOTS ===
+
+def read_index_mmap(path: Path):
+    """Memory-map the index file when the index type supports it, else read it normally."""
+    for flag_name in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+        flag = getattr(faiss, flag_name, None)
+        if flag is None:
+            continue
+        try:
+            return faiss.read_index(str(path), flag | faiss.IO_FLAG_READ_ONLY)
+        except Exception:
+            continue
+    return faiss.read_index(str(path))
+
+
+def load_resident_index(path: Path):
+    """Loader for index snapshots: memory-mapped, with search parameters from config."""
+    index = read_index_mmap(path)
+    configure_search(index, INDEX_CONFIG)
+    mcp_log("INFO", f"Loaded resident index {path.relative_to(INDEX_DIR).as_posix()} with {index.ntotal} vectors")
+    return index
+
+
+INDEX_DIR = ROOT / "faiss_index"
+# Published index versions; searches pin one for the whole query, ingestion publishes the next
+snapshots = SnapshotManager(INDEX_DIR, load_resident_index)
+
+_doc_store = None
+_doc_store_lock = threading.Lock()
+
+
+def get_doc_store() -> DocStore:
+    """Shared chunk store, opened on first use (not at import, which extraction workers also do)."""
+    global _doc_store
+    with _doc_store_lock:
+        if _doc_store is None:
+            _doc_store = DocStore(str(INDEX_DIR / "documents.sqlite"))
+        return _doc_store
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], weights: list[float], k: int = 60) -> list[int]:
+    """Fuses ranked id lists: score(id) = Σ weight / (k + rank). Best first."""
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, vector_id in enumerate(ranking, start=1):
+            scores[vector_id] = scores.get(vector_id, 0.0) + weight / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def vector_candidates(index, queries: list[str], limit: int) -> list[list[int]]:
+    """One embedding request and one multi-row FAISS search for all queries."""
+    query_vecs = get_embedder().embed_many(queries)
+    D, I = index.search(query_vecs, k=limit)
+    return [[int(idx) for idx in row if idx >= 0] for row in I]
+
+
+def rank_chunks_batch(queries: list[str], k: int, mode: str = None, dedup: bool = False) -> list[list[dict]]:
+    """
+    Top-k chunk rows per query. mode (search.mode by default): vector (FAISS), bm25
+    (FTS5 inverted index) or hybrid (both, fused by weighted reciprocal rank fusion).
+    With dedup, a chunk already returned for an earlier query keeps its rank in later
+    ones but carries "first_seen" = (query index, position) so callers can show a reference.
+    The whole batch reads one pinned snapshot: its index and the chunk rows of that version.
+    """
+    mode = mode or SEARCH_CONFIG.get("mode", "hybrid")
+    # Over-fetch: removed chunks may still have vectors until the next compaction
+    limit = max(k, SEARCH_CONFIG.get("candidates", 20))
+    store = get_doc_store()
+
+    with snapshots.pin() as snapshot:
+        per_query = [([], []) for _ in queries]
+        if mode in ("vector", "hybrid") and snapshot.index is not None:
+            for (rankings, weights), ranking in zip(per_query, vector_candidates(snapshot.index, queries, limit)):
+                rankings.append(ranking)
+                weights.append(SEARCH_CONFIG.get("vector_weight", 1.0))
+        if mode in ("bm25", "hybrid"):
+            for (rankings, weights), query in zip(per_query, queries):
+                rankings.append(store.bm25_search(query, limit, version=snapshot.version))
+                weights.append(SEARCH_CONFIG.get("bm25_weight", 1.0))
+
+        fused = [
+            reciprocal_rank_fusion(rankings, weights, SEARCH_CONFIG.get("rrf_k", 60))[:limit]
+            for rankings, weights in per_query
+        ]
+        rows = store.get_chunks(
+            list({vector_id for ranked in fused for vector_id in ranked}), version=snapshot.version
+        )
+
+    results, seen = [], {}
+    for query_index, ranked in enumerate(fused):
+        hits = []
+        for vector_id in ranked:
+            if vector_id not in rows:
+                continue
+            if dedup and vector_id in seen:
+                hits.append({**rows[vector_id], "first_seen": seen[vector_id]})
+            else:
+                hits.append(rows[vector_id])
+                if dedup:
+                    seen[vector_id] = (query_index, len(hits) - 1)
+            if len(hits) == k:
+                break
+        results.append(hits)
+    return results
+
+
+def rank_chunks(query: str, k: int, mode: str = None) -> list[dict]:
+    return rank_chunks_batch([query], k, mode)[0]
+
+
+def format_chunk(data: dict) -> str:
+    if len(data["sources"]) == 1:
+        return f"{data['chunk']}\n[Source: {data['doc']}, ID: {data['chunk_id']}]"
+    sources = "; ".join(f"{source['doc']}, ID: {source['chunk_id']}" for source in data["sources"])
+    return f"{data['chunk']}\n[Sources: {sources}]"
+
+
+def format_reference(data: dict, queries: list[str]) -> str:
+    """A hit already returned for an earlier query of the batch, without repeating its text."""
+    query_index, position = data["first_seen"]
+    sources = "; ".join(f"{source['doc']}, ID: {source['chunk_id']}" for source in data["sources"])
+    return f'[Same chunk as result {position + 1} for "{queries[query_index]}": {sources}]'
+
+
 @mcp.tool()
 def search_documents(query: str) -> list[str]:
     """Search indexed documents for relevant content. Usage: search_documents|query="india Current GDP" """
     ensure_faiss_ready()
     mcp_log("SEARCH", f"Query: {query}")
     try:
-        index = faiss.read_index(str(ROOT / "faiss_index" / "index.bin"))
-        metadata = json.loads((ROOT / "faiss_index" / "metadata.json").read_text())
-        query_vec = get_embedding(query).reshape(1, -1)
-        D, I = index.search(query_vec, k=5)
-        results = []
-        for idx in I[0]:
-            data = metadata[idx]
-            results.append(f"{data['chunk']}\n[Source: {data['doc']}, ID: {data['chunk_id']}]")
-        return results
+        with snapshots.pin() as snapshot:
+            if snapshot.index is None:
+                return ["ERROR: Document index is not available yet."]
+        return [format_chunk(data) for data in rank_chunks(query, SEARCH_CONFIG.get("top_k", 5))]
     except Exception as e:
         return [f"ERROR: Failed to search: {str(e)}"]
 
 
-def caption_image(img_url_or_path: str) -> str:
-    mcp_log("CAPTION", f"🖼️ Attempting to caption image: {img_url_or_path}")
+@mcp.tool()
+def search_documents_batch(queries: list[str], k: int = 5, dedup: bool = False) -> dict[str, list[str]]:
+    """Search indexed documents for several queries in one call; results are grouped per query and, with dedup=true, a chunk's text is only returned once (later queries get a reference to it). Usage: search_documents_batch|queries=["Anmol singh DLF apartment", "Gensol Go-Auto relationship"]"""
+    ensure_faiss_ready()
+    mcp_log("SEARCH", f"Batch of {len(queries)} queries: {queries}")
+    try:
+        if not queries:
+            return {}
+        with snapshots.pin() as snapshot:
+            if snapshot.index is None:
+                return {query: ["ERROR: Document index is not available yet."] for query in queries}
+        grouped = rank_chunks_batch(queries, k, dedup=dedup)
+        return {
+            query: [format_reference(data, queries) if "first_seen" in data else format_chunk(data) for data in hits]
+            for query, hits in zip(queries, grouped)
+        }
+    except Exception as e:
+        return {query: [f"ERROR: Failed to search: {str(e)}"] for query in queries}
+
+
+# === IMAGE CAPTIONS ===
+
+CAPTION_PROMPT = "If there is lot of text in the image, then ONLY reply back with exact text in the image, else Describe the image such that your response can replace 'alt-text' for it. Only explain the contents of the image and provide no further explaination."
+
+_caption_cache = None
+_caption_pool = None
+_caption_lock = threading.Lock()
 
-    full_path = Path(__file__).parent / "documents" / img_url_or_path
-    full_path = full_path.resolve()
 
+def caption_resources():
+    """Shared caption cache (keyed by image content hash) and the pool bounding concurrent model calls."""
+    global _caption_cache, _caption_pool
+    with _caption_lock:
+        if _caption_pool is None:
+            _caption_pool = ThreadPoolExecutor(
+                max_workers=max(1, CAPTION_CONFIG.get("max_concurrency", 4)), thread_name_prefix="caption"
+            )
+            if CAPTION_CONFIG.get("cache", True):
+                # Captions of identical bytes never go stale: no TTL
+                _caption_cache = LLMResponseCache(
+                    path=str(ROOT / CAPTION_CONFIG.get("cache_path", "cache/captions.sqlite")),
+                    ttl_seconds=0,
+                    max_entries=CAPTION_CONFIG.get("cache_max_entries", 100_000),
+                    max_mb=CAPTION_CONFIG.get("cache_max_mb", 200)
+                )
+        return _caption_cache, _caption_pool
+
+
+def load_image(img_url_or_path: str) -> bytes:
+    if img_url_or_path.startswith("http"): # for extract_web_pages
+        response = requests.get(img_url_or_path, timeout=30)
+        response.raise_for_status()
+        return response.content
+
+    full_path = (Path(__file__).parent / "documents" / img_url_or_path).resolve()
     if not full_path.exists():
-        mcp_log("ERROR", f"❌ Image file not found: {full_path}")
-        return f"[Image file not found: {img_url_or_path}]"
+        raise FileNotFoundError(f"Image file not found: {full_path}")
+    return full_path.read_bytes()
 
+
+def is_tiny_image(data: bytes) -> bool:
+    """Icons, bullets and rules: too small to be worth a model call."""
+    if len(data) < CAPTION_CONFIG.get("min_bytes", 2048):
+        return True
     try:
-        if img_url_or_path.startswith("http"): # for extract_web_pages
-            response = requests.get(img_url_or_path)
-            encoded_image = base64.b64encode(response.content).decode("utf-8")
-        else:
-            with open(full_path, "rb") as img_file:
-                encoded_image = base64.b64encode(img_file.read()).decode("utf-8")
-
-        # Set stream=True to get the full generator-style output
-        with requests.post(OLLAMA_URL, json={
-            "model": GEMMA_MODEL,
-            "prompt": "If there is lot of text in the image, then ONLY reply back with exact text in the image, else Describe the image such that your response can replace 'alt-text' for it. Only explain the contents of the image and provide no further explaination.",
-            "images": [encoded_image],
-            "stream": True
-        }, stream=True) as response:
-
-            caption_parts = []
-            for line in response.iter_lines():
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                    caption_parts.append(data.get("response", ""))
-                    if data.get("done", False):
-                        break
-                except json.JSONDecodeError:
-                    continue  # silently skip malformed lines
+        width, height = PILImage.open(io.BytesIO(data)).size
+    except Exception:
+        return False  # let the model try formats PIL cannot read
+    return min(width, height) < CAPTION_CONFIG.get("min_side", 32)
+
+
+def generate_caption(data: bytes, label: str) -> str:
+    mcp_log("CAPTION", f"🖼️ Attempting to caption image: {label}")
+    encoded_image = base64.b64encode(data).decode("utf-8")
+
+    # Set stream=True to get the full generator-style output
+    with requests.post(OLLAMA_URL, json={
+        "model": GEMMA_MODEL,
+        "prompt": CAPTION_PROMPT,
+        "images": [encoded_image],
+        "stream": True
+    }, stream=True) as response:
+
+        caption_parts = []
+        for line in response.iter_lines():
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+                caption_parts.append(message.get("response", ""))
+                if message.get("done", False):
+                    break
+            except json.JSONDecodeError:
+                continue  # silently skip malformed lines
+
+    caption = "".join(caption_parts).strip()
+    mcp_log("CAPTION", f"✅ Caption generated: {caption}")
+    return caption
+
+
+def cached_caption(data: bytes, label: str) -> str:
+    """Caption for these image bytes, from the cache when the same image was captioned before."""
+    cache, _ = caption_resources()
+    key = None
+    if cache:
+        key = cache.make_key(GEMMA_MODEL, CAPTION_PROMPT, {"image": hashlib.sha256(data).hexdigest()})
+        cached = cache.get(key)
+        if cached is not None:
+            mcp_log("CAPTION", f"♻️ Cached caption for {label}")
+            return cached
+
+    caption = generate_caption(data, label)
+    if cache and caption:
+        cache.put(key, caption)
+    return caption or "[No caption returned]"
 
-            caption = "".join(caption_parts).strip()
-            mcp_log("CAPTION", f"✅ Caption generated: {caption}")
-            return caption if caption else "[No caption returned]"
 
+def caption_image(img_url_or_path: str) -> str:
+    try:
+        return cached_caption(load_image(img_url_or_path), img_url_or_path)
+    except FileNotFoundError as e:
+        mcp_log("ERROR", f"❌ {e}")
+        return f"[Image file not found: {img_url_or_path}]"
     except Exception as e:
         mcp_log("ERROR", f"⚠️ Failed to caption image {img_url_or_path}: {e}")
         return f"[Image could not be processed: {img_url_or_path}]"
 
 
+def caption_images(sources: list[str]) -> dict:
+    """
+    src → caption for every image of a document. Tiny images are dropped and byte-identical
+    images captioned once; the rest are captioned concurrently on the shared caption pool.
+    """
+    _, pool = caption_resources()
+    captions, by_hash, labels = {}, {}, {}
+    for src in sources:
+        try:
+            data = load_image(src)
+        except FileNotFoundError as e:
+            mcp_log("ERROR", f"❌ {e}")
+            captions[src] = f"[Image file not found: {src}]"
+            continue
+        except Exception as e:
+            mcp_log("ERROR", f"⚠️ Failed to caption image {src}: {e}")
+            captions[src] = f"[Image could not be processed: {src}]"
+            continue
+        if is_tiny_image(data):
+            captions[src] = None
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        labels[src] = digest
+        by_hash.setdefault(digest, (data, src))
+
+    futures = {digest: pool.submit(cached_caption, data, src) for digest, (data, src) in by_hash.items()}
+    for src, digest in labels.items():
+        try:
+            captions[src] = futures[digest].result()
+        except Exception as e:
+            mcp_log("ERROR", f"⚠️ Failed to caption image {src}: {e}")
+            captions[src] = f"[Image could not be processed: {src}]"
 
+    skipped = sum(1 for c in captions.values() if c is None)
+    mcp_log("CAPTION", f"{len(sources)} images: {len(by_hash)} distinct, "
+                       f"{len(labels) - len(by_hash)} duplicates, {skipped} tiny skipped")
+    return captions
 
 
 def replace_images_with_captions(markdown: str) -> str:
-    def replace(match):
-        alt, src = match.group(1), match.group(2)
+    pattern = r'!\[(.*?)\]\((.*?)\)'
+    sources = list(dict.fromkeys(match.group(2) for match in re.finditer(pattern, markdown)))
+    if not sources:
+        return markdown
+    captions = caption_images(sources)
+
+    # Attempt to delete only if local and file exists
+    for src in sources:
+        if src.startswith("http"):
+            continue
         try:
-            caption = caption_image(src)
-            # Attempt to delete only if local and file exists
-            if not src.startswith("http"):
-                img_path = Path(__file__).parent / "documents" / src
-                if img_path.exists():
-                    img_path.unlink()
-                    mcp_log("INFO", f"🗑️ Deleted image after captioning: {img_path}")
-            return f"**Image:** {caption}"
+            img_path = Path(__file__).parent / "documents" / src
+            if img_path.exists():
+                img_path.unlink()
+                mcp_log("INFO", f"🗑️ Deleted image after captioning: {img_path}")
         except Exception as e:
             mcp_log("WARN", f"Image deletion failed: {e}")
-            return f"[Image could not be processed: {src}]"
 
-    return re.sub(r'!\[(.*?)\]\((.*?)\)', replace, markdown)
+    def replace(match):
+        caption = captions.get(match.group(2))
+        if caption is None:
+            return ""  # tiny image
+        return f"**Image:** {caption}"
 
+    return re.sub(pattern, replace, markdown)
 
-@mcp.tool()
-def extract_webpage(input: UrlInput) -> MarkdownOutput:
-    """Extract and convert webpage content to markdown. Usage: extract_webpage|input={"url": "https://example.com"}"""
 
-    downloaded = trafilatura.fetch_url(input.url)
+def webpage_to_markdown(url: str) -> str:
+    """Webpage → markdown with image links left in place. Empty if the download fails."""
+    downloaded = trafilatura.fetch_url(url)
     if not downloaded:
-        return MarkdownOutput(markdown="Failed to download the webpage.")
+        return ""
 
     markdown = trafilatura.extract(
         downloaded,
@@ -200,37 +512,61 @@ def extract_webpage(input: UrlInput) -> MarkdownOutput:
     ) or ""
 
     # Replace pipe separators with semicolons in the markdown output
-    markdown = markdown.replace('|', ';')
+    return markdown.replace('|', ';')
 
-    markdown = replace_images_with_captions(markdown)
-    return MarkdownOutput(markdown=markdown)
 
 @mcp.tool()
-def extract_pdf(input: FilePathInput) -> MarkdownOutput:
-    """Convert PDF file content to markdown format. Usage: extract_pdf|input={"file_path": "documents/dlf.pdf"}"""
+def extract_webpage(input: UrlInput) -> MarkdownOutput:
+    """Extract and convert webpage content to markdown. Usage: extract_webpage|input={"url": "https://example.com"}"""
 
-    if not os.path.exists(input.file_path):
-        return MarkdownOutput(markdown=f"File not found: {input.file_path}")
+    markdown = webpage_to_markdown(input.url)
+    if not markdown:
+        return MarkdownOutput(markdown="Failed to download the webpage.")
 
-    ROOT = Path(__file__).parent.resolve()
+    markdown = replace_images_with_captions(markdown)
+    return MarkdownOutput(markdown=markdown)
+
+def pdf_to_markdown(file_path: str, pages: tuple = None) -> str:
+    """PDF (or pages [start, stop) of it) → markdown; images are written to documents/images and linked relatively."""
     global_image_dir = ROOT / "documents" / "images"
     global_image_dir.mkdir(parents=True, exist_ok=True)
 
     # Actual markdown with relative image paths
     markdown = pymupdf4llm.to_markdown(
-        input.file_path,
+        file_path,
+        pages=list(range(*pages)) if pages else None,
         write_images=True,
         image_path=str(global_image_dir)
     )
 
     # Re-point image links in the markdown
-    markdown = re.sub(
+    return re.sub(
         r'!\[\]\((.*?/images/)([^)]+)\)',
         r'![](images/\2)',
         markdown.replace("\\", "/")
     )
 
-    markdown = replace_images_with_captions(markdown)
+
+def pdf_page_ranges(file_path: str, pages_per_part: int) -> list:
+    """[start, stop) page ranges of at most pages_per_part pages, so a PDF is extracted piece by piece."""
+    with pymupdf.open(file_path) as doc:
+        page_count = doc.page_count
+    return [(start, min(start + pages_per_part, page_count)) for start in range(0, page_count, pages_per_part)]
+
+
+@mcp.tool()
+def extract_pdf(input: FilePathInput) -> MarkdownOutput:
+    """Convert PDF file content to markdown format. Usage: extract_pdf|input={"file_path": "documents/dlf.pdf"}"""
+
+    if not os.path.exists(input.file_path):
+        return MarkdownOutput(markdown=f"File not found: {input.file_path}")
+
+    # Page ranges one at a time: only one range's images are on disk before captioning
+    pages_per_part = PIPELINE_CONFIG.get("pdf_pages_per_part", 50)
+    markdown = "".join(
+        replace_images_with_captions(pdf_to_markdown(input.file_path, pages))
+        for pages in pdf_page_ranges(input.file_path, pages_per_part)
+    )
     return MarkdownOutput(markdown=markdown)
 
 
@@ -299,107 +635,518 @@ Keep markdown formatting intact.
     return final_chunks
 
 
+def chunk_markdown(markdown: str) -> list[str]:
+    """Topic chunks using the configured mode: embedding similarity (default) or the LLM semantic_merge."""
+    if CHUNKING_CONFIG.get("mode", "embedding") == "llm":
+        return semantic_merge(markdown)
+    return similarity_chunks(
+        markdown,
+        get_embedder().embed_many,
+        threshold=CHUNKING_CONFIG.get("similarity_threshold", 0.6),
+        max_words=CHUNKING_CONFIG.get("max_words", 512),
+        min_words=CHUNKING_CONFIG.get("min_words", 20),
+        window=CHUNKING_CONFIG.get("window", 2)
+    )
+
+
+
+
+
+
+
+# === INGESTION PIPELINE ===
+
+def _quiet_extraction_worker():
+    # stdout is the MCP stdio channel; route worker prints (and C-level output) to stderr
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+
+def extract_document(path: str, pages: tuple = None) -> str:
+    """Raw markdown for one document (or one page range of a PDF), images not yet captioned. Runs in an extraction process."""
+    file = Path(path)
+    ext = file.suffix.lower()
+
+    if ext == ".pdf":
+        mcp_log("INFO", f"Using MuPDF4LLM to extract {file.name}" + (f" pages {pages[0] + 1}-{pages[1]}" if pages else ""))
+        return pdf_to_markdown(path, pages)
+
+    elif ext in [".html", ".htm", ".url"]:
+        mcp_log("INFO", f"Using Trafilatura to extract {file.name}")
+        return webpage_to_markdown(file.read_text().strip())
 
+    # Fallback to MarkItDown for other formats
+    mcp_log("INFO", f"Using MarkItDown fallback for {file.name}")
+    return MarkItDown().convert(path).text_content
 
 
+# === INCREMENTAL INDEX ===
+# Vector ids are (doc_num << DOC_ID_BITS) | local, so every document owns one id range.
+# The DocStore keeps each document's file hash and id range, and one row per chunk
+# (keyed by vector id, with its content hash); unchanged chunks keep their id and
+# vector across re-ingestion.
 
+DOC_ID_BITS = 20
+DOC_ID_SPAN = 1 << DOC_ID_BITS
 
-def process_documents():
-    """Process documents and create FAISS index using unified multimodal strategy."""
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def allocate_id(entry: dict, taken: set) -> int:
+    """Next free id in the document's range; taken holds ids still live or awaiting removal."""
+    for _ in range(DOC_ID_SPAN):
+        local = entry["next_local"] % DOC_ID_SPAN
+        entry["next_local"] = local + 1
+        vector_id = (entry["doc_num"] << DOC_ID_BITS) | local
+        if vector_id not in taken:
+            taken.add(vector_id)
+            return vector_id
+    raise RuntimeError(f"Document id range exhausted (doc {entry['doc_num']})")
+
+
+def compact_index(index, tombstones: set) -> int:
+    """Physically drops tombstoned vectors in one batched remove_ids call (HNSW needs a rebuild instead)."""
+    if index is None or not tombstones or not supports_removal(index):
+        return 0
+    removed = index.remove_ids(np.array(sorted(tombstones), dtype=np.int64))
+    tombstones.clear()
+    return removed
+
+
+def as_vectors(blobs: list[bytes]) -> np.ndarray:
+    return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), -1)
+
+
+def near_duplicates(index, hashes: list[str], vectors: dict, exclude: set) -> dict:
+    """
+    chunk hash → id of an indexed chunk whose vector has cosine similarity ≥ dedup.near_duplicate_threshold
+    with it (0 disables: only identical text is shared). Ids in exclude (stale vectors, and the
+    document's own previous chunks, whose edited text should not resolve to the old one) never match.
+    """
+    threshold = DEDUP_CONFIG.get("near_duplicate_threshold", 0.0)
+    if not threshold or not hashes or index is None or index.ntotal == 0:
+        return {}
+    queries = np.stack([vectors[h] for h in hashes]).astype(np.float32)
+    _, I = index.search(queries, 1)
+    candidates = get_doc_store().get_vectors(sorted({int(i) for i in I[:, 0] if i >= 0 and int(i) not in exclude}))
+    matches = {}
+    for h, query, vector_id in zip(hashes, queries, I[:, 0]):
+        if int(vector_id) not in candidates:
+            continue
+        match = np.frombuffer(candidates[int(vector_id)], dtype=np.float32)
+        cosine = float(query @ match) / (float(np.linalg.norm(query) * np.linalg.norm(match)) or 1.0)
+        if cosine >= threshold:
+            matches[h] = int(vector_id)
+    return matches
+
+
+def rebuild_index(store: DocStore):
+    """Builds the configured (or auto-chosen) index type from the vectors in the chunk store."""
+    sample = store.sample_vectors(INDEX_CONFIG.get("train_sample", 100_000))
+    if not sample:
+        return None
+    n = store.count()
+    kind = choose_index_type(n, INDEX_CONFIG)
+    mcp_log("INFO", f"Building {kind} index over {n} chunks")
+
+    def batches():
+        for rows in store.iter_vectors():
+            yield [vector_id for vector_id, _ in rows], as_vectors([blob for _, blob in rows])
+
+    sample = as_vectors(sample)
+    return build_index(kind, sample.shape[1], n, sample, batches, INDEX_CONFIG)
+
+
+def migrate_json_metadata(store: DocStore, index_dir: Path) -> None:
+    """One-time import of the old metadata.json / doc_index_cache.json files into the DocStore."""
+    registry_file, metadata_file = index_dir / "doc_index_cache.json", index_dir / "metadata.json"
+    if not registry_file.exists():
+        return
+
+    registry = json.loads(registry_file.read_text())
+    if registry.get("version") == 2 and metadata_file.exists() and not store.documents():
+        for name, entry in registry["docs"].items():
+            store.add_document(name, doc_num=entry["doc"])
+            store.update_document({"name": name, "hash": entry["hash"], "next_local": entry["next_local"]})
+        store.put_chunks([
+            {**m, "chunk_hash": chunk_hash(m["chunk"])} for m in json.loads(metadata_file.read_text())
+        ])
+        store.set_tombstones(registry["tombstones"])
+        store.commit()
+        mcp_log("INFO", f"Imported {store.count()} chunks from metadata.json into the chunk store")
+
+    # Files from before id ranges are dropped too; their positional index gets rebuilt
+    registry_file.unlink()
+    metadata_file.unlink(missing_ok=True)
+
+
+_ingest_lock = threading.Lock()
+
+
+def process_documents(paths=None):
+    """
+    Indexes documents/ (or, with paths, just those files) — one run at a time, since the
+    startup scan and the folder watcher may both trigger one.
+    """
+    with _ingest_lock:
+        _process_documents(None if paths is None else {Path(p).name for p in paths})
+
+
+def _process_documents(scope):
+    """
+    Process documents and create FAISS index using unified multimodal strategy.
+
+    Files stream through bounded stages so different files occupy different stages at once:
+    extract (process pool) → caption + chunk (threads) → embed (threads) → writer.
+    Only the writer, running in this thread, changes the index and the chunk store; every
+    index.commit_every documents it commits the store and publishes the index as a new
+    snapshot version, while searches keep reading the version they pinned.
+    Changed documents only embed chunks whose hash is new; their dropped chunks, and all
+    chunks of deleted documents, are tombstoned and removed from the index in batches.
+    Files whose mtime and size match the last run are skipped without hashing them.
+    scope (file names) limits a watcher-triggered run to those files; only full runs
+    reconcile the index with the chunk store after an interrupted run.
+    """
     mcp_log("INFO", "Indexing documents with unified RAG pipeline...")
     ROOT = Path(__file__).parent.resolve()
     DOC_PATH = ROOT / "documents"
     INDEX_CACHE = ROOT / "faiss_index"
     INDEX_CACHE.mkdir(exist_ok=True)
-    INDEX_FILE = INDEX_CACHE / "index.bin"
-    METADATA_FILE = INDEX_CACHE / "metadata.json"
-    CACHE_FILE = INDEX_CACHE / "doc_index_cache.json"
+    compact_every = INDEX_CONFIG.get("compact_every", 1000)
+    commit_every = max(1, INDEX_CONFIG.get("commit_every", 8))
 
     def file_hash(path):
         return hashlib.md5(Path(path).read_bytes()).hexdigest()
 
-    CACHE_META = json.loads(CACHE_FILE.read_text()) if CACHE_FILE.exists() else {}
-    metadata = json.loads(METADATA_FILE.read_text()) if METADATA_FILE.exists() else []
-    index = faiss.read_index(str(INDEX_FILE)) if INDEX_FILE.exists() else None
-
-    for file in DOC_PATH.glob("*.*"):
-        fhash = file_hash(file)
-        if file.name in CACHE_META and CACHE_META[file.name] == fhash:
-            mcp_log("SKIP", f"Skipping unchanged file: {file.name}")
-            continue
-
-        mcp_log("PROC", f"Processing: {file.name}")
-        try:
-            ext = file.suffix.lower()
-            markdown = ""
+    store = get_doc_store()
+    migrate_json_metadata(store, INDEX_CACHE)
+    # Leftovers of readers that finished after the last run's publish
+    store.purge(snapshots.oldest_active())
+    snapshots.gc()
+
+    # Work on a private copy of the published version; rows written now belong to the next one
+    published = snapshots.current_version()
+    index_file = snapshots.index_path(published)
+    index = faiss.read_index(str(index_file)) if index_file and index_file.exists() else None
+    version = max(published, store.version()) + 1
+    # The legacy in-place index.bin is republished as the first snapshot
+    changed = published == 0 and index is not None
+    if index is not None and not isinstance(index, (faiss.IndexIDMap, faiss.IndexIVF)):
+        # Positional IndexFlatL2 from before id ranges: rebuild from scratch
+        mcp_log("INFO", "Old index format found → rebuilding the index with per-document id ranges")
+        index = None
+        for name in store.documents():
+            store.delete_document(name, version)
+
+    tombstones = store.tombstones()
+    if scope is None:
+        stored = store.all_ids()
+        in_index = index_ids(index)
+        # Vectors without a chunk row were left by an interrupted run; queue them for removal
+        orphans = in_index - set(stored) - tombstones
+        tombstones |= orphans
+        changed |= bool(orphans)
+
+        # Chunk rows from before vectors were stored: copy their vectors out of the index
+        backfill = [vector_id for vector_id in store.ids_without_vector() if vector_id in in_index]
+        if backfill and isinstance(index, faiss.IndexIDMap2):
+            store.set_vectors((vector_id, index.reconstruct(vector_id).tobytes()) for vector_id in backfill)
+
+        # Rows whose vector never reached the saved index: re-add stored vectors, else re-embed the document
+        lost = [vector_id for vector_id in stored if vector_id not in in_index]
+        if lost:
+            changed = True
+            recovered = store.get_vectors(lost)
+            if index is None:
+                index = rebuild_index(store)
+            elif recovered:
+                index.add_with_ids(as_vectors(list(recovered.values())), np.array(list(recovered), dtype=np.int64))
+            unrecoverable = [vector_id for vector_id in lost if vector_id not in recovered]
+            if unrecoverable:
+                store.invalidate_documents(store.delete_chunks(unrecoverable, version))
+                mcp_log("WARN", f"{len(unrecoverable)} chunks missing from the index → re-ingesting their documents")
+
+    docs = store.documents()
+
+    # Documents removed from documents/ lose all their chunks
+    files = [file for file in DOC_PATH.glob("*.*") if scope is None or file.name in scope]
+    present = {file.name for file in files}
+    for name in [n for n in docs if n not in present and (scope is None or n in scope)]:
+        tombstones.update(store.delete_document(name, version))
+        changed = True
+        mcp_log("DEL", f"Removed deleted document: {name}")
+
+    uncommitted = 0
+
+    def flush(reason: str):
+        nonlocal uncommitted, changed, version
+        store.set_tombstones(tombstones)
+        if changed:
+            store.set_version(version)
+        # Rows first: they are tagged with the unpublished version, so readers of the
+        # current snapshot do not see them until the manifest flips
+        store.commit()
+        if changed and index is not None:
+            snapshots.publish(version, lambda path: faiss.write_index(index, str(path)))
+            purged = store.purge(snapshots.oldest_active())
+            store.commit()
+            collected = snapshots.gc()
+            mcp_log("SAVE", f"Published index version {version} {reason} "
+                            f"({purged} removed chunks purged, {len(collected)} old versions collected)")
+            version += 1
+        changed = False
+        uncommitted = 0
+
+    def pending_files():
+        for file in files:
+            stat, entry = file.stat(), docs.get(file.name)
+            if entry and entry["hash"] and (entry["mtime"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+                mcp_log("SKIP", f"Skipping unchanged file: {file.name}")
+                continue
+            fhash = file_hash(file)
+            if entry and entry["hash"] == fhash:
+                # Touched but not modified: remember the new mtime so the next run skips the hash
+                store.touch_document(file.name, stat.st_mtime_ns, stat.st_size)
+                mcp_log("SKIP", f"Skipping unchanged file: {file.name}")
+                continue
+            mcp_log("PROC", f"Processing: {file.name}")
+            # Large PDFs go through the stages as page ranges, so only a few ranges'
+            # markdown, images and vectors are in memory at once
+            job = {"file": file, "hash": fhash, "mtime": stat.st_mtime_ns, "size": stat.st_size, "pages": None}
+            parts = [None]
+            if file.suffix.lower() == ".pdf":
+                try:
+                    parts = pdf_page_ranges(str(file), pages_per_part) or [None]
+                except Exception as e:
+                    # A corrupt PDF fails on its own; the files after it are still processed
+                    on_error("extract", job, e)
+                    continue
+            # A part is written only after the ones before it, so the writer holds later parts
+            # that overtook an earlier one; at most parts_in_flight of a document are out at once
+            limit = in_flight[file.name] = threading.BoundedSemaphore(parts_in_flight) if len(parts) > 1 else None
+            for n, pages in enumerate(parts):
+                if limit:
+                    while not limit.acquire(timeout=0.1):
+                        if aborted.is_set():
+                            return
+                    if file.name in failed:
+                        limit.release()
+                        break
+                yield {**job, "part": n, "pages": pages, "final": n == len(parts) - 1}
 
-            if ext == ".pdf":
-                mcp_log("INFO", f"Using MuPDF4LLM to extract {file.name}")
-                markdown = extract_pdf(FilePathInput(file_path=str(file))).markdown
+    def describe(job):
+        pages = job["pages"]
+        return f"{job['file'].name} pages {pages[0] + 1}-{pages[1]}" if pages else job["file"].name
 
-            elif ext in [".html", ".htm", ".url"]:
-                mcp_log("INFO", f"Using Trafilatura to extract {file.name}")
-                markdown = extract_webpage(UrlInput(url=file.read_text().strip())).markdown
+    pages_per_part = max(1, PIPELINE_CONFIG.get("pdf_pages_per_part", 50))
+    extract_workers = PIPELINE_CONFIG.get("extract_workers") or os.cpu_count() or 1
+    parts_in_flight = max(1, PIPELINE_CONFIG.get("pdf_parts_in_flight") or extract_workers + 1)
 
-            else:
-                # Fallback to MarkItDown for other formats
-                converter = MarkItDown()
-                mcp_log("INFO", f"Using MarkItDown fallback for {file.name}")
-                markdown = converter.convert(str(file)).text_content
+    with ProcessPoolExecutor(max_workers=extract_workers, initializer=_quiet_extraction_worker) as pool:
 
+        def extract(job):
+            markdown = pool.submit(extract_document, str(job["file"]), job["pages"]).result()
             if not markdown.strip():
-                mcp_log("WARN", f"No content extracted from {file.name}")
-                continue
-
+                mcp_log("WARN", f"No content extracted from {describe(job)}")
+                # A document's later parts wait for this one in the writer, so only a
+                # single-part document can be dropped here
+                if job["part"] == 0 and job["final"]:
+                    return None
+            return {**job, "markdown": markdown}
+
+        def enrich(job):
+            markdown = replace_images_with_captions(job["markdown"])
             if len(markdown.split()) < 10:
-                mcp_log("WARN", f"Content too short for semantic merge in {file.name} → Skipping chunking.")
+                mcp_log("WARN", f"Content too short for semantic merge in {describe(job)} → Skipping chunking.")
                 chunks = [markdown.strip()]
             else:
-                mcp_log("INFO", f"Running semantic merge on {file.name} with {len(markdown.split())} words")
-                chunks = semantic_merge(markdown)
-
-
-            embeddings_for_file = []
-            new_metadata = []
-            for i, chunk in enumerate(tqdm(chunks, desc=f"Embedding {file.name}")):
-                embedding = get_embedding(chunk)
-                embeddings_for_file.append(embedding)
-                new_metadata.append({
-                    "doc": file.name,
-                    "chunk": chunk,
-                    "chunk_id": f"{file.stem}_{i}"
-                })
-
-            if embeddings_for_file:
+                mcp_log("INFO", f"Chunking {describe(job)} with {len(markdown.split())} words")
+                chunks = chunk_markdown(markdown)
+            return {**job, "chunks": [c for c in chunks if c.strip()]}
+
+        def embed(job):
+            # Only chunks no document already has need a vector
+            known = store.find_chunks(chunk_hash(c) for c in job["chunks"])
+            hashes = [chunk_hash(c) for c in job["chunks"]]
+            fresh = {}
+            for h, chunk in zip(hashes, job["chunks"]):
+                if h not in known and h not in fresh:
+                    fresh[h] = chunk
+            mcp_log("EMBED", f"Embedding {len(fresh)} of {len(hashes)} chunks of {describe(job)}")
+            vectors = get_embedder().embed_many(list(fresh.values())) if fresh else []
+            return {**job, "hashes": hashes, "vectors": dict(zip(fresh, vectors))}
+
+        # Documents whose parts are still arriving: file name → writer state
+        open_docs, failed = {}, set()
+        # Multi-part documents: file name → semaphore bounding their parts in flight
+        in_flight, aborted = {}, threading.Event()
+
+        def release_part(job):
+            limit = in_flight.get(job["file"].name)
+            if limit:
+                limit.release()
+
+        def write(job):
+            name = job["file"].name
+            try:
+                if name in failed:
+                    open_docs.pop(name, None)
+                    release_part(job)
+                    return
+                state = open_docs.setdefault(name, {"next_part": 0, "waiting": {}})
+                state["waiting"][job["part"]] = job
+                # Parts can overtake each other in the multi-worker stages; write them in page order
+                while state["next_part"] in state["waiting"]:
+                    part = state["waiting"].pop(state["next_part"])
+                    write_part(state, part)
+                    release_part(part)
+                    state["next_part"] += 1
+            except BaseException:
+                aborted.set()  # the feeder may be waiting for a part this writer will never release
+                raise
+
+        def write_part(state, job):
+            nonlocal index, uncommitted, changed
+            file = job["file"]
+            if job["part"] == 0:
+                state["entry"] = store.document(file.name) or store.add_document(file.name)
+                state["old_chunks"] = store.chunk_ids(file.name)
+                # Removed rows keep their ids until purged: readers of older versions may still see them
+                state["taken"] = store.reserved_ids(file.name) | tombstones
+                state.update(chunk_ids={}, position=0, new=0, shared=0)
+            entry, old_chunks, chunk_ids = state["entry"], state["old_chunks"], state["chunk_ids"]
+
+            # Chunks other documents already have (boilerplate) become extra sources of their vector
+            fresh = [h for h in job["hashes"] if h not in chunk_ids and h not in old_chunks]
+            shared = store.find_chunks(fresh)
+            missing = [h for h in dict.fromkeys(fresh) if h not in shared and h not in job["vectors"]]
+            if missing:
+                # Was another document's chunk when embedded, but that chunk has been removed since
+                texts = {h: c for h, c in zip(job["hashes"], job["chunks"])}
+                job["vectors"].update(zip(missing, get_embedder().embed_many([texts[h] for h in missing])))
+            shared.update(near_duplicates(
+                index, [h for h in dict.fromkeys(fresh) if h not in shared], job["vectors"],
+                tombstones | set(old_chunks.values())
+            ))
+
+            chunk_rows, source_rows, new_ids, new_vectors = [], [], [], []
+            for h, chunk in zip(job["hashes"], job["chunks"]):
+                i = state["position"]
+                state["position"] += 1
+                if h in chunk_ids:
+                    continue
+                row = {"doc": file.name, "chunk_hash": h, "chunk": chunk, "chunk_id": f"{file.stem}_{i}"}
+                if h in old_chunks or h in shared:
+                    chunk_ids[h] = old_chunks.get(h, shared.get(h))
+                    state["shared"] += h not in old_chunks
+                    source_rows.append({**row, "id": chunk_ids[h]})
+                    continue
+                chunk_ids[h] = allocate_id(entry, state["taken"])
+                new_ids.append(chunk_ids[h])
+                new_vectors.append(job["vectors"][h])
+                chunk_rows.append({**row, "id": chunk_ids[h], "vector": job["vectors"][h].astype(np.float32).tobytes()})
+
+            store.put_chunks(chunk_rows, version)
+            store.put_sources(source_rows, version)
+            if new_vectors:
                 if index is None:
-                    dim = len(embeddings_for_file[0])
-                    index = faiss.IndexFlatL2(dim)
-                index.add(np.stack(embeddings_for_file))
-                metadata.extend(new_metadata)
-                CACHE_META[file.name] = fhash
-
-                # ✅ Immediately save index and metadata
-                CACHE_FILE.write_text(json.dumps(CACHE_META, indent=2))
-                METADATA_FILE.write_text(json.dumps(metadata, indent=2))
-                faiss.write_index(index, str(INDEX_FILE))
-                mcp_log("SAVE", f"Saved FAISS index and metadata after processing {file.name}")
+                    # IVF needs a training set, so a first build starts flat and is rebuilt at the end
+                    kind = choose_index_type(store.count(), INDEX_CONFIG)
+                    kind = kind if kind in ("flat", "hnsw") else "flat"
+                    index = create_index(kind, len(new_vectors[0]), 0, INDEX_CONFIG)
+                index.add_with_ids(np.stack(new_vectors), np.array(new_ids, dtype=np.int64))
+            state["new"] += len(new_ids)
+            changed = True
+            uncommitted += 1
+
+            if job["final"]:
+                # Whole document seen: drop the sources it no longer has (and chunks left with none), then mark it up to date
+                stale = [h for h in old_chunks if h not in chunk_ids]
+                tombstones.update(store.remove_sources(file.name, stale, version))
+                entry.update(hash=job["hash"], mtime=job["mtime"], size=job["size"])
+                store.update_document(entry)
+                del open_docs[file.name]
+                reused = len(chunk_ids) - state["new"] - state["shared"]
+                mcp_log("INFO", f"Indexed {file.name}: {state['new']} new, {reused} reused, "
+                                f"{state['shared']} shared with other documents")
+            elif chunk_rows or source_rows:
+                mcp_log("INFO", f"Indexed {describe(job)}: {len(new_ids)} new chunks")
+
+            if len(tombstones) >= compact_every and supports_removal(index):
+                mcp_log("INFO", f"Compacted {compact_index(index, tombstones)} stale vectors")
+            if uncommitted >= commit_every:
+                flush(f"after processing {describe(job)}")
+
+        def on_error(stage, job, e):
+            # The document stays out of date (its hash is not updated) and is retried next run
+            failed.add(job["file"].name)
+            release_part(job)
+            mcp_log("ERROR", f"Failed to process {describe(job)} ({stage}): {e}")
 
-        except Exception as e:
-            mcp_log("ERROR", f"Failed to process {file.name}: {e}")
+        try:
+            run_pipeline(
+                pending_files(),
+                [
+                    # Extraction threads only wait on the process pool, one per worker process
+                    Stage("extract", extract, workers=extract_workers),
+                    Stage("enrich", enrich, workers=PIPELINE_CONFIG.get("enrich_workers", 4)),
+                    Stage("embed", embed, workers=PIPELINE_CONFIG.get("embed_workers", 2)),
+                ],
+                sink=write,
+                queue_size=PIPELINE_CONFIG.get("queue_size", 8),
+                on_error=on_error
+            )
+        finally:
+            # End of run: switch index type if the corpus size calls for it (or rebuild an HNSW
+            # index that has stale vectors), else one batched removal; then a final commit
+            live = store.count()
+            if needs_rebuild(index, live, INDEX_CONFIG) or (tombstones and not supports_removal(index)):
+                index = rebuild_index(store)
+                tombstones.clear()
+                changed = True
+                flush(f"at end of run (rebuilt as {index_type(index)})")
+            else:
+                removed = compact_index(index, tombstones)
+                changed |= removed > 0
+                flush(f"at end of run ({removed} stale vectors compacted)")
 
 
 
 def ensure_faiss_ready():
     from pathlib import Path
-    index_path = ROOT / "faiss_index" / "index.bin"
-    meta_path = ROOT / "faiss_index" / "metadata.json"
-    if not (index_path.exists() and meta_path.exists()):
+    index_path = snapshots.index_path(snapshots.current_version())
+    store_path = ROOT / "faiss_index" / "documents.sqlite"
+    if not (index_path and index_path.exists() and store_path.exists()):
         mcp_log("INFO", "Index not found — running process_documents()...")
         process_documents()
     else:
         mcp_log("INFO", "Index already exists. Skipping regeneration.")
 
 
+def start_document_watcher():
+    """Re-indexes files added, changed or removed in documents/ while the server runs."""
+    if not WATCHER_CONFIG.get("enabled", True):
+        return None
+
+    def on_change(paths):
+        mcp_log("WATCH", f"Changed: {sorted(p.name for p in paths)}")
+        process_documents(paths)
+
+    watcher = DocumentWatcher(
+        ROOT / "documents",
+        on_change,
+        debounce=WATCHER_CONFIG.get("debounce", 2.0),
+        poll_interval=WATCHER_CONFIG.get("poll_interval", 5.0),
+        backend=WATCHER_CONFIG.get("backend", "auto"),
+        on_error=lambda e: mcp_log("ERROR", f"Incremental indexing failed: {e}")
+    )
+    watcher.start()
+    mcp_log("WATCH", f"Watching documents/ ({watcher.backend})")
+    return watcher
+
+
 if __name__ == "__main__":
     print("STARTING THE SERVER AT AMAZING LOCATION")
 
@@ -415,7 +1162,9 @@ if __name__ == "__main__":
         # Wait a moment for the server to start
         time.sleep(2)
         
-        # Process documents after server is running
+        # Watch before the initial run, so files changed while it runs are picked up too
+        # (runs are serialized by _ingest_lock); then process documents
+        watcher = start_document_watcher()
         process_documents()
         
         # Keep the main thread alive
@@ -424,3 +1173,5 @@ if __name__ == "__main__":
                 time.sleep(1)
         except KeyboardInterrupt:
             print("\nShutting down...")
+            if watcher:
+                watcher.stop()
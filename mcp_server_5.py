@@ -85,15 +85,22 @@ def get_google_credentials():
             os.remove(token_path)
         raise
 
-# Initialize services
-try:
-    credentials = get_google_credentials()
-    sheets_service = build('sheets', 'v4', credentials=credentials)
-    drive_service = build('drive', 'v3', credentials=credentials)
-    logger.info("Google services initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize services: {str(e)}")
-    raise
+# Services are built on first use so the server can start (and list its
+# tools) without triggering the OAuth flow
+_services = {}
+
+def get_services():
+    """Return (sheets_service, drive_service), authenticating on first call"""
+    if not _services:
+        try:
+            credentials = get_google_credentials()
+            _services['sheets'] = build('sheets', 'v4', credentials=credentials)
+            _services['drive'] = build('drive', 'v3', credentials=credentials)
+            logger.info("Google services initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize services: {str(e)}")
+            raise
+    return _services['sheets'], _services['drive']
 
 @mcp.tool()
 async def process_result(result: dict) -> dict:
@@ -106,6 +113,8 @@ async def process_result(result: dict) -> dict:
         Dictionary containing status and spreadsheet link
     """
     try:
+        sheets_service, drive_service = get_services()
+
         # Create a new spreadsheet
         spreadsheet = {
             'properties': {
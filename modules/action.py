@@ -1,6 +1,6 @@
 # modules/action.py
 
-from typing import Dict, Any, Union
+from typing import Dict, Any, List, Tuple, Union
 from pydantic import BaseModel
 import ast
 
@@ -60,3 +60,16 @@ def parse_function_call(response: str) -> tuple[str, Dict[str, Any]]:
     except Exception as e:
         log("parser", f"❌ Parse failed: {e}")
         raise
+
+
+def parse_function_calls(response: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Parses every FUNCTION_CALL line of a plan, e.g.
+    "FUNCTION_CALL: search_documents|query=\"X\"\nFUNCTION_CALL: add|a=5|b=7"
+    Into a list of (tool name, arguments) for calls that can run concurrently.
+    """
+    lines = [line.strip() for line in response.splitlines() if line.strip().startswith("FUNCTION_CALL:")]
+    if not lines:
+        log("parser", "❌ Parse failed: Invalid function call format.")
+        raise ValueError("Invalid function call format.")
+    return [parse_function_call(line) for line in lines]
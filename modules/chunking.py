@@ -0,0 +1,104 @@
+# modules/chunking.py → Embedding-Similarity Chunker
+# Role: Split markdown into topic-coherent chunks without an LLM call per window.
+
+# Responsibilities:
+
+# Split text into sentence units (headings and list items stay on their own)
+
+# Embed all units in one batched pass
+
+# Place chunk boundaries where the windowed cosine similarity of neighbouring units
+# drops below a threshold (vectorized with NumPy)
+
+# Cap chunks at max_words and avoid chunks shorter than min_words
+
+# Used by: mcp_server_2.py (document ingestion), benchmarks/bench_chunking.py
+
+import re
+from typing import Callable, List
+
+import numpy as np
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[\"\'(\[*_]*[A-Z0-9#])')
+_BLOCK_START = re.compile(r'^\s*(#{1,6}\s|[-*+]\s|\d+[.)]\s|\|)')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentence-ish units. Blank lines, headings, list items and table rows always start a new unit."""
+    units = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        lines, buffer = [], []
+        for line in paragraph.splitlines():
+            if _BLOCK_START.match(line) and buffer:
+                lines.append(" ".join(buffer))
+                buffer = []
+            buffer.append(line.strip())
+        if buffer:
+            lines.append(" ".join(buffer))
+
+        for block in lines:
+            units.extend(s.strip() for s in _SENTENCE_END.split(block) if s.strip())
+    return units
+
+
+def adjacent_similarity(vectors: np.ndarray, window: int = 1) -> np.ndarray:
+    """
+    sims[i] = cosine(mean of units i-window+1..i, mean of units i+1..i+window).
+    A low value means a topic shift between unit i and unit i+1.
+    """
+    n = len(vectors)
+    if n < 2:
+        return np.zeros(0, dtype=np.float32)
+
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    prefix = np.vstack([np.zeros((1, vectors.shape[1]), dtype=vectors.dtype), np.cumsum(vectors, axis=0)])
+
+    cut = np.arange(1, n)  # boundary after unit cut-1
+    left_start = np.maximum(cut - window, 0)
+    right_end = np.minimum(cut + window, n)
+    left = prefix[cut] - prefix[left_start]
+    right = prefix[right_end] - prefix[cut]
+
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    return np.sum(left * right, axis=1) / np.maximum(norms, 1e-12)
+
+
+def _split_long(unit: str, max_words: int) -> List[str]:
+    words = unit.split()
+    return [" ".join(words[i:i + max_words]) for i in range(0, len(words), max_words)]
+
+
+def similarity_chunks(
+    text: str,
+    embed_many: Callable[[List[str]], np.ndarray],
+    threshold: float = 0.6,
+    max_words: int = 512,
+    min_words: int = 20,
+    window: int = 2,
+) -> List[str]:
+    """Chunks text at topic boundaries found by comparing embeddings of neighbouring sentences."""
+    units = []
+    for unit in split_sentences(text):
+        units.extend(_split_long(unit, max_words) if len(unit.split()) > max_words else [unit])
+    if len(units) <= 1:
+        return units
+
+    sims = adjacent_similarity(np.asarray(embed_many(units), dtype=np.float32), window=max(1, window))
+    lengths = [len(u.split()) for u in units]
+
+    chunks, current, current_words = [], [units[0]], lengths[0]
+    for i in range(1, len(units)):
+        topic_shift = sims[i - 1] < threshold and current_words >= min_words
+        if topic_shift or current_words + lengths[i] > max_words:
+            chunks.append(" ".join(current))
+            current, current_words = [], 0
+        current.append(units[i])
+        current_words += lengths[i]
+
+    if current:
+        # A short tail joins the previous chunk if there is room
+        if chunks and current_words < min_words and len(chunks[-1].split()) + current_words <= max_words:
+            chunks[-1] = chunks[-1] + " " + " ".join(current)
+        else:
+            chunks.append(" ".join(current))
+    return chunks
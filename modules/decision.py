@@ -1,10 +1,12 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from modules.perception import PerceptionResult
 from modules.memory import MemoryItem
 from modules.model_manager import ModelManager
 from dotenv import load_dotenv
 from google import genai
 import os
+import re
+import json
 import asyncio
 
 # Optional: import logger if available
@@ -16,7 +18,7 @@ except ImportError:
         now = datetime.datetime.now().strftime("%H:%M:%S")
         print(f"[{now}] [{stage}] {msg}")
 
-model = ModelManager()
+default_model = ModelManager()
 
 
 async def generate_plan(
@@ -24,12 +26,21 @@ async def generate_plan(
     memory_items: List[MemoryItem],
     tool_descriptions: Optional[str] = None,
     step_num: int = 1,
-    max_steps: int = 3
+    max_steps: int = 3,
+    model: Optional[ModelManager] = None,
+    max_parallel_calls: int = 1
 ) -> str:
     """Generates the next step plan for the agent: either tool usage or final answer."""
 
+    llm = model or default_model
+
     memory_texts = "\n".join(f"- {m.text}" for m in memory_items) or "None"
     tool_context = f"\nYou have access to the following tools:\n{tool_descriptions}" if tool_descriptions else ""
+    parallel_rule = f"""
+Exception: if the task needs several tool calls that do NOT depend on each other's results, you may return up to {max_parallel_calls} FUNCTION_CALL lines, one per line. They run in parallel, e.g.
+FUNCTION_CALL: search_documents|query="DLF apartment price"
+FUNCTION_CALL: power|a=2|b=10
+""" if max_parallel_calls > 1 else ""
 
     prompt = f"""
 You are a reasoning-driven AI agent with access to tools and memory.
@@ -39,7 +50,7 @@ Respond in **exactly one line** using one of the following formats:
 
 - FUNCTION_CALL: tool_name|param1=value1|param2=value2
 - FINAL_ANSWER: [your final result] *(Not description, but actual final answer)
-
+{parallel_rule}
 🧠 Context:
 - Step: {step_num} of {max_steps}
 - Memory: 
@@ -82,16 +93,143 @@ Respond in **exactly one line** using one of the following formats:
 
 
     try:
-        raw = (await model.generate_text(prompt)).strip()
+        raw = (await llm.generate_text(prompt)).strip()
         log("plan", f"LLM output: {raw}")
 
-        for line in raw.splitlines():
-            if line.strip().startswith("FUNCTION_CALL:") or line.strip().startswith("FINAL_ANSWER:"):
-                return line.strip()
-
-        return "FINAL_ANSWER: [unknown]"
+        return extract_plan_lines(raw)
 
     except Exception as e:
         log("plan", f"⚠️ Planning failed: {e}")
         return "FINAL_ANSWER: [unknown]"
 
+
+async def generate_fused_plan(
+    user_input: str,
+    memory_items: List[MemoryItem],
+    tool_descriptions: Optional[str] = None,
+    step_num: int = 1,
+    max_steps: int = 3,
+    model: Optional[ModelManager] = None,
+    max_parallel_calls: int = 1
+) -> Tuple[PerceptionResult, str]:
+    """
+    Single LLM call that returns both the perception (intent, entities, tool hint)
+    and the next step plan, instead of extract_perception() + generate_plan().
+    """
+
+    llm = model or default_model
+
+    memory_texts = "\n".join(f"- {m.text}" for m in memory_items) or "None"
+    tool_context = f"\nYou have access to the following tools:\n{tool_descriptions}" if tool_descriptions else ""
+    parallel_rule = f"""
+Only if the task needs several tool calls that do NOT depend on each other's results, the last line may be
+followed by more FUNCTION_CALL lines (up to {max_parallel_calls} in total). They run in parallel.
+""" if max_parallel_calls > 1 else ""
+
+    prompt = f"""
+You are a reasoning-driven AI agent with access to tools and memory.
+Understand the user's request and decide the next step in the same response.
+
+Respond with **exactly these four lines** and nothing else:
+
+INTENT: brief phrase about what the user wants
+ENTITIES: ["keyword or value", "..."]
+TOOL_HINT: name of the most useful tool, or None
+FUNCTION_CALL: tool_name|param1=value1|param2=value2   (or)   FINAL_ANSWER: [your final result]
+{parallel_rule}
+🧠 Context:
+- Step: {step_num} of {max_steps}
+- Memory: 
+{memory_texts}
+{tool_context}
+
+🎯 Input: "{user_input}"
+
+✅ Examples:
+INTENT: sum of exponentials of ASCII values of INDIA
+ENTITIES: ["INDIA", "ASCII"]
+TOOL_HINT: strings_to_chars_to_int
+FUNCTION_CALL: strings_to_chars_to_int|input.string=INDIA
+
+INTENT: relationship between Cricket and Sachin Tendulkar
+ENTITIES: ["Cricket", "Sachin Tendulkar"]
+TOOL_HINT: search_documents
+FUNCTION_CALL: search_documents|query="relationship between Cricket and Sachin Tendulkar"
+
+---
+
+📏 IMPORTANT Rules:
+
+- 🚫 Do NOT invent tools. Use only the tools listed above. Tool description has useage pattern, only use that.
+- 📄 If the question may relate to public/factual knowledge (like companies, people, places), use the `search_documents` tool to look for the answer.
+- 🧮 If the question is mathematical, use the appropriate math tool.
+- 🔁 If you have already got a good factual result from a tool, do NOT search again — summarize and respond with FINAL_ANSWER.
+- ❌ NEVER repeat tool calls with the same parameters unless the result was empty.
+- ✅ Use nested keys like `input.string` or `input.int_list`, and square brackets for lists.
+- 💡 If no tool fits or you're unsure, end with: FINAL_ANSWER: [unknown]
+- ⏳ Final step must end with FINAL_ANSWER.
+"""
+
+    perception = PerceptionResult(user_input=user_input, intent=None)
+    try:
+        raw = (await llm.generate_text(prompt)).strip()
+        log("plan", f"LLM output: {raw}")
+        perception, plan = parse_fused_response(raw, user_input)
+        return perception, plan
+
+    except Exception as e:
+        log("plan", f"⚠️ Fused planning failed: {e}")
+        return perception, "FINAL_ANSWER: [unknown]"
+
+
+def parse_fused_response(raw: str, user_input: str) -> Tuple[PerceptionResult, str]:
+    """Splits a fused INTENT/ENTITIES/TOOL_HINT/<plan> response into its parts."""
+    fields = {}
+    for line in raw.splitlines():
+        line = line.strip().strip("`")
+        if line.startswith("FUNCTION_CALL:") or line.startswith("FINAL_ANSWER:"):
+            break
+        match = re.match(r"^(INTENT|ENTITIES|TOOL_HINT):\s*(.*)$", line)
+        if match:
+            fields[match.group(1)] = match.group(2).strip()
+
+    entities_raw = fields.get("ENTITIES", "")
+    try:
+        entities = json.loads(entities_raw) if entities_raw.startswith("[") else None
+    except json.JSONDecodeError:
+        entities = None
+    if not isinstance(entities, list):
+        entities = [e.strip().strip('"\'') for e in entities_raw.strip("[]").split(",") if e.strip()]
+
+    tool_hint = fields.get("TOOL_HINT")
+    if tool_hint and tool_hint.lower() in ("none", "null", ""):
+        tool_hint = None
+
+    plan = extract_plan_lines(raw)
+    perception = PerceptionResult(
+        user_input=user_input,
+        intent=fields.get("INTENT") or None,
+        entities=[str(e) for e in entities],
+        tool_hint=tool_hint
+    )
+    return perception, plan
+
+
+def extract_plan_lines(raw: str) -> str:
+    """
+    Returns the plan part of an LLM response: the first FINAL_ANSWER line, or
+    all consecutive FUNCTION_CALL lines (newline-joined) if a call comes first.
+    """
+    calls = []
+    for line in raw.splitlines():
+        line = line.strip().strip("`")
+        if line.startswith("FUNCTION_CALL:"):
+            calls.append(line)
+        elif line.startswith("FINAL_ANSWER:"):
+            if not calls:
+                return line
+            break
+        elif calls and line:
+            break
+
+    return "\n".join(calls) if calls else "FINAL_ANSWER: [unknown]"
@@ -0,0 +1,433 @@
+# modules/doc_store.py → Document Chunk Store
+# Role: SQLite home for the documents server's chunk metadata and ingestion bookkeeping.
+
+# Layout:
+
+# documents  → one row per ingested file (file hash, mtime + size for a cheap unchanged check,
+#              doc_num of its vector id range, next local id)
+
+# chunks     → one row per unique indexed chunk, keyed by FAISS vector id (text, chunk hash, the
+#              document that first produced it, float32 vector bytes so the index can be rebuilt
+#              or retrained without re-embedding, and the snapshot versions that added / removed it)
+
+# chunk_sources → every (document, chunk_id) a chunk vector stands for: boilerplate repeated across
+#              documents is embedded and indexed once and lists all its sources. A source's
+#              chunk_hash is the hash of its own text (a near-duplicate maps onto another chunk)
+
+# tombstones → vector ids whose rows are gone but whose vectors still await remove_ids
+
+# meta       → counters (next doc_num, last version written)
+
+# chunks_fts → FTS5 inverted index over chunk text (BM25 ranking), kept in sync by triggers
+
+# Writes stay in an open transaction until commit(), so ingestion can batch many documents per commit.
+# Searches read only the rows of the ids FAISS (or BM25) returned.
+
+# Rows are versioned like the index snapshots (modules/snapshots.py): a row written for version v
+# gets added_version = v, and removing it only sets removed_version = v. A search pinned to
+# version p sees rows with added_version <= p < removed_version, i.e. exactly the rows that
+# match its index, even while the writer is changing later versions. purge() drops removed
+# rows once no reader can see them.
+
+# Used by: mcp_server_2.py
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class DocStore:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                name TEXT PRIMARY KEY,
+                hash TEXT,
+                doc_num INTEGER NOT NULL UNIQUE,
+                next_local INTEGER NOT NULL DEFAULT 0,
+                mtime INTEGER,
+                size INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                doc TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                chunk TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                vector BLOB,
+                added_version INTEGER NOT NULL DEFAULT 0,
+                removed_version INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS chunks_doc ON chunks(doc);
+            CREATE TABLE IF NOT EXISTS chunk_sources (
+                id INTEGER NOT NULL,
+                doc TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                added_version INTEGER NOT NULL DEFAULT 0,
+                removed_version INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS chunk_sources_id ON chunk_sources(id);
+            CREATE INDEX IF NOT EXISTS chunk_sources_hash ON chunk_sources(chunk_hash) WHERE removed_version IS NULL;
+            CREATE UNIQUE INDEX IF NOT EXISTS chunk_sources_doc ON chunk_sources(doc, chunk_hash)
+                WHERE removed_version IS NULL;
+            CREATE TABLE IF NOT EXISTS tombstones (id INTEGER PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+        if "mtime" not in {r["name"] for r in self._db.execute("PRAGMA table_info(documents)")}:
+            self._db.execute("ALTER TABLE documents ADD COLUMN mtime INTEGER")
+            self._db.execute("ALTER TABLE documents ADD COLUMN size INTEGER")
+        columns = {r["name"] for r in self._db.execute("PRAGMA table_info(chunks)")}
+        if "vector" not in columns:
+            self._db.execute("ALTER TABLE chunks ADD COLUMN vector BLOB")
+        if "added_version" not in columns:
+            # Rows from before snapshots belong to version 0, the legacy index.bin
+            self._db.execute("ALTER TABLE chunks ADD COLUMN added_version INTEGER NOT NULL DEFAULT 0")
+            self._db.execute("ALTER TABLE chunks ADD COLUMN removed_version INTEGER")
+        if not self._db.execute("SELECT 1 FROM chunk_sources LIMIT 1").fetchone():
+            # Chunks from before cross-document dedup have exactly one source, their own document
+            self._db.execute(
+                "INSERT INTO chunk_sources (id, doc, chunk_hash, chunk_id, added_version, removed_version) "
+                "SELECT id, doc, chunk_hash, chunk_id, added_version, removed_version FROM chunks"
+            )
+        self._create_fts()
+        self._db.commit()
+
+    def _create_fts(self):
+        had_fts = self._db.execute("SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'").fetchone()
+        self._db.executescript(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                chunk, content='chunks', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts (rowid, chunk) VALUES (new.id, new.chunk);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, chunk) VALUES ('delete', old.id, old.chunk);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_update AFTER UPDATE OF chunk ON chunks
+            WHEN old.chunk IS NOT new.chunk BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, chunk) VALUES ('delete', old.id, old.chunk);
+                INSERT INTO chunks_fts (rowid, chunk) VALUES (new.id, new.chunk);
+            END;
+            """
+        )
+        if not had_fts:
+            # Store created before the inverted index existed: index the chunks already there
+            self._db.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+
+    # --- documents ---
+
+    def documents(self) -> Dict[str, dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT name, hash, doc_num, next_local, mtime, size FROM documents").fetchall()
+        return {r["name"]: dict(r) for r in rows}
+
+    def document(self, name: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT name, hash, doc_num, next_local, mtime, size FROM documents WHERE name = ?", (name,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def add_document(self, name: str, doc_num: Optional[int] = None) -> dict:
+        """Registers a new document with the next free id range (or the given one, when importing)."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'next_doc'").fetchone()
+            next_doc = int(row["value"]) if row else 0
+            if doc_num is None:
+                doc_num = next_doc
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_doc', ?)", (str(max(next_doc, doc_num + 1)),)
+            )
+            self._db.execute(
+                "INSERT INTO documents (name, hash, doc_num, next_local) VALUES (?, NULL, ?, 0)", (name, doc_num)
+            )
+        return {"name": name, "hash": None, "doc_num": doc_num, "next_local": 0, "mtime": None, "size": None}
+
+    def update_document(self, entry: dict):
+        with self._lock:
+            self._db.execute(
+                "UPDATE documents SET hash = ?, next_local = ?, mtime = ?, size = ? WHERE name = ?",
+                (entry["hash"], entry["next_local"], entry.get("mtime"), entry.get("size"), entry["name"])
+            )
+
+    def touch_document(self, name: str, mtime: int, size: int):
+        """Records a new mtime / size for a file whose content hash did not change."""
+        with self._lock:
+            self._db.execute("UPDATE documents SET mtime = ?, size = ? WHERE name = ?", (mtime, size, name))
+
+    def delete_document(self, name: str, version: int = 0) -> List[int]:
+        """Deletes a document and its chunk sources as of version; returns the vector ids no longer used by any document."""
+        with self._lock:
+            orphans = self.remove_sources(name, list(self.chunk_ids(name)), version)
+            self._db.execute("DELETE FROM documents WHERE name = ?", (name,))
+        return orphans
+
+    def invalidate_documents(self, names: Iterable[str]):
+        """Forces re-ingestion of documents (their file hash no longer matches)."""
+        with self._lock:
+            self._db.executemany("UPDATE documents SET hash = NULL WHERE name = ?", [(n,) for n in names])
+
+    # --- chunks ---
+
+    def chunk_ids(self, doc: str) -> Dict[str, int]:
+        """chunk hash → vector id of one document's live chunks."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT chunk_hash, id FROM chunk_sources WHERE doc = ? AND removed_version IS NULL", (doc,)
+            ).fetchall()
+        return {r["chunk_hash"]: r["id"] for r in rows}
+
+    def find_chunks(self, hashes: Iterable[str]) -> Dict[str, int]:
+        """chunk hash → vector id of live chunks from any document with these texts."""
+        hashes, result = list(dict.fromkeys(hashes)), {}
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                result.update(self._db.execute(
+                    f"SELECT chunk_hash, id FROM chunk_sources WHERE chunk_hash IN ({placeholders}) "
+                    "AND removed_version IS NULL", batch
+                ).fetchall())
+        return result
+
+    def reserved_ids(self, doc: str) -> set:
+        """Every id from a document's range still in the table, including removed rows older readers may see."""
+        with self._lock:
+            return {r["id"] for r in self._db.execute("SELECT id FROM chunks WHERE doc = ?", (doc,))}
+
+    def all_ids(self) -> Dict[int, str]:
+        """vector id → first document of live chunks, for reconciling with the FAISS index."""
+        with self._lock:
+            return {r["id"]: r["doc"] for r in self._db.execute(
+                "SELECT id, doc FROM chunks WHERE removed_version IS NULL"
+            )}
+
+    def put_chunks(self, rows: List[dict], version: int = 0):
+        """Inserts new chunk rows (as of version) together with their first source; a row's "vector" is float32 bytes or None."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO chunks (id, doc, chunk_hash, chunk, chunk_id, vector, added_version) "
+                "VALUES (:id, :doc, :chunk_hash, :chunk, :chunk_id, :vector, :added_version)",
+                [{"vector": None, **row, "added_version": version} for row in rows]
+            )
+        self.put_sources(rows, version)
+
+    def put_sources(self, rows: List[dict], version: int = 0):
+        """Upserts (id, doc, chunk_hash, chunk_id) sources; an existing source only gets its new chunk_id."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO chunk_sources (id, doc, chunk_hash, chunk_id, added_version) "
+                "VALUES (:id, :doc, :chunk_hash, :chunk_id, :added_version) "
+                "ON CONFLICT(doc, chunk_hash) WHERE removed_version IS NULL DO UPDATE SET chunk_id = excluded.chunk_id",
+                [{"id": row["id"], "doc": row["doc"], "chunk_hash": row["chunk_hash"], "chunk_id": row["chunk_id"],
+                  "added_version": version} for row in rows]
+            )
+
+    def remove_sources(self, doc: str, hashes: List[str], version: int = 0) -> List[int]:
+        """Removes a document's sources as of version; returns the vector ids left without any source (their chunks are removed too)."""
+        with self._lock:
+            ids = []
+            for start in range(0, len(hashes), 500):
+                batch = list(hashes[start:start + 500])
+                placeholders = ",".join("?" * len(batch))
+                ids += [r["id"] for r in self._db.execute(
+                    f"SELECT id FROM chunk_sources WHERE doc = ? AND chunk_hash IN ({placeholders}) "
+                    "AND removed_version IS NULL", [doc] + batch
+                )]
+            self._db.executemany(
+                "UPDATE chunk_sources SET removed_version = ? WHERE doc = ? AND chunk_hash = ? AND removed_version IS NULL",
+                [(version, doc, h) for h in hashes]
+            )
+            orphans = [i for i in dict.fromkeys(ids) if not self._db.execute(
+                "SELECT 1 FROM chunk_sources WHERE id = ? AND removed_version IS NULL", (i,)
+            ).fetchone()]
+            self._db.executemany(
+                "UPDATE chunks SET removed_version = ? WHERE id = ? AND removed_version IS NULL",
+                [(version, i) for i in orphans]
+            )
+        return orphans
+
+    def delete_chunks(self, ids: Iterable[int], version: int = 0) -> set:
+        """Removes chunks and all their sources as of version; returns the documents that lost a chunk."""
+        ids = list(ids)
+        with self._lock:
+            docs = set()
+            for i in ids:
+                docs.update(r["doc"] for r in self._db.execute(
+                    "SELECT doc FROM chunk_sources WHERE id = ? AND removed_version IS NULL", (i,)
+                ))
+            self._db.executemany(
+                "UPDATE chunk_sources SET removed_version = ? WHERE id = ? AND removed_version IS NULL",
+                [(version, i) for i in ids]
+            )
+            self._db.executemany(
+                "UPDATE chunks SET removed_version = ? WHERE id = ? AND removed_version IS NULL",
+                [(version, i) for i in ids]
+            )
+        return docs
+
+    def purge(self, version: int) -> int:
+        """Drops rows removed at or before version (no reader at version or later can see them)."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM chunk_sources WHERE removed_version IS NOT NULL AND removed_version <= ?", (version,)
+            )
+            return self._db.execute(
+                "DELETE FROM chunks WHERE removed_version IS NOT NULL AND removed_version <= ?", (version,)
+            ).rowcount
+
+    def get_chunks(self, ids: List[int], version: Optional[int] = None) -> Dict[int, dict]:
+        """
+        Rows for just these vector ids (e.g. a search's top-k), as seen by version (live rows if None).
+        "sources" lists every (doc, chunk_id) of the chunk; "doc" / "chunk_id" are the first of them.
+        """
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        visible, params = self._visible(version)
+        visible_sources, _ = self._visible(version, "chunk_sources")
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, chunk FROM chunks WHERE id IN ({placeholders}) AND {visible}", list(ids) + params
+            ).fetchall()
+            sources = self._db.execute(
+                f"SELECT id, doc, chunk_id FROM chunk_sources WHERE id IN ({placeholders}) "
+                f"AND {visible_sources} ORDER BY added_version, rowid",
+                list(ids) + params
+            ).fetchall()
+        result = {r["id"]: {"id": r["id"], "chunk": r["chunk"], "sources": []} for r in rows}
+        for source in sources:
+            if source["id"] in result:
+                result[source["id"]]["sources"].append({"doc": source["doc"], "chunk_id": source["chunk_id"]})
+        for vector_id in [i for i, row in result.items() if not row["sources"]]:
+            del result[vector_id]
+        for row in result.values():
+            row.update(row["sources"][0])
+        return result
+
+    @staticmethod
+    def _visible(version: Optional[int], table: str = "chunks") -> tuple:
+        """WHERE clause (and its parameters) for the rows of table that belong to a version."""
+        if version is None:
+            return f"{table}.removed_version IS NULL", []
+        return (
+            f"{table}.added_version <= ? AND ({table}.removed_version IS NULL OR {table}.removed_version > ?)",
+            [version, version]
+        )
+
+    # --- vectors ---
+
+    def ids_without_vector(self) -> List[int]:
+        with self._lock:
+            return [r[0] for r in self._db.execute(
+                "SELECT id FROM chunks WHERE vector IS NULL AND removed_version IS NULL"
+            )]
+
+    def get_vectors(self, ids: List[int]) -> Dict[int, bytes]:
+        """Stored vector bytes for these ids (ids without a vector are left out)."""
+        result = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = list(ids[start:start + 500])
+                placeholders = ",".join("?" * len(batch))
+                result.update(self._db.execute(
+                    f"SELECT id, vector FROM chunks WHERE id IN ({placeholders}) AND vector IS NOT NULL", batch
+                ).fetchall())
+        return result
+
+    def set_vectors(self, pairs: Iterable[tuple]):
+        """(vector id, float32 bytes) pairs."""
+        with self._lock:
+            self._db.executemany("UPDATE chunks SET vector = ? WHERE id = ?", [(v, i) for i, v in pairs])
+
+    def iter_vectors(self, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        """All stored (id, vector bytes) pairs of live chunks in id order, batch_size at a time."""
+        last = -1
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, vector FROM chunks WHERE id > ? AND vector IS NOT NULL "
+                    "AND removed_version IS NULL ORDER BY id LIMIT ?",
+                    (last, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield [(r[0], r[1]) for r in rows]
+            last = rows[-1][0]
+
+    def sample_vectors(self, n: int) -> List[bytes]:
+        with self._lock:
+            return [r[0] for r in self._db.execute(
+                "SELECT vector FROM chunks WHERE vector IS NOT NULL AND removed_version IS NULL "
+                "ORDER BY RANDOM() LIMIT ?", (n,)
+            )]
+
+    def bm25_search(self, query: str, limit: int, version: Optional[int] = None) -> List[int]:
+        """Vector ids of the best BM25 matches for any of the query's terms, best first."""
+        terms = list(dict.fromkeys(re.findall(r"\w+", query.lower())))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in terms)
+        visible, params = self._visible(version)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT chunks_fts.rowid FROM chunks_fts JOIN chunks ON chunks.id = chunks_fts.rowid "
+                f"WHERE chunks_fts MATCH ? AND {visible} ORDER BY chunks_fts.rank LIMIT ?",
+                [match] + params + [limit]
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def count(self) -> int:
+        """Number of live chunks."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunks WHERE removed_version IS NULL").fetchone()[0]
+
+    # --- versions ---
+
+    def version(self) -> int:
+        """Highest snapshot version rows have been written for."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row["value"]) if row else 0
+
+    def set_version(self, version: int):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(version),))
+
+    # --- tombstones ---
+
+    def tombstones(self) -> set:
+        with self._lock:
+            return {r["id"] for r in self._db.execute("SELECT id FROM tombstones")}
+
+    def set_tombstones(self, ids: Iterable[int]):
+        with self._lock:
+            self._db.execute("DELETE FROM tombstones")
+            self._db.executemany("INSERT INTO tombstones (id) VALUES (?)", [(i,) for i in ids])
+
+    # --- transactions ---
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def rollback(self):
+        with self._lock:
+            self._db.rollback()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,142 @@
+# modules/doc_watcher.py → Documents Folder Watcher
+# Role: Notice files added, changed or removed in documents/ while the server runs and hand the
+# affected paths to incremental indexing in debounced batches.
+
+# Backends:
+
+# watchdog → OS notifications (inotify on Linux, FSEvents on macOS, ReadDirectoryChangesW on
+#            Windows); used when the optional watchdog package is installed
+
+# polling  → os.scandir every poll_interval seconds, comparing (mtime, size) per file
+
+# Events are collected until the folder has been quiet for `debounce` seconds, so a large copy or
+# an editor's save-rename-save triggers one indexing run instead of dozens.
+
+# Used by: mcp_server_2.py
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler, Observer = object, None
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "DocumentWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type in ("opened", "closed_no_write"):
+            return
+        self.watcher.notify(event.src_path)
+        if getattr(event, "dest_path", ""):
+            self.watcher.notify(event.dest_path)
+
+
+class DocumentWatcher:
+    def __init__(
+        self,
+        folder: Path,
+        on_change: Callable[[Set[Path]], None],
+        debounce: float = 2.0,
+        poll_interval: float = 5.0,
+        backend: str = "auto",
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        if backend not in ("auto", "watchdog", "polling"):
+            raise ValueError(f"Unknown watcher backend: {backend}")
+        if backend == "watchdog" and Observer is None:
+            raise ImportError("watcher backend 'watchdog' needs the watchdog package")
+        self.folder = Path(folder).resolve()
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        if backend == "auto":
+            backend = "watchdog" if Observer is not None else "polling"
+        self.backend = backend
+        self.on_error = on_error
+        self._cond = threading.Condition()
+        self._pending: Set[Path] = set()
+        self._last_event = 0.0
+        self._stopped = threading.Event()
+        self._threads = []
+        self._observer = None
+
+    def notify(self, path):
+        """Records a changed path (only direct children of the folder count)."""
+        path = Path(os.fsdecode(path)).resolve()
+        if path.parent != self.folder:
+            return
+        with self._cond:
+            self._pending.add(path)
+            self._last_event = time.monotonic()
+            self._cond.notify()
+
+    def start(self):
+        if self.backend == "watchdog":
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), str(self.folder), recursive=False)
+            self._observer.start()
+        else:
+            self._threads.append(threading.Thread(target=self._poll, name="doc-watcher-poll", daemon=True))
+        self._threads.append(threading.Thread(target=self._dispatch, name="doc-watcher", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        for thread in self._threads:
+            thread.join()
+
+    def _scan(self) -> Dict[Path, tuple]:
+        snapshot = {}
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        snapshot[Path(entry.path).resolve()] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def _poll(self):
+        previous = self._scan()
+        while not self._stopped.wait(self.poll_interval):
+            current = self._scan()
+            for path in previous.keys() | current.keys():
+                if previous.get(path) != current.get(path):
+                    self.notify(path)
+            previous = current
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped.is_set():
+                    self._cond.wait()
+                # Wait for the folder to go quiet before handing over the batch
+                while not self._stopped.is_set():
+                    remaining = self._last_event + self.debounce - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopped.is_set():
+                    return
+                batch, self._pending = self._pending, set()
+            try:
+                self.on_change(batch)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
@@ -0,0 +1,150 @@
+# modules/embedding.py → Batched Embedding Client
+# Role: Turn many texts into vectors with as few HTTP round trips as possible.
+
+# Responsibilities:
+
+# Send chunk batches to Ollama's /api/embed endpoint (one request per batch)
+
+# Keep several batches in flight on a small thread pool
+
+# Adapt the batch size so each request stays near a target latency
+
+# Fall back to one-text-per-request /api/embeddings on servers without /api/embed
+
+# Look texts up in an optional EmbeddingCache first; only misses are sent
+
+# Used by: mcp_server_2.py (document ingestion and search)
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Optional
+
+import numpy as np
+import requests
+
+from modules.embedding_cache import EmbeddingCache
+
+EMBED_URL = "http://localhost:11434/api/embeddings"
+EMBED_BATCH_URL = "http://localhost:11434/api/embed"
+
+
+class BatchEmbedder:
+    def __init__(
+        self,
+        model: str = "nomic-embed-text",
+        batch_url: str = EMBED_BATCH_URL,
+        single_url: str = EMBED_URL,
+        batch_size: int = 32,
+        min_batch_size: int = 4,
+        max_batch_size: int = 256,
+        max_in_flight: int = 2,
+        target_batch_latency: float = 2.0,
+        timeout: float = 120,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.model = model
+        self.batch_url = batch_url
+        self.single_url = single_url
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.max_in_flight = max(1, max_in_flight)
+        self.target_batch_latency = target_batch_latency
+        self.timeout = timeout
+        self.cache = cache
+        self.batch_supported = True
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        # requests.Session is not thread-safe; one keep-alive session per thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _post_batch(self, texts: List[str]) -> np.ndarray:
+        if self.batch_supported:
+            response = self._session().post(
+                self.batch_url, json={"model": self.model, "input": texts}, timeout=self.timeout
+            )
+            if response.status_code != 404:
+                response.raise_for_status()
+                return np.array(response.json()["embeddings"], dtype=np.float32)
+            self.batch_supported = False  # older Ollama: no /api/embed
+
+        return np.stack([self._post_single(t) for t in texts])
+
+    def _post_single(self, text: str) -> np.ndarray:
+        response = self._session().post(
+            self.single_url, json={"model": self.model, "prompt": text}, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return np.array(response.json()["embedding"], dtype=np.float32)
+
+    def _timed_batch(self, texts: List[str]):
+        start = time.perf_counter()
+        vectors = self._post_batch(texts)
+        return vectors, time.perf_counter() - start
+
+    def _adapt(self, size: int, latency: float):
+        """Grow the batch while requests are fast, shrink it when they get slow."""
+        with self._lock:
+            if latency < self.target_batch_latency / 2 and size >= self.batch_size:
+                self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+            elif latency > self.target_batch_latency:
+                self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+    def _cache_keys(self, texts: List[str]) -> List[str]:
+        # The endpoint in use is part of the key: the two return differently scaled vectors
+        endpoint = self.batch_url if self.batch_supported else self.single_url
+        return [EmbeddingCache.make_key(self.model, text, endpoint) for text in texts]
+
+    def embed_many(self, texts: List[str], progress: Optional[callable] = None) -> np.ndarray:
+        """Embeds texts in order. progress(n) is called as each batch of n finishes."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        if self.cache is None:
+            return self._embed_uncached(texts, progress)
+
+        keys = self._cache_keys(texts)
+        cached = self.cache.get_many(keys)
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in cached))
+        if progress and len(missing) < len(texts):
+            progress(len(texts) - len(missing))
+        if missing:
+            vectors = self._embed_uncached(missing, progress)
+            fresh = dict(zip(self._cache_keys(missing), vectors))
+            self.cache.put_many(fresh)
+            by_text = dict(zip(missing, vectors))
+            cached.update((key, by_text[text]) for text, key in zip(texts, keys) if key not in cached)
+        return np.stack([cached[key] for key in keys])
+
+    def _embed_uncached(self, texts: List[str], progress: Optional[callable] = None) -> np.ndarray:
+        if len(texts) == 1:
+            return self._post_batch(texts)
+
+        results = {}
+        pending = {}
+        next_start = 0
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            while next_start < len(texts) or pending:
+                while next_start < len(texts) and len(pending) < self.max_in_flight:
+                    size = self.batch_size
+                    batch = texts[next_start:next_start + size]
+                    pending[pool.submit(self._timed_batch, batch)] = (next_start, len(batch))
+                    next_start += len(batch)
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, size = pending.pop(future)
+                    vectors, latency = future.result()
+                    results[start] = vectors
+                    self._adapt(size, latency)
+                    if progress:
+                        progress(size)
+
+        return np.concatenate([results[k] for k in sorted(results)])
@@ -0,0 +1,223 @@
+# modules/embedding_cache.py → Persistent Embedding Cache
+# Role: Reuse embeddings of texts seen before, across runs and across processes.
+
+# Layout (one directory):
+
+# vectors-<dim>.f32 → memory-mapped float32 matrix, one row (slot) per cached vector; grows in
+#                     blocks, so a lookup touches only the pages of the rows it reads
+
+# index.sqlite      → key → (dim, slot, last access); free slots; next slot and entry count per dim
+
+# Keys are sha256(model + endpoint + text): /api/embed and /api/embeddings return differently
+# scaled vectors, so the endpoint is part of the key. Beyond max_entries vectors per dim the
+# least recently used are evicted. Their slots are reused only after a grace period, so a
+# reader in another process never sees a slot rewritten under it.
+
+# Used by: modules/embedding.py (documents server), modules/memory.py (agent memory)
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+GROW_ROWS = 4096  # vectors file growth step
+
+
+class EmbeddingCache:
+    _shared: Dict[str, "EmbeddingCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str = "cache/embeddings", max_entries: int = 500_000, reuse_after: float = 60.0):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.reuse_after = reuse_after
+        self._lock = threading.Lock()
+        self._maps: Dict[int, np.memmap] = {}
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = sqlite3.connect(str(self.path / "index.sqlite"), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        had_counts = self._db.execute("SELECT 1 FROM sqlite_master WHERE name = 'counts'").fetchone()
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                slot INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_lru ON entries(dim, accessed);
+            CREATE TABLE IF NOT EXISTS free_slots (dim INTEGER NOT NULL, slot INTEGER NOT NULL, freed REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS free_slots_dim ON free_slots(dim, freed);
+            CREATE TABLE IF NOT EXISTS next_slot (dim INTEGER PRIMARY KEY, slot INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS counts (dim INTEGER PRIMARY KEY, entries INTEGER NOT NULL);
+            """
+        )
+        if not had_counts:
+            # Cache created before entry counts were kept: count once
+            self._db.execute("INSERT OR REPLACE INTO counts (dim, entries) SELECT dim, COUNT(*) FROM entries GROUP BY dim")
+        self._db.commit()
+
+    @classmethod
+    def shared(cls, path: str = "cache/embeddings", **options) -> "EmbeddingCache":
+        """One instance per cache directory in this process (agent contexts come and go per query)."""
+        key = str(Path(path).resolve())
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(path, **options)
+            return cls._shared[key]
+
+    @staticmethod
+    def make_key(model: str, text: str, endpoint: str = "") -> str:
+        digest = hashlib.sha256(f"{model}\0{endpoint}\0".encode("utf-8"))
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    # --- vectors file ---
+
+    def _file(self, dim: int) -> Path:
+        return self.path / f"vectors-{dim}.f32"
+
+    def _map(self, dim: int, rows: int) -> np.memmap:
+        """Mapping of the dim's vectors file covering at least rows rows (grown / remapped as needed)."""
+        current = self._maps.get(dim)
+        if current is not None and current.shape[0] >= rows:
+            return current
+        file = self._file(dim)
+        file.touch()
+        size = file.stat().st_size // (4 * dim)
+        if size < rows:
+            size = -(-rows // GROW_ROWS) * GROW_ROWS
+            with open(file, "r+b") as f:
+                f.truncate(size * 4 * dim)
+        self._maps[dim] = np.memmap(file, dtype=np.float32, mode="r+", shape=(size, dim))
+        return self._maps[dim]
+
+    # --- lookups ---
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Cached vectors (copies) for whichever of keys are present."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for key, dim, slot in self._db.execute(
+                    f"SELECT key, dim, slot FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall():
+                    found[key] = np.array(self._map(dim, slot + 1)[slot])
+                    self._touched[key] = now
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+            if len(self._touched) >= 256:
+                self._flush_touched()
+        return found
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self.get_many([key]).get(key)
+
+    def _flush_touched(self):
+        self._db.executemany("UPDATE entries SET accessed = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()])
+        self._db.commit()
+        self._touched.clear()
+
+    # --- inserts ---
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._flush_touched()
+            # One writer at a time across processes sharing the directory
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                counts: Dict[int, int] = {}  # dim → entries, read once per call and kept up to date here
+                existing = set()
+                keys = list(items)
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    existing.update(r[0] for r in self._db.execute(
+                        f"SELECT key FROM entries WHERE key IN ({placeholders})", batch
+                    ))
+                for key, vector in items.items():
+                    if key in existing:
+                        continue
+                    vector = np.asarray(vector, dtype=np.float32).ravel()
+                    slot = self._allocate(vector.shape[0], now, counts)
+                    self._map(vector.shape[0], slot + 1)[slot] = vector
+                    self._db.execute(
+                        "INSERT INTO entries (key, dim, slot, accessed) VALUES (?, ?, ?, ?)",
+                        (key, vector.shape[0], slot, now)
+                    )
+                    counts[vector.shape[0]] += 1
+                self._db.executemany("INSERT OR REPLACE INTO counts (dim, entries) VALUES (?, ?)", counts.items())
+                self._db.commit()
+            except Exception:
+                self._db.rollback()
+                raise
+
+    def put(self, key: str, vector: np.ndarray):
+        self.put_many({key: vector})
+
+    def _allocate(self, dim: int, now: float, counts: Dict[int, int]) -> int:
+        if dim not in counts:
+            row = self._db.execute("SELECT entries FROM counts WHERE dim = ?", (dim,)).fetchone()
+            counts[dim] = row[0] if row else 0
+        if counts[dim] >= self.max_entries:
+            # Evict the least recently used ~1% at once rather than one row per insert
+            victims = self._db.execute(
+                "SELECT key, slot FROM entries WHERE dim = ? ORDER BY accessed LIMIT ?",
+                (dim, max(1, self.max_entries // 100))
+            ).fetchall()
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+            self._db.executemany(
+                "INSERT INTO free_slots (dim, slot, freed) VALUES (?, ?, ?)", [(dim, s, now) for _, s in victims]
+            )
+            self.evictions += len(victims)
+            counts[dim] -= len(victims)
+
+        row = self._db.execute(
+            "SELECT rowid, slot FROM free_slots WHERE dim = ? AND freed <= ? ORDER BY freed LIMIT 1",
+            (dim, now - self.reuse_after)
+        ).fetchone()
+        if row:
+            self._db.execute("DELETE FROM free_slots WHERE rowid = ?", (row[0],))
+            return row[1]
+        row = self._db.execute("SELECT slot FROM next_slot WHERE dim = ?", (dim,)).fetchone()
+        slot = row[0] if row else 0
+        self._db.execute("INSERT OR REPLACE INTO next_slot (dim, slot) VALUES (?, ?)", (dim, slot + 1))
+        return slot
+
+    # --- maintenance ---
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            for mapping in self._maps.values():
+                mapping.flush()
+            self._maps.clear()
+            self._db.close()
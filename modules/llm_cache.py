@@ -0,0 +1,186 @@
+# modules/llm_cache.py → LLM Response Cache
+# Role: Reuse LLM responses for repeated prompts (perception / planning).
+
+# Layout:
+
+# In-memory LRU (hot entries) in front of an SQLite store on disk
+
+# Keys are sha256(model + prompt + generation params)
+
+# Disk entries expire after ttl_seconds; the least recently used are evicted
+# once the store exceeds max_entries or max_mb
+
+# Hits only record their access time in memory; the times are written in one
+# batch every FLUSH_EVERY hits and before each eviction, so a hit never commits
+
+# Used by: modules/model_manager.py
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+FLUSH_EVERY = 64  # buffered access times per batched UPDATE
+
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        path: str = "cache/llm_responses.sqlite",
+        ttl_seconds: float = 24 * 3600,
+        max_entries: int = 5000,
+        max_mb: float = 50,
+        memory_entries: int = 256,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.memory_entries = memory_entries
+
+        self._memory: "OrderedDict[str, tuple[str, float]]" = OrderedDict()  # key → (response, created)
+        self._touched: Dict[str, float] = {}  # key → access time not yet written
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                size INTEGER NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps({"model": model, "params": params or {}}, sort_keys=True)
+        digest = hashlib.sha256(payload.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - created > self.ttl_seconds
+
+    def _remember(self, key: str, response: str, created: float):
+        self._memory[key] = (response, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self._touch(key, now)
+                self.hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                # Expired rows are deleted by the next put's eviction pass
+                self.misses += 1
+                return None
+
+            self._remember(key, row[0], row[1])
+            self._touch(key, now)
+            self.hits += 1
+            self.disk_hits += 1
+            return row[0]
+
+    def _touch(self, key: str, now: float):
+        self._touched[key] = now
+        if len(self._touched) >= FLUSH_EVERY:
+            self._flush_touched()
+            self._db.commit()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE responses SET accessed = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            self._touched.pop(key, None)
+            self._flush_touched()  # eviction below needs current access times
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, response, now, now, len(response.encode("utf-8")))
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float):
+        if self.ttl_seconds:
+            cur = self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            self.evictions += cur.rowcount
+
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Drop least recently used rows until both limits hold
+        removed = 0
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            count -= 1
+            total -= size
+            removed += 1
+        self.evictions += removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "memory_hits": self.hits - self.disk_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "disk_entries": entries,
+            "disk_bytes": total,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+            self._db.close()
@@ -5,7 +5,8 @@
 
 # Store & retrieve MemoryItem objects
 
-# Use local embedding server (e.g., Ollama) to vectorize input
+# Use local embedding server (e.g., Ollama) to vectorize input, reusing cached vectors when an
+# EmbeddingCache is given
 
 # Filter memory based on type/tags/session
 
@@ -28,6 +29,8 @@ import requests
 import numpy as np
 import faiss
 
+from modules.embedding_cache import EmbeddingCache
+
 
 class MemoryItem(BaseModel):
     text: str
@@ -40,20 +43,30 @@ class MemoryItem(BaseModel):
 
 
 class MemoryManager:
-    def __init__(self, embedding_model_url: str, model_name: str = "nomic-embed-text"):
+    def __init__(self, embedding_model_url: str, model_name: str = "nomic-embed-text", cache: Optional[EmbeddingCache] = None):
         self.embedding_model_url = embedding_model_url
         self.model_name = model_name
+        self.cache = cache
         self.index: Optional[faiss.IndexFlatL2] = None
         self.data: List[MemoryItem] = []
         self.embeddings: List[np.ndarray] = []
 
     def _get_embedding(self, text: str) -> np.ndarray:
+        key = EmbeddingCache.make_key(self.model_name, text, self.embedding_model_url)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
         response = requests.post(
             self.embedding_model_url,
             json={"model": self.model_name, "prompt": text}
         )
         response.raise_for_status()
-        return np.array(response.json()["embedding"], dtype=np.float32)
+        embedding = np.array(response.json()["embedding"], dtype=np.float32)
+        if self.cache is not None:
+            self.cache.put(key, embedding)
+        return embedding
 
     def add(self, item: MemoryItem):
         embedding = self._get_embedding(item.text)
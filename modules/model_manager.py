@@ -1,10 +1,14 @@
 import os
 import json
 import yaml
-import requests
+import asyncio
+import threading
+import httpx
 from pathlib import Path
+from typing import Optional
 from google import genai
 from dotenv import load_dotenv
+from modules.llm_cache import LLMResponseCache
 
 load_dotenv()
 
@@ -12,33 +16,106 @@ ROOT = Path(__file__).parent.parent
 MODELS_JSON = ROOT / "config" / "models.json"
 PROFILE_YAML = ROOT / "config" / "profiles.yaml"
 
+DEFAULT_TIMEOUT = 60  # seconds per LLM call
+
 class ModelManager:
-    def __init__(self):
+    # One pooled keep-alive HTTP client shared by every ModelManager in the process
+    _http: Optional[httpx.AsyncClient] = None
+    _http_loop: Optional[asyncio.AbstractEventLoop] = None
+    # Response cache shared the same way, opened by the first call that uses it
+    _cache: Optional[LLMResponseCache] = None
+    _cache_lock = threading.Lock()
+
+    def __init__(self, model_key: Optional[str] = None):
         self.config = json.loads(MODELS_JSON.read_text())
         self.profile = yaml.safe_load(PROFILE_YAML.read_text())
 
-        self.text_model_key = self.profile["llm"]["text_generation"]
+        self.text_model_key = model_key or self.profile["llm"]["text_generation"]
         self.model_info = self.config["models"][self.text_model_key]
         self.model_type = self.model_info["type"]
+        self.timeout = self.model_info.get("timeout", self.profile["llm"].get("timeout", DEFAULT_TIMEOUT))
+        self.generation_params = self.model_info.get("params", {})
 
         # ✅ Gemini initialization (your style)
         if self.model_type == "gemini":
             api_key = os.getenv("GEMINI_API_KEY")
             self.client = genai.Client(api_key=api_key)
 
-    async def generate_text(self, prompt: str) -> str:
+    @classmethod
+    def http_client(cls) -> httpx.AsyncClient:
+        """Shared httpx client, recreated if the event loop changed (e.g. a new asyncio.run)."""
+        loop = asyncio.get_running_loop()
+        if cls._http is None or cls._http.is_closed or cls._http_loop is not loop:
+            cls._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120),
+                timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=10)
+            )
+            cls._http_loop = loop
+        return cls._http
+
+    @classmethod
+    async def aclose(cls):
+        if cls._http is not None and not cls._http.is_closed:
+            await cls._http.aclose()
+        cls._http = None
+        cls._http_loop = None
+
+    def response_cache(self) -> Optional[LLMResponseCache]:
+        """Shared response cache, opened on first use (not per instance: modules build a default
+        ModelManager at import); None when disabled in profiles.yaml."""
+        cache_config = self.profile["llm"].get("cache", {})
+        if not cache_config.get("enabled", False):
+            return None
+        with ModelManager._cache_lock:
+            if ModelManager._cache is None:
+                ModelManager._cache = LLMResponseCache(
+                    path=str(ROOT / cache_config.get("path", "cache/llm_responses.sqlite")),
+                    ttl_seconds=cache_config.get("ttl_seconds", 24 * 3600),
+                    max_entries=cache_config.get("max_entries", 5000),
+                    max_mb=cache_config.get("max_mb", 50),
+                    memory_entries=cache_config.get("memory_entries", 256)
+                )
+            return ModelManager._cache
+
+    @classmethod
+    def cache_stats(cls) -> dict:
+        """Hit/miss counters of the shared response cache (empty if disabled)."""
+        return cls._cache.stats() if cls._cache else {}
+
+    async def generate_text(self, prompt: str, timeout: Optional[float] = None, use_cache: bool = True) -> str:
+        cache = self.response_cache() if use_cache else None
+        if cache:
+            key = cache.make_key(
+                f"{self.model_type}:{self.model_info['model']}", prompt, self.generation_params
+            )
+            # SQLite I/O runs off the event loop, so a cache lookup never stalls concurrent calls
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                return cached
+
+        text = await self._generate(prompt, timeout)
+        if cache and text:
+            await asyncio.to_thread(cache.put, key, text)
+        return text
+
+    async def _generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        timeout = timeout or self.timeout
         if self.model_type == "gemini":
-            return self._gemini_generate(prompt)
+            call = self._gemini_generate(prompt)
 
         elif self.model_type == "ollama":
-            return self._ollama_generate(prompt)
+            call = self._ollama_generate(prompt, timeout)
+
+        else:
+            raise NotImplementedError(f"Unsupported model type: {self.model_type}")
 
-        raise NotImplementedError(f"Unsupported model type: {self.model_type}")
+        return await asyncio.wait_for(call, timeout=timeout)
 
-    def _gemini_generate(self, prompt: str) -> str:
-        response = self.client.models.generate_content(
+    async def _gemini_generate(self, prompt: str) -> str:
+        response = await self.client.aio.models.generate_content(
             model=self.model_info["model"],
-            contents=prompt
+            contents=prompt,
+            config=self.generation_params or None
         )
 
         # ✅ Safely extract response text
@@ -50,10 +127,17 @@ class ModelManager:
             except Exception:
                 return str(response)
 
-    def _ollama_generate(self, prompt: str) -> str:
-        response = requests.post(
+    async def _ollama_generate(self, prompt: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+        # The shared client's default read timeout would otherwise cut off calls allowed to run longer
+        response = await self.http_client().post(
             self.model_info["url"]["generate"],
-            json={"model": self.model_info["model"], "prompt": prompt, "stream": False}
+            json={
+                "model": self.model_info["model"],
+                "prompt": prompt,
+                "stream": False,
+                **({"options": self.generation_params} if self.generation_params else {})
+            },
+            timeout=httpx.Timeout(timeout, connect=10)
         )
         response.raise_for_status()
         return response.json()["response"].strip()
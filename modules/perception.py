@@ -7,8 +7,8 @@ from dotenv import load_dotenv
 from modules.model_manager import ModelManager
 from modules.tools import summarize_tools
 
-model = ModelManager()
-tool_context = summarize_tools(model.get_all_tools()) if hasattr(model, "get_all_tools") else ""
+default_model = ModelManager()
+tool_context = summarize_tools(default_model.get_all_tools()) if hasattr(default_model, "get_all_tools") else ""
 
 
 class PerceptionResult(BaseModel):
@@ -18,7 +18,7 @@ class PerceptionResult(BaseModel):
     tool_hint: Optional[str] = None
 
 
-async def extract_perception(user_input: str) -> PerceptionResult:
+async def extract_perception(user_input: str, model: Optional[ModelManager] = None) -> PerceptionResult:
     """
     Uses LLMs to extract structured info:
     - intent: user’s high-level goal
@@ -43,7 +43,7 @@ Output only the dictionary on a single line. Do NOT wrap it in ```json or other
 """
 
     try:
-        response = await model.generate_text(prompt)
+        response = await (model or default_model).generate_text(prompt)
 
         # Clean up raw if wrapped in markdown-style ```json
         raw = response.strip()
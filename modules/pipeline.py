@@ -0,0 +1,123 @@
+# modules/pipeline.py → Streaming Stage Pipeline
+# Role: Run a chain of stages concurrently, connected by bounded queues.
+
+# Responsibilities:
+
+# Each stage runs fn(item) on its own pool of worker threads
+
+# Bounded queues between stages give back-pressure (a slow stage stalls the ones before it)
+
+# The sink runs in the caller's thread, so a single writer owns the output
+
+# A stage returning None drops the item; a stage raising reports it through on_error
+
+# If the items iterator itself raises, feeding stops, the items already fed are finished and
+# run_pipeline re-raises the error
+
+# Used by: mcp_server_2.py (document ingestion)
+
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+STOP = object()  # end-of-stream marker, one per downstream worker
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+
+def _put(q: queue.Queue, item: Any, cancelled: threading.Event) -> bool:
+    while not cancelled.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def run_pipeline(
+    items: Iterable[Any],
+    stages: List[Stage],
+    sink: Callable[[Any], None],
+    queue_size: int = 8,
+    on_error: Optional[Callable[[str, Any, Exception], None]] = None,
+) -> None:
+    """Streams items through stages into sink. Returns once every item has been sunk or dropped."""
+    for stage in stages:
+        stage.workers = max(1, stage.workers)
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in range(len(stages) + 1)]
+    cancelled = threading.Event()
+    threads = []
+    feed_error = []
+
+    def feed():
+        try:
+            for item in items:
+                if not _put(queues[0], item, cancelled):
+                    return
+        except Exception as e:
+            feed_error.append(e)
+        finally:
+            for _ in range(stages[0].workers):
+                _put(queues[0], STOP, cancelled)
+
+    def make_worker(i: int, stage: Stage, remaining: List[int], lock: threading.Lock):
+        inq, outq = queues[i], queues[i + 1]
+        downstream = stages[i + 1].workers if i + 1 < len(stages) else 1
+
+        def work():
+            while not cancelled.is_set():
+                try:
+                    item = inq.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is STOP:
+                    break
+                try:
+                    out = stage.fn(item)
+                except Exception as e:
+                    if on_error:
+                        on_error(stage.name, item, e)
+                    continue
+                if out is not None and not _put(outq, out, cancelled):
+                    return
+
+            # The last worker of a stage to finish closes the next stage
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(downstream):
+                    _put(outq, STOP, cancelled)
+
+        return work
+
+    threads.append(threading.Thread(target=feed, name="pipeline-feed", daemon=True))
+    for i, stage in enumerate(stages):
+        remaining, lock = [stage.workers], threading.Lock()
+        for n in range(stage.workers):
+            threads.append(threading.Thread(
+                target=make_worker(i, stage, remaining, lock), name=f"pipeline-{stage.name}-{n}", daemon=True
+            ))
+
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is STOP:
+                break
+            sink(item)
+    finally:
+        cancelled.set()
+        for t in threads:
+            t.join()
+    if feed_error:
+        raise feed_error[0]
@@ -0,0 +1,144 @@
+# modules/snapshots.py → Versioned Index Snapshots
+# Role: Let ingestion publish new FAISS indexes while searches keep a consistent view.
+
+# Layout (under the index directory):
+
+# versions/<v>/index.bin → immutable index of version v (written to a temp name, then renamed)
+
+# CURRENT.json           → manifest pointing at the published version; replaced atomically
+
+# Readers pin(): they get the current version number and its loaded index, and hold them for
+# the whole query. The writer publishes version v+1 and garbage-collects versions that are
+# neither current nor pinned. Chunk rows carry the same version numbers (see doc_store.py),
+# so a pinned reader sees exactly the rows that belong with its index.
+
+# Used by: mcp_server_2.py
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+LEGACY_INDEX = "index.bin"  # single in-place index from before snapshots
+
+
+@dataclass
+class Snapshot:
+    version: int
+    index: Any
+
+
+class SnapshotManager:
+    def __init__(self, root: Path, loader: Callable[[Path], Any]):
+        self.root = Path(root)
+        self.versions_dir = self.root / "versions"
+        self.manifest_path = self.root / "CURRENT.json"
+        self.loader = loader
+        self._lock = threading.RLock()
+        self._pins: Dict[int, int] = {}
+        self._loaded: Dict[int, Any] = {}
+        self._manifest_signature = None
+        self._manifest: Optional[dict] = None
+
+    # --- manifest ---
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            stat = self.manifest_path.stat()
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._manifest_signature:
+            self._manifest = json.loads(self.manifest_path.read_text())
+            self._manifest_signature = signature
+        return self._manifest
+
+    def current_version(self) -> int:
+        with self._lock:
+            manifest = self._read_manifest()
+        return manifest["version"] if manifest else 0
+
+    def index_path(self, version: int) -> Optional[Path]:
+        """Index file of a version; version 0 is the legacy in-place index.bin, if any."""
+        if version == 0:
+            path = self.root / LEGACY_INDEX
+            return path if path.exists() else None
+        return self.versions_dir / str(version) / "index.bin"
+
+    # --- writer ---
+
+    def publish(self, version: int, write_index: Callable[[Path], None]):
+        """Writes version's index via write_index(tmp_path) and points CURRENT.json at it."""
+        directory = self.versions_dir / str(version)
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / "index.bin.tmp"
+        write_index(tmp)
+        os.replace(tmp, directory / "index.bin")
+
+        manifest_tmp = self.root / "CURRENT.json.tmp"
+        manifest_tmp.write_text(json.dumps({
+            "version": version,
+            "index": f"versions/{version}/index.bin",
+            "published": time.time()
+        }, indent=2))
+        with self._lock:
+            os.replace(manifest_tmp, self.manifest_path)
+
+    def oldest_active(self) -> int:
+        """Oldest version a reader may still be looking at."""
+        with self._lock:
+            return min([self.current_version(), *(v for v, n in self._pins.items() if n > 0)])
+
+    def gc(self) -> List[int]:
+        """Deletes snapshot directories (and the legacy index) no reader needs any more."""
+        removed = []
+        with self._lock:
+            current = self.current_version()
+            in_use = {v for v, n in self._pins.items() if n > 0} | set(self._loaded) | {current}
+            candidates = []
+            if self.versions_dir.exists():
+                candidates = [int(p.name) for p in self.versions_dir.iterdir() if p.name.isdigit()]
+            for version in candidates:
+                if version < current and version not in in_use:
+                    try:
+                        shutil.rmtree(self.versions_dir / str(version))
+                        removed.append(version)
+                    except OSError:
+                        pass  # still mapped on platforms that lock open files; next gc retries
+            legacy = self.root / LEGACY_INDEX
+            if current > 0 and 0 not in in_use and legacy.exists():
+                try:
+                    legacy.unlink()
+                    removed.append(0)
+                except OSError:
+                    pass
+        return removed
+
+    # --- readers ---
+
+    @contextmanager
+    def pin(self) -> Iterator[Snapshot]:
+        """Current version and its index, held unchanged for the duration of the block."""
+        with self._lock:
+            version = self.current_version()
+            if version not in self._loaded:
+                path = self.index_path(version)
+                self._loaded[version] = self.loader(path) if path and path.exists() else None
+            self._pins[version] = self._pins.get(version, 0) + 1
+            snapshot = Snapshot(version, self._loaded[version])
+        try:
+            yield snapshot
+        finally:
+            with self._lock:
+                self._pins[version] -= 1
+                if self._pins[version] == 0:
+                    del self._pins[version]
+                # Older versions are dropped once their last reader is done
+                current = self.current_version()
+                for v in [v for v in self._loaded if v != current and v not in self._pins]:
+                    del self._loaded[v]
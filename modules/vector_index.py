@@ -0,0 +1,138 @@
+# modules/vector_index.py → FAISS Index Backends
+# Role: Build, inspect and tune the documents server's vector index.
+
+# Backends:
+
+# flat     → IndexIDMap2(IndexFlatL2): exact, brute force; best for small corpora
+
+# ivf_flat → IndexIVFFlat: k-means coarse quantizer, scans nprobe of nlist lists
+
+# ivf_pq   → IndexIVFPQ: IVF with product-quantized codes (pq_m bytes per vector at 8 bits)
+
+# hnsw     → IndexIDMap2(IndexHNSWFlat): graph search tuned by ef_search; cannot remove
+#            vectors, so deletions are compacted by rebuilding
+
+# "auto" picks flat / ivf_flat / ivf_pq from the corpus size. IVF indexes are trained on a
+# random sample; vectors are re-read from the chunk store whenever the index is rebuilt.
+
+# Used by: mcp_server_2.py, benchmarks/bench_vector_index.py
+
+import math
+from typing import Callable, Iterable, Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+def choose_index_type(n: int, config: dict) -> str:
+    kind = config.get("type", "auto")
+    if kind != "auto":
+        if kind not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {kind}")
+        return kind
+    if n <= config.get("auto_flat_max", 50_000):
+        return "flat"
+    if n <= config.get("auto_ivf_max", 1_000_000):
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def choose_nlist(n: int, config: dict) -> int:
+    """config nlist, else ~4·sqrt(n), capped so every list gets ≥ 39 training points."""
+    nlist = config.get("nlist") or int(4 * math.sqrt(max(n, 1)))
+    train_size = min(n, config.get("train_sample", 100_000))
+    return max(1, min(nlist, train_size // 39 or 1, 65536))
+
+
+def create_index(kind: str, dim: int, n: int, config: dict):
+    """Empty index of the given kind sized for about n vectors (IVF kinds still need training)."""
+    if kind == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+    if kind == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, config.get("hnsw_m", 32))
+        hnsw.hnsw.efConstruction = config.get("ef_construction", 200)
+        return faiss.IndexIDMap2(hnsw)
+
+    nlist = choose_nlist(n, config)
+    quantizer = faiss.IndexFlatL2(dim)
+    if kind == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    elif kind == "ivf_pq":
+        pq_m = config.get("pq_m", 16)
+        if dim % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dim}")
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, config.get("pq_bits", 8))
+    else:
+        raise ValueError(f"Unknown index type: {kind}")
+    return index
+
+
+def index_type(index) -> Optional[str]:
+    if index is None:
+        return None
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    return "hnsw" if isinstance(inner, faiss.IndexHNSW) else "flat"
+
+
+def index_ids(index) -> set:
+    if index is None:
+        return set()
+    if isinstance(index, faiss.IndexIDMap):
+        return set(faiss.vector_to_array(index.id_map).tolist())
+    ids, invlists = set(), faiss.extract_index_ivf(index).invlists
+    for list_no in range(invlists.nlist):
+        size = invlists.list_size(list_no)
+        if size:
+            ids.update(faiss.rev_swig_ptr(invlists.get_ids(list_no), size).tolist())
+    return ids
+
+
+def supports_removal(index) -> bool:
+    return index_type(index) != "hnsw"
+
+
+def configure_search(index, config: dict):
+    """Applies nprobe (IVF) / efSearch (HNSW) from config to a loaded index."""
+    kind = index_type(index)
+    params = faiss.ParameterSpace()
+    if kind in ("ivf_flat", "ivf_pq"):
+        params.set_index_parameter(index, "nprobe", config.get("nprobe", 16))
+    elif kind == "hnsw":
+        params.set_index_parameter(index, "efSearch", config.get("ef_search", 64))
+
+
+def needs_rebuild(index, n: int, config: dict) -> bool:
+    """True when the configured/auto type differs from the current one, or IVF lists are badly sized."""
+    if n == 0:
+        return False
+    kind = choose_index_type(n, config)
+    if index_type(index) != kind:
+        return True
+    if kind in ("ivf_flat", "ivf_pq") and not config.get("nlist"):
+        current, target = faiss.extract_index_ivf(index).nlist, choose_nlist(n, config)
+        return not (target / 4 <= current <= target * 4)
+    return False
+
+
+def build_index(
+    kind: str,
+    dim: int,
+    n: int,
+    sample: np.ndarray,
+    batches: Callable[[], Iterable[tuple]],
+    config: dict,
+):
+    """Creates, trains (on sample) and fills an index; batches() yields (ids, vectors) pairs."""
+    index = create_index(kind, dim, n, config)
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(sample, dtype=np.float32))
+    for ids, vectors in batches():
+        index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), np.asarray(ids, dtype=np.int64))
+    configure_search(index, config)
+    return index
@@ -4,7 +4,8 @@ import logging
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from agent import main as agent_main
+from core.service import AgentService
+from core.dispatch import ChatDispatcher
 
 # Load environment variables
 load_dotenv()
@@ -16,8 +17,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Dictionary to store user sessions
-user_sessions = {}
+# Shared agent for the whole bot process (see post_init / post_shutdown)
+agent_service = AgentService()
+
+# Worker pool for agent runs; None means messages are processed inline
+dispatcher = None
+
+BUSY_REPLY = "I'm handling a lot of requests right now. Please try again in a minute."
+SUPERSEDED_REPLY = "Skipping your earlier message and working on your latest one."
+
+async def post_init(application: Application) -> None:
+    """Start MCP servers and load tools once, before polling begins."""
+    global dispatcher
+    logger.info("Starting agent service...")
+    await agent_service.start()
+    logger.info("Agent service ready")
+
+    dispatch_config = agent_service.profile.dispatch_config
+    if dispatch_config.get("enabled", True):
+        dispatcher = ChatDispatcher(
+            max_workers=dispatch_config.get("max_workers", 4),
+            max_pending=dispatch_config.get("queue_size", 100),
+            cancel_superseded=dispatch_config.get("cancel_superseded", True)
+        )
+        logger.info(f"Dispatching messages with {dispatcher.max_workers} workers")
+
+async def post_shutdown(application: Application) -> None:
+    """Stop queued work and MCP server sessions when the bot exits."""
+    if dispatcher:
+        await dispatcher.close()
+    await agent_service.shutdown()
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /start is issued."""
@@ -36,24 +65,17 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         'Just send me your question or task, and I will work on it using various tools and reasoning.'
     )
 
-async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Handle the user message and process it through the agent."""
-    user_id = update.effective_user.id
+async def process_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Run the agent on one message and reply with its answer."""
     message = update.message.text
-    
-    logger.info(f"Received message from user {user_id}: {message}")
 
     # Show typing indicator
     await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
 
     try:
-        # Create a custom input function for the agent
-        async def get_user_input():
-            return message
-
-        logger.info("Calling agent_main with message")
-        # Run the agent with the user's message
-        response = await agent_main(get_user_input)
+        logger.info("Running agent service with message")
+        # Run the agent with the user's message, keyed by chat
+        response = await agent_service.run(message, session_key=str(update.effective_chat.id))
         logger.info(f"Agent response: {response}")
 
         # Send the response back to the user
@@ -65,6 +87,27 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             "I encountered an error while processing your request. Please try again later."
         )
 
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle the user message and process it through the agent."""
+    user_id = update.effective_user.id
+    message = update.message.text
+    
+    logger.info(f"Received message from user {user_id}: {message}")
+
+    if dispatcher is None:
+        await process_message(update, context)
+        return
+
+    # Hand off to the worker pool so one slow query does not block other chats
+    accepted = dispatcher.submit(
+        str(update.effective_chat.id),
+        lambda: process_message(update, context),
+        on_cancel=lambda: update.message.reply_text(SUPERSEDED_REPLY)
+    )
+    if not accepted:
+        logger.warning(f"Dispatcher full ({dispatcher.pending} pending), rejecting message from user {user_id}")
+        await update.message.reply_text(BUSY_REPLY)
+
 def main() -> None:
     """Start the bot."""
     try:
@@ -76,7 +119,13 @@ def main() -> None:
 
         logger.info("Starting the bot...")
         # Create the Application and pass it your bot's token
-        application = Application.builder().token(token).build()
+        application = (
+            Application.builder()
+            .token(token)
+            .post_init(post_init)
+            .post_shutdown(post_shutdown)
+            .build()
+        )
 
         # Add handlers
         application.add_handler(CommandHandler("start", start))
@@ -0,0 +1,63 @@
+import os
+
+# Importing modules.decision builds the default ModelManager; parsing never calls the model
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from modules.decision import extract_plan_lines, parse_fused_response
+
+
+def test_plan_is_the_first_final_answer():
+    raw = "Thinking...\nFINAL_ANSWER: [42]\nFINAL_ANSWER: [43]"
+    assert extract_plan_lines(raw) == "FINAL_ANSWER: [42]"
+
+
+def test_plan_is_every_consecutive_function_call():
+    raw = (
+        "```\n"
+        "FUNCTION_CALL: add|input.a=1|input.b=2\n"
+        "FUNCTION_CALL: sqrt|input.a=9\n"
+        "```\n"
+        "Then, after seeing the result:\n"
+        "FUNCTION_CALL: ignored|input.a=0"
+    )
+    assert extract_plan_lines(raw) == "FUNCTION_CALL: add|input.a=1|input.b=2\nFUNCTION_CALL: sqrt|input.a=9"
+
+
+def test_calls_before_a_final_answer_win():
+    raw = "FUNCTION_CALL: add|input.a=1|input.b=2\nFINAL_ANSWER: [3]"
+    assert extract_plan_lines(raw) == "FUNCTION_CALL: add|input.a=1|input.b=2"
+
+
+def test_no_plan_is_unknown():
+    assert extract_plan_lines("I am not sure what to do.") == "FINAL_ANSWER: [unknown]"
+
+
+def test_fused_response_is_split_into_perception_and_plan():
+    raw = (
+        "INTENT: Add two numbers\n"
+        'ENTITIES: ["1", "2"]\n'
+        "TOOL_HINT: add\n"
+        "FUNCTION_CALL: add|input.a=1|input.b=2"
+    )
+    perception, plan = parse_fused_response(raw, "add 1 and 2")
+    assert perception.user_input == "add 1 and 2"
+    assert perception.intent == "Add two numbers"
+    assert perception.entities == ["1", "2"]
+    assert perception.tool_hint == "add"
+    assert plan == "FUNCTION_CALL: add|input.a=1|input.b=2"
+
+
+def test_fused_response_accepts_loose_entities_and_no_hint():
+    raw = "`INTENT: Greet`\nENTITIES: [Alice, 'Bob']\nTOOL_HINT: None\nFINAL_ANSWER: [Hello]"
+    perception, plan = parse_fused_response(raw, "say hi")
+    assert perception.entities == ["Alice", "Bob"]
+    assert perception.tool_hint is None
+    assert plan == "FINAL_ANSWER: [Hello]"
+
+
+def test_fields_after_the_plan_are_ignored():
+    raw = "FINAL_ANSWER: [done]\nINTENT: should not be read"
+    perception, plan = parse_fused_response(raw, "q")
+    assert perception.intent is None
+    assert perception.entities == []
+    assert plan == "FINAL_ANSWER: [done]"
@@ -0,0 +1,152 @@
+import asyncio
+
+from core.dispatch import ChatDispatcher
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+async def settle(dispatcher: ChatDispatcher):
+    while dispatcher.active_chats or dispatcher._background:
+        await asyncio.sleep(0.01)
+
+
+def test_running_jobs_never_exceed_max_workers():
+    async def scenario():
+        dispatcher = ChatDispatcher(max_workers=3, cancel_superseded=False)
+        running, peak = 0, 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        for chat in range(10):
+            for _ in range(2):
+                assert dispatcher.submit(f"chat{chat}", job)
+        await settle(dispatcher)
+        return peak
+
+    assert run(scenario()) == 3
+
+
+def test_jobs_of_one_chat_run_one_at_a_time_in_order():
+    async def scenario():
+        dispatcher = ChatDispatcher(max_workers=4, cancel_superseded=False)
+        events = []
+
+        def job(n):
+            async def run_job():
+                events.append(("start", n))
+                await asyncio.sleep(0.01)
+                events.append(("end", n))
+            return run_job
+
+        for n in range(5):
+            dispatcher.submit("chat", job(n))
+        await settle(dispatcher)
+        return events
+
+    assert run(scenario()) == [(kind, n) for n in range(5) for kind in ("start", "end")]
+
+
+def test_submit_returns_false_when_the_queue_is_full():
+    async def scenario():
+        dispatcher = ChatDispatcher(max_workers=1, max_pending=2, cancel_superseded=False)
+        release = asyncio.Event()
+        done = []
+
+        def job(n):
+            async def run_job():
+                await release.wait()
+                done.append(n)
+            return run_job
+
+        accepted = [dispatcher.submit(f"chat{n}", job(n)) for n in range(3)]
+        await asyncio.sleep(0.01)  # chat0 takes the worker; its job no longer counts as pending
+        accepted.append(dispatcher.submit("chat3", job(3)))
+        accepted.append(dispatcher.submit("chat4", job(4)))
+        pending = dispatcher.pending
+        release.set()
+        await settle(dispatcher)
+        return accepted, pending, sorted(done), dispatcher._queues
+
+    accepted, pending, done, queues = run(scenario())
+    assert accepted == [True, True, False, True, False]
+    assert pending == 2
+    assert done == [0, 1, 3]
+    assert queues == {}  # rejected chats leave no empty queue behind
+
+
+def test_superseded_queued_jobs_are_cancelled_while_the_running_job_finishes():
+    async def scenario():
+        dispatcher = ChatDispatcher(max_workers=2, cancel_superseded=True)
+        release = asyncio.Event()
+        events = []
+
+        def job(n, wait=False):
+            async def run_job():
+                events.append(("run", n))
+                if wait:
+                    await release.wait()
+                events.append(("done", n))
+            return run_job
+
+        def cancelled(n):
+            async def on_cancel():
+                events.append(("cancelled", n))
+            return on_cancel
+
+        dispatcher.submit("chat", job(1, wait=True), cancelled(1))
+        await asyncio.sleep(0.01)  # job 1 is running
+        dispatcher.submit("chat", job(2), cancelled(2))
+        dispatcher.submit("chat", job(3), cancelled(3))  # supersedes the queued job 2
+        await asyncio.sleep(0.01)
+        before_release = list(events)
+        release.set()
+        await settle(dispatcher)
+        return before_release, events
+
+    before_release, events = run(scenario())
+    assert before_release == [("run", 1), ("cancelled", 2)]
+    assert events == [("run", 1), ("cancelled", 2), ("done", 1), ("run", 3), ("done", 3)]
+
+
+def test_a_failing_job_does_not_stop_its_chat():
+    async def scenario():
+        dispatcher = ChatDispatcher(max_workers=1, cancel_superseded=False)
+        done = []
+
+        async def failing():
+            raise RuntimeError("agent crashed")
+
+        async def ok():
+            done.append("ok")
+
+        dispatcher.submit("chat", failing)
+        dispatcher.submit("chat", ok)
+        await settle(dispatcher)
+        return done, dispatcher.pending
+
+    assert run(scenario()) == (["ok"], 0)
+
+
+def test_close_cancels_running_and_queued_jobs():
+    async def scenario():
+        dispatcher = ChatDispatcher(max_workers=1, cancel_superseded=False)
+        started = []
+
+        async def forever():
+            started.append(1)
+            await asyncio.sleep(60)
+
+        dispatcher.submit("a", forever)
+        dispatcher.submit("b", forever)
+        await asyncio.sleep(0.01)
+        await dispatcher.close()
+        return started, dispatcher.pending, dispatcher.active_chats
+
+    assert run(scenario()) == ([1], 0, 0)
@@ -0,0 +1,122 @@
+import pytest
+
+from modules.doc_store import DocStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DocStore(str(tmp_path / "documents.sqlite"))
+    yield store
+    store.close()
+
+
+def row(vector_id, doc, text):
+    return {"id": vector_id, "doc": doc, "chunk_hash": f"h:{text}", "chunk": text, "chunk_id": f"{doc}_{vector_id}"}
+
+
+def test_documents_get_consecutive_id_ranges(store):
+    assert store.add_document("a.md")["doc_num"] == 0
+    assert store.add_document("b.md")["doc_num"] == 1
+    store.delete_document("a.md")
+    # Ranges are never handed out twice
+    assert store.add_document("c.md")["doc_num"] == 2
+
+
+def test_pinned_versions_keep_their_rows(store):
+    store.add_document("a.md")
+    store.put_chunks([row(1, "a.md", "old text about cricket")], version=1)
+    store.remove_sources("a.md", ["h:old text about cricket"], version=2)
+    store.put_chunks([row(2, "a.md", "new text about cricket")], version=2)
+
+    assert set(store.get_chunks([1, 2], version=1)) == {1}
+    assert set(store.get_chunks([1, 2], version=2)) == {2}
+    assert set(store.get_chunks([1, 2])) == {2}
+    assert store.bm25_search("cricket", 10, version=1) == [1]
+    assert store.bm25_search("cricket", 10) == [2]
+    assert store.count() == 1
+
+
+def test_purge_drops_only_rows_no_reader_can_see(store):
+    store.add_document("a.md")
+    store.put_chunks([row(1, "a.md", "first"), row(2, "a.md", "second")], version=1)
+    store.remove_sources("a.md", ["h:first"], version=2)
+    store.remove_sources("a.md", ["h:second"], version=3)
+
+    assert store.purge(2) == 1
+    assert store.reserved_ids("a.md") == {2}
+    assert set(store.get_chunks([2], version=2)) == {2}
+    assert store.purge(3) == 1
+    assert store.reserved_ids("a.md") == set()
+
+
+def test_shared_chunk_lists_every_source(store):
+    store.add_document("a.md")
+    store.add_document("b.md")
+    store.put_chunks([row(1, "a.md", "boilerplate")], version=1)
+    store.put_sources([{**row(1, "b.md", "boilerplate"), "chunk_id": "b.md_7"}], version=2)
+
+    assert store.find_chunks(["h:boilerplate"]) == {"h:boilerplate": 1}
+    chunk = store.get_chunks([1])[1]
+    assert chunk["sources"] == [{"doc": "a.md", "chunk_id": "a.md_1"}, {"doc": "b.md", "chunk_id": "b.md_7"}]
+    assert (chunk["doc"], chunk["chunk_id"]) == ("a.md", "a.md_1")
+    # Version 1 readers have not seen the second source yet
+    assert store.get_chunks([1], version=1)[1]["sources"] == [{"doc": "a.md", "chunk_id": "a.md_1"}]
+
+
+def test_shared_chunk_survives_until_its_last_source_goes(store):
+    store.add_document("a.md")
+    store.add_document("b.md")
+    store.put_chunks([row(1, "a.md", "boilerplate")], version=1)
+    store.put_sources([row(1, "b.md", "boilerplate")], version=1)
+
+    assert store.delete_document("a.md", version=2) == []
+    chunk = store.get_chunks([1])[1]
+    assert chunk["sources"] == [{"doc": "b.md", "chunk_id": "b.md_1"}]
+    assert chunk["doc"] == "b.md"
+
+    assert store.delete_document("b.md", version=3) == [1]
+    assert store.get_chunks([1]) == {}
+    assert store.count() == 0
+
+
+def test_put_sources_updates_the_chunk_id_of_an_existing_source(store):
+    store.add_document("a.md")
+    store.put_chunks([row(1, "a.md", "text")], version=1)
+    store.put_sources([{**row(1, "a.md", "text"), "chunk_id": "a.md_9"}], version=2)
+    assert store.get_chunks([1])[1]["sources"] == [{"doc": "a.md", "chunk_id": "a.md_9"}]
+
+
+def test_delete_chunks_reports_the_documents_that_lost_one(store):
+    store.add_document("a.md")
+    store.add_document("b.md")
+    store.put_chunks([row(1, "a.md", "shared")], version=1)
+    store.put_sources([row(1, "b.md", "shared")], version=1)
+    assert store.delete_chunks([1], version=2) == {"a.md", "b.md"}
+    assert store.chunk_ids("a.md") == {} and store.chunk_ids("b.md") == {}
+
+
+def test_vectors_and_bookkeeping_persist_across_reopen(tmp_path):
+    path = str(tmp_path / "documents.sqlite")
+    store = DocStore(path)
+    store.add_document("a.md")
+    store.put_chunks([{**row(1, "a.md", "text"), "vector": b"\x00" * 8}], version=4)
+    store.put_chunks([row(2, "a.md", "other")], version=4)
+    store.set_version(4)
+    store.set_tombstones([5, 6])
+    store.commit()
+    store.close()
+
+    store = DocStore(path)
+    assert store.version() == 4
+    assert store.tombstones() == {5, 6}
+    assert store.get_vectors([1, 2]) == {1: b"\x00" * 8}
+    assert store.ids_without_vector() == [2]
+    store.close()
+
+
+def test_uncommitted_writes_roll_back(store):
+    store.add_document("a.md")
+    store.commit()
+    store.put_chunks([row(1, "a.md", "text")], version=1)
+    store.rollback()
+    assert store.count() == 0
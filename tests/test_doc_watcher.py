@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from modules.doc_watcher import DocumentWatcher
+
+
+class Batches:
+    def __init__(self):
+        self.batches = []
+        self.event = threading.Event()
+
+    def __call__(self, paths):
+        self.batches.append({p.name for p in paths})
+        self.event.set()
+
+    def wait(self, timeout=5.0):
+        assert self.event.wait(timeout), "no batch delivered"
+        self.event.clear()
+
+
+@pytest.fixture
+def watched(tmp_path):
+    watchers = []
+
+    def make(on_change, **options):
+        watcher = DocumentWatcher(tmp_path, on_change, backend="polling", **options)
+        watcher.start()
+        watchers.append(watcher)
+        return watcher
+
+    yield tmp_path, make
+    for watcher in watchers:
+        watcher.stop()
+
+
+def test_burst_of_events_is_one_batch(watched):
+    folder, make = watched
+    batches = Batches()
+    watcher = make(batches, debounce=0.3, poll_interval=60)
+    for name in ["a.md", "b.md", "a.md", "c.pdf"]:
+        watcher.notify(folder / name)
+        time.sleep(0.05)
+    batches.wait()
+    time.sleep(0.4)
+    assert batches.batches == [{"a.md", "b.md", "c.pdf"}]
+
+
+def test_batch_waits_until_the_folder_is_quiet(watched):
+    folder, make = watched
+    batches = Batches()
+    watcher = make(batches, debounce=0.3, poll_interval=60)
+    start = time.monotonic()
+    for _ in range(5):
+        watcher.notify(folder / "a.md")
+        time.sleep(0.15)
+    batches.wait()
+    # The last event came ~0.6s in; the batch follows it by the debounce
+    assert time.monotonic() - start >= 0.9
+
+
+def test_paths_outside_the_folder_are_ignored(watched):
+    folder, make = watched
+    batches = Batches()
+    watcher = make(batches, debounce=0.1, poll_interval=60)
+    watcher.notify(folder / "sub" / "x.md")
+    watcher.notify(folder.parent / "y.md")
+    watcher.notify(folder / "z.md")
+    batches.wait()
+    assert batches.batches == [{"z.md"}]
+
+
+def test_polling_sees_added_changed_and_removed_files(watched):
+    folder, make = watched
+    (folder / "keep.md").write_text("one")
+    (folder / "gone.md").write_text("bye")
+    batches = Batches()
+    make(batches, debounce=0.1, poll_interval=0.1)
+    time.sleep(0.2)
+
+    (folder / "keep.md").write_text("one, edited")
+    (folder / "gone.md").unlink()
+    (folder / "new.md").write_text("hello")
+    batches.wait()
+    deadline = time.monotonic() + 2
+    while set().union(*batches.batches) != {"keep.md", "gone.md", "new.md"} and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert set().union(*batches.batches) == {"keep.md", "gone.md", "new.md"}
+
+
+def test_errors_go_to_on_error_and_the_watcher_keeps_running(watched):
+    folder, make = watched
+    errors, batches = [], Batches()
+
+    def on_change(paths):
+        batches(paths)
+        if len(batches.batches) == 1:
+            raise RuntimeError("indexing failed")
+
+    watcher = make(on_change, debounce=0.05, poll_interval=60)
+    watcher.on_error = errors.append
+    watcher.notify(folder / "a.md")
+    batches.wait()
+    watcher.notify(folder / "b.md")
+    batches.wait()
+    assert [str(e) for e in errors] == ["indexing failed"]
+    assert batches.batches == [{"a.md"}, {"b.md"}]
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        DocumentWatcher(tmp_path, lambda paths: None, backend="inotify")
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from modules.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings"), max_entries=100, reuse_after=0)
+    yield cache
+    cache.close()
+
+
+def vector(i, dim=8):
+    return np.full(dim, i, dtype=np.float32)
+
+
+def test_keys_depend_on_model_endpoint_and_text():
+    key = EmbeddingCache.make_key("nomic", "text", "/api/embed")
+    assert key == EmbeddingCache.make_key("nomic", "text", "/api/embed")
+    assert key != EmbeddingCache.make_key("nomic", "text", "/api/embeddings")
+    assert key != EmbeddingCache.make_key("other", "text", "/api/embed")
+    assert key != EmbeddingCache.make_key("nomic", "text2", "/api/embed")
+
+
+def test_round_trip_and_counters(cache):
+    cache.put_many({"a": vector(1), "b": vector(2, dim=4)})
+    found = cache.get_many(["a", "b", "missing"])
+    np.testing.assert_array_equal(found["a"], vector(1))
+    np.testing.assert_array_equal(found["b"], vector(2, dim=4))
+    assert "missing" not in found
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 2)
+
+
+def test_existing_keys_are_not_overwritten(cache):
+    cache.put("a", vector(1))
+    cache.put("a", vector(9))
+    np.testing.assert_array_equal(cache.get("a"), vector(1))
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.put_many({f"k{i}": vector(i) for i in range(100)})
+    cache.get("k0")  # recently used: survives
+    cache.put("new", vector(100))
+
+    assert cache.evictions == 1
+    # k1..k99 share one access time, so any one of them may go, never k0
+    assert len(cache.get_many([f"k{i}" for i in range(1, 100)])) == 98
+    np.testing.assert_array_equal(cache.get("k0"), vector(0))
+    np.testing.assert_array_equal(cache.get("new"), vector(100))
+    assert cache.stats()["entries"] == 100
+
+
+def test_evicted_slots_are_reused(cache):
+    cache.put_many({f"k{i}": vector(i) for i in range(100)})
+    for i in range(100, 150):
+        cache.put(f"k{i}", vector(i))
+    rows = cache._map(8, 1).shape[0]
+    assert cache._db.execute("SELECT MAX(slot) FROM entries").fetchone()[0] < rows
+    assert cache._db.execute("SELECT slot FROM next_slot WHERE dim = 8").fetchone()[0] == 100
+    for i in range(100, 150):
+        np.testing.assert_array_equal(cache.get(f"k{i}"), vector(i))
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "embeddings")
+    cache = EmbeddingCache(path)
+    cache.put("a", vector(3))
+    cache.close()
+
+    cache = EmbeddingCache(path)
+    np.testing.assert_array_equal(cache.get("a"), vector(3))
+    cache.close()
+
+
+def test_shared_returns_one_instance_per_directory(tmp_path):
+    first = EmbeddingCache.shared(str(tmp_path / "embeddings"))
+    try:
+        assert EmbeddingCache.shared(str(tmp_path / "embeddings")) is first
+        assert EmbeddingCache.shared(str(tmp_path / "other")) is not first
+    finally:
+        for key in [k for k in EmbeddingCache._shared if k.startswith(str(tmp_path.resolve()))]:
+            EmbeddingCache._shared.pop(key).close()
+
+
+def test_entry_counts_track_inserts_and_evictions(cache):
+    cache.put_many({f"k{i}": vector(i) for i in range(150)})
+    cache.put_many({f"d{i}": vector(i, dim=4) for i in range(3)})
+    counts = dict(cache._db.execute("SELECT dim, entries FROM counts"))
+    actual = dict(cache._db.execute("SELECT dim, COUNT(*) FROM entries GROUP BY dim"))
+    assert counts == actual
+    assert counts[8] <= 100 and counts[4] == 3
+
+
+def test_counts_are_built_for_caches_from_before_them(tmp_path):
+    path = str(tmp_path / "embeddings")
+    cache = EmbeddingCache(path)
+    cache.put_many({f"k{i}": vector(i) for i in range(5)})
+    cache._db.execute("DROP TABLE counts")
+    cache._db.commit()
+    cache.close()
+
+    cache = EmbeddingCache(path)
+    assert dict(cache._db.execute("SELECT dim, entries FROM counts")) == {8: 5}
+    cache.close()
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from modules.llm_cache import FLUSH_EVERY, LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), memory_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_keys_depend_on_model_params_and_prompt():
+    key = LLMResponseCache.make_key("phi4", "hi", {"temperature": 0})
+    assert key == LLMResponseCache.make_key("phi4", "hi", {"temperature": 0})
+    assert key != LLMResponseCache.make_key("phi4", "hi", {"temperature": 1})
+    assert key != LLMResponseCache.make_key("gemma", "hi", {"temperature": 0})
+    assert key != LLMResponseCache.make_key("phi4", "hello", {"temperature": 0})
+
+
+def test_memory_and_disk_hits(cache):
+    for key in "abc":
+        cache.put(key, key * 3)
+    assert cache.get("c") == "ccc"  # still in memory
+    assert cache.get("a") == "aaa"  # pushed out of memory, read from disk
+    assert cache.get("zz") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (2, 1, 1)
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), ttl_seconds=0.05)
+    cache.put("a", "answer")
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    cache.put("b", "other")  # the eviction pass deletes the expired row
+    assert cache.stats()["disk_entries"] == 1
+    cache.close()
+
+
+def test_hits_do_not_commit_until_a_batch_is_full(cache):
+    keys = [f"k{i}" for i in range(FLUSH_EVERY)]
+    for key in keys:
+        cache.put(key, key)
+    for key in keys[:-1]:
+        assert cache.get(key) == key
+    assert len(cache._touched) == FLUSH_EVERY - 1
+    assert not cache._db.in_transaction
+
+    cache.get(keys[-1])
+    assert not cache._touched
+    assert not cache._db.in_transaction
+
+
+def test_least_recently_used_are_evicted_with_buffered_access_times(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), max_entries=3, memory_entries=1)
+    for key in "abc":
+        cache.put(key, key)
+        time.sleep(0.01)
+    cache.get("a")  # buffered; written before the next put evicts
+    cache.put("d", "d")
+    keys = {r[0] for r in cache._db.execute("SELECT key FROM responses")}
+    assert keys == {"a", "c", "d"}
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_access_times_are_written_on_close(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    cache = LLMResponseCache(path)
+    cache.put("a", "answer")
+    before = cache._db.execute("SELECT accessed FROM responses").fetchone()[0]
+    time.sleep(0.01)
+    cache.get("a")
+    cache.close()
+
+    cache = LLMResponseCache(path)
+    assert cache._db.execute("SELECT accessed FROM responses").fetchone()[0] > before
+    assert cache.get("a") == "answer"
+    cache.close()
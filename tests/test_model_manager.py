@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from modules import model_manager
+from modules.model_manager import ModelManager
+
+
+async def start_mock_ollama(delay: float, requests: list = None):
+    async def handle(reader, writer):
+        if requests is not None:
+            requests.append(1)
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = next(int(line.split(b":", 1)[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length:"))
+        await reader.readexactly(length)
+        await asyncio.sleep(delay)
+        body = json.dumps({"response": " slow answer ", "done": True}).encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                     + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/api/generate"
+
+
+def ollama_model(url: str, timeout: float) -> ModelManager:
+    model = ModelManager(model_key="phi4")
+    model.model_info = {**model.model_info, "url": {"generate": url}}
+    model.timeout = timeout
+    return model
+
+
+@pytest.fixture(autouse=True)
+def short_client_timeout(monkeypatch):
+    # The shared client's default read timeout, shrunk so the test runs in well under a second
+    monkeypatch.setattr(model_manager, "DEFAULT_TIMEOUT", 0.2)
+
+
+def test_model_timeout_above_the_client_default_is_honoured():
+    async def scenario():
+        server, url = await start_mock_ollama(delay=0.5)
+        try:
+            return await ollama_model(url, timeout=2.0).generate_text("hi", use_cache=False)
+        finally:
+            await ModelManager.aclose()
+            server.close()
+
+    assert asyncio.run(scenario()) == "slow answer"
+
+
+def test_call_timeout_still_applies():
+    async def scenario():
+        server, url = await start_mock_ollama(delay=1.0)
+        try:
+            await ollama_model(url, timeout=5.0).generate_text("hi", timeout=0.3, use_cache=False)
+        finally:
+            await ModelManager.aclose()
+            server.close()
+
+    with pytest.raises((asyncio.TimeoutError, httpx.ReadTimeout)):
+        asyncio.run(scenario())
+
+
+@pytest.fixture
+def cache_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_manager, "ROOT", tmp_path)
+    monkeypatch.setattr(ModelManager, "_cache", None)
+    yield tmp_path
+    if ModelManager._cache is not None:
+        ModelManager._cache.close()
+
+
+def test_response_cache_is_not_opened_by_constructing_a_manager(cache_root):
+    ModelManager(model_key="phi4")
+    assert ModelManager._cache is None
+    assert not (cache_root / "cache").exists()
+
+
+def test_response_cache_is_opened_by_the_first_cached_call(cache_root):
+    requests = []
+
+    async def scenario():
+        server, url = await start_mock_ollama(delay=0, requests=requests)
+        model = ollama_model(url, timeout=2.0)
+        try:
+            await model.generate_text("uncached", use_cache=False)
+            opened_early = ModelManager._cache is not None
+            answers = [await model.generate_text("same prompt") for _ in range(2)]
+            return opened_early, answers
+        finally:
+            await ModelManager.aclose()
+            server.close()
+
+    opened_early, answers = asyncio.run(scenario())
+    assert not opened_early
+    assert answers == ["slow answer", "slow answer"]
+    assert len(requests) == 2  # the repeated prompt was served from the cache
+    assert (cache_root / "cache" / "llm_responses.sqlite").exists()
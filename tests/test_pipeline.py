@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from modules.pipeline import Stage, run_pipeline
+
+
+def test_every_item_reaches_the_sink():
+    out = []
+    run_pipeline(range(50), [Stage("double", lambda x: x * 2, workers=4), Stage("inc", lambda x: x + 1)], out.append)
+    assert sorted(out) == [x * 2 + 1 for x in range(50)]
+
+
+def test_single_workers_keep_order():
+    out = []
+    run_pipeline(range(100), [Stage("a", lambda x: x), Stage("b", lambda x: x)], out.append, queue_size=2)
+    assert out == list(range(100))
+
+
+def test_sink_runs_in_the_callers_thread():
+    threads = set()
+    run_pipeline(range(10), [Stage("id", lambda x: x, workers=3)], lambda _: threads.add(threading.get_ident()))
+    assert threads == {threading.get_ident()}
+
+
+def test_none_drops_the_item():
+    out = []
+    run_pipeline(range(10), [Stage("odd", lambda x: x if x % 2 else None, workers=2)], out.append)
+    assert sorted(out) == [1, 3, 5, 7, 9]
+
+
+def test_stage_errors_go_to_on_error_and_the_rest_continue():
+    def fn(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    out, errors = [], []
+    run_pipeline(range(6), [Stage("check", fn, workers=2)], out.append,
+                 on_error=lambda stage, item, e: errors.append((stage, item, str(e))))
+    assert sorted(out) == [0, 1, 2, 4, 5]
+    assert errors == [("check", 3, "bad item")]
+
+
+def test_items_iterator_error_is_raised_after_the_fed_items_finish():
+    def items():
+        yield 1
+        yield 2
+        raise RuntimeError("listing failed")
+
+    out = []
+    with pytest.raises(RuntimeError, match="listing failed"):
+        run_pipeline(items(), [Stage("id", lambda x: x, workers=2)], out.append)
+    assert sorted(out) == [1, 2]
+
+
+def test_sink_error_cancels_the_stages():
+    def sink(item):
+        raise OSError("disk full")
+
+    fed = []
+
+    def items():
+        for i in range(1000):
+            fed.append(i)
+            yield i
+
+    start = time.monotonic()
+    with pytest.raises(OSError, match="disk full"):
+        run_pipeline(items(), [Stage("slow", lambda x: time.sleep(0.01) or x, workers=2)], sink, queue_size=2)
+    assert time.monotonic() - start < 5
+    # Bounded queues: the feeder stopped long before the end of the input
+    assert len(fed) < 50
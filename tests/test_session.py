@@ -0,0 +1,98 @@
+import asyncio
+import textwrap
+
+from mcp.types import Tool
+
+from core.session import MultiMCP, ToolManifestCache
+
+SERVER = textwrap.dedent('''
+    from mcp.server.fastmcp import FastMCP
+
+    mcp = FastMCP("echo")
+
+    @mcp.tool()
+    def {name}(text: str) -> str:
+        """Returns text unchanged."""
+        return text
+
+    if __name__ == "__main__":
+        mcp.run(transport="stdio")
+''')
+
+
+def server_config(folder, name):
+    (folder / f"{name}_server.py").write_text(SERVER.format(name=name))
+    return {"script": f"{name}_server.py", "cwd": str(folder)}
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 60))
+
+
+def test_idle_servers_are_stopped_unless_their_timeout_is_zero(tmp_path):
+    configs = [server_config(tmp_path, "echo"), {**server_config(tmp_path, "keep"), "idle_timeout": 0}]
+
+    async def scenario():
+        multi = MultiMCP(configs, lazy=True, idle_timeout=1, manifest_path=str(tmp_path / "m.json"))
+        await multi.initialize()
+        assert not multi.pools  # lazy: nothing running yet
+        await multi.call_tool("echo", {"text": "hi"})
+        await multi.call_tool("keep", {"text": "hi"})
+        await asyncio.sleep(2.5)
+        state = {script: pool.started for script, pool in multi.pools.items()}
+        multi._reaper.cancel()
+        for pool in multi.pools.values():
+            await pool.close()
+        return state
+
+    assert run(scenario()) == {"echo_server.py": False, "keep_server.py": True}
+
+
+def test_lazy_false_servers_start_at_initialize(tmp_path):
+    config = {**server_config(tmp_path, "echo"), "lazy": False}
+
+    async def scenario():
+        multi = MultiMCP([config], lazy=True, manifest_path=str(tmp_path / "m.json"))
+        await multi.initialize()
+        started = "echo_server.py" in multi.pools and multi.pools["echo_server.py"].started
+        result = await multi.call_tool("echo", {"text": "hi"})
+        for pool in multi.pools.values():
+            await pool.close()
+        return started, result.content[0].text
+
+    assert run(scenario()) == (True, "hi")
+
+
+def test_manifest_hash_covers_local_imports(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "models.py").write_text("class AddInput: pass\n")
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "a.py").write_text("from . import b\n")
+    (tmp_path / "pkg" / "b.py").write_text("X = 1\n")
+    (tmp_path / "server.py").write_text("import json\nfrom models import AddInput\nfrom pkg.a import thing\n")
+    config = {"script": "server.py", "cwd": str(tmp_path)}
+
+    found = ToolManifestCache.local_imports(tmp_path / "server.py", tmp_path)
+    assert [p.relative_to(tmp_path.resolve()).as_posix() for p in found] == ["models.py", "pkg/a.py", "pkg/b.py"]
+
+    before = ToolManifestCache.script_hash(config)
+    (tmp_path / "pkg" / "b.py").write_text("X = 2\n")
+    after_module = ToolManifestCache.script_hash(config)
+    (tmp_path / "models.py").write_text("class AddInput:\n    a: int\n")
+    after_models = ToolManifestCache.script_hash(config)
+    assert len({before, after_module, after_models}) == 3
+
+
+def test_stale_manifest_entry_is_ignored(tmp_path):
+    (tmp_path / "models.py").write_text("A = 1\n")
+    (tmp_path / "server.py").write_text("from models import A\n")
+    config = {"script": "server.py", "cwd": str(tmp_path)}
+    tool = Tool(name="add", description="Adds", inputSchema={"type": "object"})
+
+    manifest = ToolManifestCache(str(tmp_path / "manifest.json"))
+    manifest.put(config, [tool])
+    manifest.save()
+    assert [t.name for t in ToolManifestCache(str(tmp_path / "manifest.json")).get(config)] == ["add"]
+
+    (tmp_path / "models.py").write_text("A = 2\n")
+    assert ToolManifestCache(str(tmp_path / "manifest.json")).get(config) is None
@@ -0,0 +1,59 @@
+import pytest
+
+from modules.snapshots import SnapshotManager
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    return SnapshotManager(tmp_path, loader=lambda path: path.read_text())
+
+
+def publish(snapshots, version):
+    snapshots.publish(version, lambda path: path.write_text(f"index {version}"))
+
+
+def test_no_manifest_is_version_zero(snapshots):
+    assert snapshots.current_version() == 0
+    with snapshots.pin() as snapshot:
+        assert (snapshot.version, snapshot.index) == (0, None)
+
+
+def test_legacy_index_is_version_zero(snapshots, tmp_path):
+    (tmp_path / "index.bin").write_text("legacy")
+    with snapshots.pin() as snapshot:
+        assert (snapshot.version, snapshot.index) == (0, "legacy")
+
+
+def test_publish_switches_new_readers_only(snapshots):
+    publish(snapshots, 1)
+    with snapshots.pin() as old:
+        publish(snapshots, 2)
+        with snapshots.pin() as new:
+            assert (old.version, old.index) == (1, "index 1")
+            assert (new.version, new.index) == (2, "index 2")
+    assert not list(snapshots.versions_dir.glob("*/index.bin.tmp"))
+
+
+def test_gc_keeps_current_and_pinned_versions(snapshots, tmp_path):
+    (tmp_path / "index.bin").write_text("legacy")
+    publish(snapshots, 1)
+    with snapshots.pin():
+        publish(snapshots, 2)
+        publish(snapshots, 3)
+        assert snapshots.oldest_active() == 1
+        assert sorted(snapshots.gc()) == [0, 2]  # version 1 is pinned, 3 is current
+        assert sorted(p.name for p in snapshots.versions_dir.iterdir()) == ["1", "3"]
+    assert snapshots.oldest_active() == 3
+    assert snapshots.gc() == [1]
+    assert [p.name for p in snapshots.versions_dir.iterdir()] == ["3"]
+    assert not (tmp_path / "index.bin").exists()
+
+
+def test_manifest_is_reread_when_another_writer_publishes(tmp_path):
+    reader = SnapshotManager(tmp_path, loader=lambda path: path.read_text())
+    writer = SnapshotManager(tmp_path, loader=lambda path: path.read_text())
+    publish(writer, 1)
+    assert reader.current_version() == 1
+    publish(writer, 2)
+    with reader.pin() as snapshot:
+        assert (snapshot.version, snapshot.index) == (2, "index 2")